@@ -0,0 +1,104 @@
+#!/usr/bin/python
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Compares loading JSON definitions with loading their precompiled .aidef versions
+
+Writes a level's worth of generated state machine definitions to a
+temporary directory and times loading all of them through a fresh
+DefinitionCache, with and without precompiled files, both for the
+parsed data alone and including template compilation.
+
+Usage: python benchmarks/definition_loading.py [definitions] [states]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai import definition_compiler
+from scripts.ai.decision_strategies.state_machine import StateMachine
+from scripts.ai.definition_cache import DefinitionCache
+
+
+def make_definition(states):
+	definition = {"states" : []}
+	for i in range(states):
+		definition["states"].append({
+			"name" : "state%d" % i,
+			"entry_actions" : ["seek"],
+			"actions" : ["seek", "separation"],
+			"exit_actions" : [],
+			"transitions" : [
+				[["AND", ["VALUE", "target_range", "-inf", i], ["NOT", ["TIMER", 2]]], "state%d" % ((i + 1) % states)],
+				[["OR", ["COMPARE", "speed", ">", 0.5], ["VALUE", "state_time", 3, "inf"]], "state%d" % ((i + 7) % states)],
+			],
+		})
+	return definition
+
+
+def load_all(paths, compile):
+	cache = DefinitionCache()
+	start = time.perf_counter()
+	for path in paths:
+		if compile:
+			cache.get(path, StateMachine)
+		else:
+			cache.load(path)
+	return time.perf_counter() - start
+
+
+def best(paths, compile, repeat=5):
+	return min(load_all(paths, compile) for i in range(repeat))
+
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+	states = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+	directory = tempfile.mkdtemp()
+	try:
+		paths = []
+		for i in range(count):
+			path = os.path.join(directory, "definition%d.json" % i)
+			with open(path, 'w') as f:
+				json.dump(make_definition(states), f)
+			paths.append(path)
+
+		json_load = best(paths, False)
+		json_compile = best(paths, True)
+
+		for path in paths:
+			errors = definition_compiler.compile_file(path)
+			if errors:
+				raise ValueError(errors)
+
+		binary_load = best(paths, False)
+		binary_compile = best(paths, True)
+	finally:
+		shutil.rmtree(directory)
+
+	print("%d definitions of %d states" % (count, states))
+	print("%-8s %12s %16s" % ("", "load ms", "load+compile ms"))
+	print("%-8s %12.2f %16.2f" % ("json", json_load * 1000, json_compile * 1000))
+	print("%-8s %12.2f %16.2f" % (definition_compiler.EXTENSION, binary_load * 1000, binary_compile * 1000))
+
+
+if __name__ == '__main__':
+	main()
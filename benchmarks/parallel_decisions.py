@@ -0,0 +1,139 @@
+#!/usr/bin/python
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Times ParallelEvaluator against in-process evaluation
+
+A crowd of headless agents chases a circling target with a state machine
+using VALUE, COMPARE and TIMER conditions. Use it to find the crowd size
+where the workers break even, for ParallelEvaluator's ``min_agents``. The
+run also fails if the two modes ever disagree, tests/test_parallel.py
+checks that as a unit test.
+
+Usage: python benchmarks/parallel_decisions.py [agents] [ticks] [workers]
+"""
+
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai.agent_bge import AgentBGE
+from scripts.ai.headless import HeadlessObject
+from scripts.ai.manager import Manager
+from scripts.ai.parallel import ParallelEvaluator
+
+
+DT = 1 / 60
+
+DEFINITION = {
+	"states" : [
+		{
+			"name" : "idle",
+			"entry_actions" : [],
+			"actions" : [],
+			"exit_actions" : [],
+			"transitions" : [
+				[["AND", ["VALUE", "target_range", "-inf", 12], ["TIMER", 0.25]], "chase"],
+			],
+		},
+		{
+			"name" : "chase",
+			"entry_actions" : [],
+			"actions" : ["seek"],
+			"exit_actions" : [],
+			"transitions" : [
+				[["COMPARE", "target_range", "<", 1.5], "rest"],
+				[["OR", ["COMPARE", "target_range", ">", 14], ["TIMER", 4]], "idle"],
+			],
+		},
+		{
+			"name" : "rest",
+			"entry_actions" : [],
+			"actions" : [],
+			"exit_actions" : [],
+			"transitions" : [
+				[["AND", ["TIMER", 1], ["NOT", ["COMPARE", "speed", ">", 0.05]]], "idle"],
+			],
+		},
+	]
+}
+
+
+def run(path, count, ticks, workers):
+	manager = Manager()
+	if workers:
+		manager.scheduler.evaluate = ParallelEvaluator(workers, min_agents=1)
+
+	target = AgentBGE(HeadlessObject(name="target"))
+	side = int(math.ceil(math.sqrt(count)))
+	for i in range(count):
+		agent = AgentBGE(HeadlessObject((i % side * 1.5 - side * 0.75, i // side * 1.5 - side * 0.75, 0.0)))
+		agent.target = target
+		agent.load_definition(path, manager.action_set)
+		manager.add(agent)
+
+	history = []
+	decide = 0.0
+	for tick in range(ticks):
+		target.object.worldPosition[0] = math.cos(tick * DT * 0.5) * side * 0.6
+		target.object.worldPosition[1] = math.sin(tick * DT * 0.5) * side * 0.6
+
+		agents = manager.begin_update(DT)
+		start = time.perf_counter()
+		manager.update_decisions(agents)
+		decide += time.perf_counter() - start
+		manager.update_steering(agents, DT)
+		manager.apply_steering(DT)
+
+		history.append([agent.strategy.state for agent in agents])
+
+	manager.shutdown()
+	if workers:
+		manager.scheduler.evaluate.shutdown()
+	return history, decide * 1000 / ticks
+
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+	ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+	workers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+	with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+		json.dump(DEFINITION, f)
+
+	try:
+		local, local_time = run(f.name, count, ticks, 0)
+		parallel, parallel_time = run(f.name, count, ticks, workers)
+	finally:
+		os.remove(f.name)
+
+	transitions = sum(a != b for before, after in zip(local, local[1:]) for a, b in zip(before, after))
+	print("%d agents, %d ticks, %d transitions" % (count, ticks, transitions))
+	print("in-process: %.3f ms/tick deciding" % local_time)
+	print("%d workers:  %.3f ms/tick deciding" % (workers, parallel_time))
+
+	for tick, (a, b) in enumerate(zip(local, parallel)):
+		if a != b:
+			print("Mismatch at tick %d" % tick)
+			sys.exit(1)
+	print("Same transitions in both modes")
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,105 @@
+#!/usr/bin/python
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Simulates N headless agents for M ticks and reports how the AI scales
+
+Every agent chases a target circling the middle of the crowd using the
+state_test definition. Reported are ticks/second and the average time
+per tick spent in each Manager phase: begin (clocks, removal, spatial
+hash), decide, steer and apply.
+
+Usage: python benchmarks/scaling.py [--ticks M] [--batch] [N ...]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+from scripts.ai.agent_bge import AgentBGE
+from scripts.ai.headless import HeadlessObject
+from scripts.ai.manager import Manager
+
+
+DEFINITION = os.path.join(SRC, 'scripts', 'ai', 'definitions', 'state_test.json')
+DT = 1 / 60
+SPACING = 1.5
+
+
+def populate(manager, count):
+	target = AgentBGE(HeadlessObject(name="target"))
+
+	side = int(math.ceil(math.sqrt(count)))
+	offset = (side - 1) * SPACING / 2
+	for i in range(count):
+		position = (i % side * SPACING - offset, i // side * SPACING - offset, 0.0)
+		agent = AgentBGE(HeadlessObject(position, name="agent%d" % i))
+		agent.target = target
+		agent.load_definition(DEFINITION, manager.action_set)
+		manager.add(agent)
+
+	return target
+
+
+def run(count, ticks, batch):
+	manager = Manager(batch=batch)
+	target = populate(manager, count)
+
+	phases = [0.0, 0.0, 0.0, 0.0]
+	start = time.perf_counter()
+	for tick in range(ticks):
+		angle = tick * DT
+		radius = SPACING * 2
+		target.object.worldPosition[0] = math.cos(angle) * radius
+		target.object.worldPosition[1] = math.sin(angle) * radius
+
+		t0 = time.perf_counter()
+		agents = manager.begin_update(DT)
+		t1 = time.perf_counter()
+		manager.update_decisions(agents)
+		t2 = time.perf_counter()
+		manager.update_steering(agents, DT)
+		t3 = time.perf_counter()
+		manager.apply_steering(DT)
+		t4 = time.perf_counter()
+
+		phases[0] += t1 - t0
+		phases[1] += t2 - t1
+		phases[2] += t3 - t2
+		phases[3] += t4 - t3
+	elapsed = time.perf_counter() - start
+
+	return ticks / elapsed, [phase * 1000 / ticks for phase in phases]
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('agents', nargs='*', type=int, default=[10, 100, 1000, 10000])
+	parser.add_argument('--ticks', type=int, default=100)
+	parser.add_argument('--batch', action='store_true', help="steer with a SteeringBatch (needs NumPy)")
+	args = parser.parse_args()
+
+	print("%8s %10s %10s %10s %10s %10s" % ("agents", "ticks/s", "begin ms", "decide ms", "steer ms", "apply ms"))
+	for count in args.agents:
+		rate, phases = run(count, args.ticks, args.batch)
+		print("%8d %10.1f %10.3f %10.3f %10.3f %10.3f" % ((count, rate) + tuple(phases)))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,200 @@
+#!/usr/bin/python
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Compares ticks/second of the original and compiled state machines
+
+Both machines read the same blackboard, and the first read of a value each
+tick calls into Python to compute it. That read and the benchmark loop
+itself cost about as much as the compiled transitions, so the raw speedup
+understates the difference. The baseline machine only reads the value, the
+net speedup compares the time spent on top of it.
+
+Usage: python benchmarks/state_machine.py [ticks]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai.blackboard import Blackboard
+from scripts.ai.decision_strategies.conditions import get_condition
+from scripts.ai.decision_strategies.state_machine import StateMachine
+
+
+STATE_COUNT = 50
+
+
+class LegacyStateMachine:
+	"""The object based state machine used before tables were compiled"""
+
+	class State:
+		__slots__ = ["actions", "entry_actions", "exit_actions", "transitions"]
+
+		def __init__(self, actions, entry_actions, exit_actions, transitions):
+			self.actions = actions
+			self.entry_actions = entry_actions
+			self.exit_actions = exit_actions
+			self.transitions = transitions
+
+	class Transition:
+		__slots__ = ["condition", "state"]
+
+		def __init__(self, condition, state):
+			self.condition = condition
+			self.state = state
+
+	def __init__(self, agent):
+		self.states = {}
+		self.current_state = None
+		self.agent = agent
+
+	def load(self, data):
+		for state in data["states"]:
+			transitions = [self.Transition(get_condition(i[0]), i[1]) for i in state["transitions"]]
+			self.states[state["name"]] = self.State(state["actions"], state["entry_actions"],\
+				state["exit_actions"], transitions)
+
+			if not self.current_state:
+				self.current_state = self.states[state["name"]]
+
+		for state in self.states.values():
+			for transition in state.transitions:
+				transition.state = self.states[transition.state]
+
+	def __call__(self):
+		actions = []
+
+		for transition in self.current_state.transitions:
+			if transition.condition.test(self.agent):
+				target_state = transition.state
+
+				actions += self.current_state.exit_actions
+				actions += target_state.entry_actions
+
+				self.current_state = target_state
+
+				return actions
+		else:
+			return self.current_state.actions
+
+
+class BaselineMachine:
+	"""Reads the blackboard value the transitions test and never transitions"""
+
+	def __init__(self, agent):
+		self.agent = agent
+		self.actions = ("act", "seek")
+
+	def load(self, data):
+		pass
+
+	def __call__(self):
+		self.agent.blackboard["value"]
+		return self.actions
+
+
+class BenchAgent:
+	"""Stand-in agent with a value that sweeps through every transition range"""
+
+	def __init__(self):
+		self.value = 0
+		self.time = 0.0
+		self.state_entered = 0.0
+		self.condition_state = {}
+		self.blackboard = Blackboard(self, {})
+
+
+def make_definition(count=STATE_COUNT, churn=False):
+	"""Build a synthetic definition of count states with three transitions each
+
+	:param churn: If True the last transition always fires, so every tick transitions
+	"""
+	states = []
+	for i in range(count):
+		base = i * 10
+		advance = ["VALUE", "value", "-inf", "inf"] if churn else ["VALUE", "value", base + 5, base + 9]
+
+		states.append({
+			"name": "state%d" % i,
+			"entry_actions": ["enter%d" % i],
+			"actions": ["act%d" % i, "seek"],
+			"exit_actions": ["exit%d" % i],
+			"transitions": [
+				[["VALUE", "value", base + 1000, "inf"], "state%d" % ((i + 7) % count)],
+				[["VALUE", "value", "-inf", base - 1000], "state%d" % ((i + 3) % count)],
+				[advance, "state%d" % ((i + 1) % count)],
+			],
+		})
+
+	return {"states": states}
+
+
+def run(machine, agent, ticks, count=STATE_COUNT):
+	"""Tick a machine and return (ticks/second, number of transitions)"""
+	transitions = 0
+	last = None
+
+	start = time.perf_counter()
+	for tick in range(ticks):
+		agent.value = tick % (count * 10)
+		agent.blackboard.invalidate()
+		actions = machine()
+		if actions is not last and actions[0].startswith("exit"):
+			transitions += 1
+		last = actions
+	elapsed = time.perf_counter() - start
+
+	return ticks / elapsed, transitions
+
+
+def compare(data, ticks, repeat):
+	machines = (("baseline", BaselineMachine), ("legacy", LegacyStateMachine), ("compiled", StateMachine))
+
+	# Interleave the runs and keep the best of each to keep scheduler noise
+	# out of the comparison
+	results = {}
+	for i in range(repeat):
+		for name, cls in machines:
+			agent = BenchAgent()
+			machine = cls(agent)
+			machine.load(data)
+			result = run(machine, agent, ticks)
+			results[name] = max(results.get(name, result), result)
+
+	for name, cls in machines:
+		print("  %-10s %12.0f ticks/s  (%d transitions)" % (name, results[name][0], results[name][1]))
+
+	print("  speedup    %12.2fx" % (results["compiled"][0] / results["legacy"][0]))
+
+	baseline = 1 / results["baseline"][0]
+	print("  net        %12.2fx" % ((1 / results["legacy"][0] - baseline) /\
+		(1 / results["compiled"][0] - baseline)))
+
+
+def main():
+	ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+	repeat = 5
+
+	print("%d states, occasional transitions:" % STATE_COUNT)
+	compare(make_definition(), ticks, repeat)
+
+	print("%d states, a transition every tick:" % STATE_COUNT)
+	compare(make_definition(churn=True), ticks, repeat)
+
+
+if __name__ == '__main__':
+	main()
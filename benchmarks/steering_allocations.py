@@ -0,0 +1,262 @@
+#!/usr/bin/python
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Compares per-tick allocations of returned steering objects and the pooled SteeringOutput
+
+Each tick runs seek and separation for every agent, then integrates and
+applies the result, like the per-agent path of the Manager. Reported are the
+steering objects (vectors and outputs) created per tick, counted through a
+stand-in for mathutils.Vector, and the transient memory peak per tick
+measured with tracemalloc.
+
+Usage: python benchmarks/steering_allocations.py [agents] [ticks]
+"""
+
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai.actionsets import bge as actionset
+from scripts.ai.agent_bge import AgentBGE
+from scripts.ai.spatial import SpatialHash
+
+
+DT = 1 / 60
+
+
+class Vector(list):
+	"""Enough of mathutils.Vector for the legacy actions, counting every vector created"""
+
+	created = 0
+
+	def __init__(self, values=(0.0, 0.0, 0.0)):
+		list.__init__(self, values)
+		Vector.created += 1
+
+	@classmethod
+	def Fill(cls, size, value=0.0):
+		return cls([value] * size)
+
+	def __add__(self, other):
+		return Vector([a + b for a, b in zip(self, other)])
+
+	def __sub__(self, other):
+		return Vector([a - b for a, b in zip(self, other)])
+
+	def __mul__(self, scalar):
+		return Vector([a * scalar for a in self])
+
+	__rmul__ = __mul__
+
+	def __iadd__(self, other):
+		for i, value in enumerate(other):
+			self[i] += value
+		return self
+
+	def __imul__(self, scalar):
+		for i in range(len(self)):
+			self[i] *= scalar
+		return self
+
+	@property
+	def length_squared(self):
+		return sum(a * a for a in self)
+
+	def normalize(self):
+		length = math.sqrt(self.length_squared)
+		if length:
+			self *= 1 / length
+
+
+class _Steering:
+	def __init__(self):
+		Vector.created += 1
+		self.linear = Vector.Fill(3)
+		self.angular = 0
+
+
+def legacy_seek(agent):
+	output = _Steering()
+
+	if not agent.target:
+		return output
+
+	output.linear = agent.target.position - agent.position
+	output.linear.normalize()
+	output.linear *= agent.max_acceleration
+
+	return output
+
+
+def legacy_separation(agent):
+	output = _Steering()
+
+	position = agent.position
+	radius = agent.separation_radius
+	for other, distance in agent.manager.spatial.query_radius(position, radius, agent):
+		if distance == 0:
+			continue
+
+		away = position - other.position
+		away *= (radius - distance) / (radius * distance)
+		output.linear += away
+
+	if output.linear.length_squared > 0:
+		output.linear.normalize()
+		output.linear *= agent.max_acceleration
+
+	return output
+
+
+class GameObject:
+	"""Stands in for KX_GameObject"""
+
+	def __init__(self, position):
+		self.worldPosition = Vector(position)
+		self.invalid = False
+
+	def applyMovement(self, movement):
+		position = self.worldPosition
+		position[0] += movement[0]
+		position[1] += movement[1]
+		position[2] += movement[2]
+
+	def applyRotation(self, rotation):
+		pass
+
+
+class LegacyAgent(AgentBGE):
+	"""AgentBGE with the steering code used before outputs were pooled"""
+
+	def __init__(self, object=None):
+		AgentBGE.__init__(self, object)
+		self.velocity = Vector.Fill(3)
+
+	def update_steering(self, dt):
+		self.linear = [0, 0, 0]
+		self.angular = 0
+		lcount = 0
+		acount = 0
+
+		for action in self.actions:
+			output = action(self)
+			if output:
+				if output.linear:
+					self.linear[0] += output.linear[0]
+					self.linear[1] += output.linear[1]
+					self.linear[2] += output.linear[2]
+					lcount += 1
+				if output.angular:
+					self.angular += output.angular
+					acount += 1
+
+		if lcount > 1:
+			self.linear[0] /= lcount
+			self.linear[1] /= lcount
+			self.linear[2] /= lcount
+
+		if acount > 1:
+			self.angular /= acount
+
+	def apply_steering(self, dt):
+		self.linear = Vector(self.linear)
+
+		acceleration = self.linear * dt
+		friction = self.max_acceleration * dt / self.max_speed
+		self.velocity += acceleration - self.velocity * friction
+
+		if self.angular > self.turn_speed:
+			self.angular = self.turn_speed
+
+		self.object.applyMovement(self.velocity)
+		self.object.applyRotation((0, 0, self.angular))
+
+
+class Manager:
+	"""Just the neighbour queries of the real Manager"""
+
+	def __init__(self):
+		self.spatial = SpatialHash()
+
+
+def make_agents(cls, actions, count):
+	manager = Manager()
+	target = cls(GameObject((0.0, 0.0, 0.0)))
+
+	agents = []
+	side = int(math.ceil(math.sqrt(count)))
+	for i in range(count):
+		agent = cls(GameObject((i % side * 1.0 + 2, i // side * 1.0 + 2, 0.0)))
+		agent.manager = manager
+		agent.target = target
+		agent.actions = actions
+		agents.append(agent)
+
+	return manager, agents
+
+
+def tick(manager, agents):
+	manager.spatial.rebuild(agents)
+	for agent in agents:
+		agent.update_steering(DT)
+		agent.apply_steering(DT)
+
+
+def run(cls, actions, count, ticks):
+	manager, agents = make_agents(cls, actions, count)
+
+	# Warm up so caches and preallocated storage exist before measuring
+	for i in range(10):
+		tick(manager, agents)
+
+	created = Vector.created
+	start = time.perf_counter()
+	for i in range(ticks):
+		tick(manager, agents)
+	elapsed = time.perf_counter() - start
+	created = (Vector.created - created) / ticks
+
+	peak = 0
+	tracemalloc.start()
+	for i in range(min(ticks, 50)):
+		tracemalloc.reset_peak()
+		baseline = tracemalloc.get_traced_memory()[0]
+		tick(manager, agents)
+		peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+	tracemalloc.stop()
+
+	return created, peak, ticks / elapsed
+
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+	ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+	print("%d agents, seek and separation:" % count)
+	print("%-10s %18s %18s %12s" % ("", "objects/tick", "peak bytes/tick", "ticks/s"))
+
+	legacy = run(LegacyAgent, (legacy_seek, legacy_separation), count, ticks)
+	print("%-10s %18.1f %18d %12.1f" % ("returned", *legacy))
+
+	pooled = run(AgentBGE, (actionset.seek, actionset.separation), count, ticks)
+	print("%-10s %18.1f %18d %12.1f" % ("pooled", *pooled))
+
+
+if __name__ == '__main__':
+	main()
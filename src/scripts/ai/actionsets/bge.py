@@ -12,23 +12,162 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
-import mathutils as _math
+import math as _math
 
+from ..batch import numpy as _numpy
 
-class _Steering:
-	def __init__(self):
-		self.linear = _math.Vector.Fill(3)
-		self.angular = 0
 
+# Actions write their request into agent.steering instead of returning a new
+# object, and do their vector math per component, so steering an agent does
+# not allocate in the common case.
 
-def seek(agent):
-	output = _Steering()
 
+_DEFAULT_BLEND = (1.0, 0)
+
+
+def _blend(agent, name):
+	return agent.steering_blend.get(name, _DEFAULT_BLEND)
+
+
+def _accelerate(agent, name, x, y, z):
+	# Add (x, y, z) scaled to the agent's max acceleration
+	length = _math.sqrt(x * x + y * y + z * z)
+	if length == 0:
+		return
+
+	scale = agent.max_acceleration / length
+	weight, priority = _blend(agent, name)
+	agent.steering.add_linear(x * scale, y * scale, z * scale, weight, priority)
+
+
+def seek(agent, _name="seek"):
 	if not agent.target:
-		return output
+		return
+
+	position = agent.position
+	target = agent.target.position
+	_accelerate(agent, _name, target[0] - position[0], target[1] - position[1], target[2] - position[2])
+
+
+def follow_flow(agent):
+	if not agent.target or not agent.manager:
+		return
+
+	field = agent.manager.flow_field(agent.target)
+	direction = field.sample(agent.position) if field else None
+
+	# Go straight for the target once in its cell or without a usable field
+	if direction is None:
+		return seek(agent, "follow_flow")
+
+	_accelerate(agent, "follow_flow", direction[0], direction[1], 0.0)
+
+
+def follow_path(agent):
+	if not agent.target or not agent.manager or not agent.manager.paths:
+		return seek(agent, "follow_path")
+
+	paths = agent.manager.paths
+	grid = paths.grid
+
+	request = agent.path_request
+	if request is None or request.goal != grid.cell(agent.target.position):
+		request = agent.path_request = paths.request(agent.position, agent.target.position)
+		agent.path_index = 0
+
+	# Head straight for the target while the search is running, when there
+	# is no path or once the last waypoint is reached
+	if not request.done or not request.path:
+		return seek(agent, "follow_path")
+
+	path = request.path
+	position = agent.position
+	while agent.path_index < len(path):
+		x, y = grid.center(path[agent.path_index])
+		if (x - position[0]) ** 2 + (y - position[1]) ** 2 > (grid.cell_size * 0.5) ** 2:
+			break
+		agent.path_index += 1
+	else:
+		return seek(agent, "follow_path")
+
+	_accelerate(agent, "follow_path", x - position[0], y - position[1], 0.0)
+
+
+def _neighbours(agent, radius):
+	if not agent.manager:
+		return ()
+
+	return agent.manager.spatial.query_radius(agent.position, radius, agent)
+
+
+def separation(agent):
+	position = agent.position
+	radius = agent.separation_radius
+
+	x = y = z = 0.0
+	for other, distance in _neighbours(agent, radius):
+		if distance == 0:
+			continue
+
+		# Push away harder the closer the neighbour is
+		scale = (radius - distance) / (radius * distance)
+		other = other.position
+		x += (position[0] - other[0]) * scale
+		y += (position[1] - other[1]) * scale
+		z += (position[2] - other[2]) * scale
+
+	_accelerate(agent, "separation", x, y, z)
+
+
+def cohesion(agent):
+	neighbours = _neighbours(agent, agent.neighbour_radius)
+	if not neighbours:
+		return
+
+	x = y = z = 0.0
+	for other, distance in neighbours:
+		other = other.position
+		x += other[0]
+		y += other[1]
+		z += other[2]
+
+	count = len(neighbours)
+	position = agent.position
+	_accelerate(agent, "cohesion", x / count - position[0], y / count - position[1], z / count - position[2])
+
+
+def alignment(agent):
+	x = y = z = 0.0
+	count = 0
+	for other, distance in _neighbours(agent, agent.neighbour_radius):
+		velocity = getattr(other, "velocity", None)
+		if velocity is None:
+			continue
+
+		x += velocity[0]
+		y += velocity[1]
+		z += velocity[2]
+		count += 1
+
+	if not count:
+		return
+
+	velocity = agent.velocity
+	_accelerate(agent, "alignment", x / count - velocity[0], y / count - velocity[1], z / count - velocity[2])
+
+
+def _seek_batch(batch, indices):
+	indices = indices[batch.has_target[indices]]
+	direction = batch.target[indices] - batch.position[indices]
+
+	length = _numpy.sqrt((direction * direction).sum(axis=1))
+	moving = length > 0
+	indices = indices[moving]
+	direction = direction[moving]
 
-	output.linear = agent.target.position - agent.position
-	output.linear.normalize()
-	output.linear *= agent.max_acceleration
+	direction *= (batch.max_acceleration[indices] / length[moving])[:, None]
+	# Indices repeat when seek is listed more than once
+	_numpy.add.at(batch.linear, indices, direction)
+	_numpy.add.at(batch.lweight, indices, 1)
 
-	return output
\ No newline at end of file
+seek.batch = _seek_batch
@@ -12,15 +12,22 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
-import os
 import json
 
 
+from .blackboard import Blackboard
+from .steering import SteeringOutput
+from .definition_cache import cache as definition_cache
 from .decision_strategies.state_machine import StateMachine
+from .decision_strategies.behavior_tree import BehaviorTree
+from .decision_strategies.utility import Utility
+from .batch import numpy
 
 
 STRATEGIES = {
-	"STATE_MACHINE" : StateMachine
+	"STATE_MACHINE" : StateMachine,
+	"BEHAVIOR_TREE" : BehaviorTree,
+	"UTILITY" : Utility,
 	}
 
 
@@ -28,15 +35,48 @@ STRATEGIES_INV = {v : k for k, v in STRATEGIES.items()}
 
 
 class Agent:
+	#: True if the agent can be steered by a :class:`.SteeringBatch`
+	BATCH_STEERING = False
+
+	#: Mapping of blackboard value names to functions computing them from the agent
+	SENSORS = {
+		"state_time" : lambda agent: agent.time - agent.state_entered,
+		}
+
+	#: The world position of the agent, None if it has no position
+	position = None
+
 	def __init__(self, object=None, definition=None):
 		self.object = object
 		self.target = None
 
-		self.linear = [0, 0, 0]
-		self.angular = 0
+		#: The :class:`.Manager` updating this agent
+		self.manager = None
+		#: The handle :meth:`.Manager.add` returned for this agent, None while unmanaged
+		self.handle = None
+
+		self.blackboard = Blackboard(self, self.SENSORS)
+
+		# Simulated time, and the time the current decision state was entered
+		self.time = 0.0
+		self.state_entered = 0.0
+
+		# Per-agent memory of stateful conditions, by condition key. Cleared
+		# with every new template, so reloads don't leave old entries behind
+		self.condition_state = {}
+
+		#: Accumulator the steering actions write into, reused every tick
+		self.steering = SteeringOutput()
 
-		self.actions = []
+		#: Mapping of action names to the (weight, priority) of their steering
+		self.steering_blend = {}
 
+		self.linear = self.steering.linear
+		self.angular = 0.0
+
+		self.actions = ()
+
+		self._action_table = None
 
 		self._decstrat = None
 		self.decision_strategy = "STATE_MACHINE"
@@ -48,6 +88,16 @@ class Agent:
 	def decision_strategy(self):
 		return STRATEGIES_INV[type(self._decstrat)]
 
+	@property
+	def strategy(self):
+		"""The decision strategy instance (e.g. a :class:`.StateMachine`)"""
+		return self._decstrat
+
+	@property
+	def action_table(self):
+		"""The action table the strategy was last bound to, or None"""
+		return self._action_table
+
 	@decision_strategy.setter
 	def decision_strategy(self, value):
 		if value not in STRATEGIES:
@@ -55,53 +105,87 @@ class Agent:
 				"Valid strategies are: %s" % str(STRATEGIES.keys()))
 
 		self._decstrat = STRATEGIES[value](self)
+		self._action_table = None
+
+	def load_definition(self, data, action_table=None):
+		"""
+		If the definition has a "strategy" entry, the agent switches to that
+		decision strategy first.
 
-	def load_definition(self, data):
+		:param data: The path to a definition file or a JSON string
+		:param action_table: If given, resolve and validate the definition's actions now
+		"""
 		if not self._decstrat:
 			raise AttributeError("Agent has no decision strategy set")
 
-		if os.access(data, os.F_OK):
-			with open(data, 'r') as f:
-					data = json.load(f)
+		definition = definition_cache.load(data)
+		from_file = definition is not None
+		if not from_file:
+			definition = json.loads(data)
+
+		strategy = definition.get("strategy")
+		if strategy and strategy != self.decision_strategy:
+			self.decision_strategy = strategy
+
+		if from_file:
+			template = definition_cache.get(data, type(self._decstrat))
 		else:
-			data = json.loads(data)
+			template = self._decstrat.compile(definition)
+
+		self._decstrat.set_template(template)
+		self.condition_state.clear()
+
+		self._action_table = None
+		if action_table is not None:
+			self.bind_actions(action_table)
+
+	def swap_template(self, template):
+		"""Replace the decision strategy's template with a new version of it, e.g. after a reload
+
+		The strategy keeps its current state if the new template has a state
+		of the same name.
+
+		:raises ValueError: If the new template uses an action missing from the bound action table
+		"""
+		# Check the actions before changing anything
+		if self._action_table is not None:
+			template.bind(self._action_table)
 
-		self._decstrat.load(data)
+		self._decstrat.swap_template(template)
+
+		# Conditions of the new template keep their memory under new keys
+		self.condition_state.clear()
+
+		if self._action_table is not None:
+			self._decstrat.bind(self._action_table)
+
+	def bind_actions(self, action_table):
+		"""Resolve the action names used by the decision strategy to callables
+
+		:raises ValueError: If an action is missing from action_table
+		"""
+		self._decstrat.bind(action_table)
+		self._action_table = action_table
 
 	def update_actions(self, action_table):
-		actions = []
-		if self._decstrat:
-			actions = self._decstrat()
+		if self._action_table is not action_table:
+			self.bind_actions(action_table)
 
-		self.actions = []
-		for action in actions:
-			self.actions.append(action_table[action])
+		self.actions = self._decstrat()
 
 	def update_steering(self, dt):
-		self.linear = [0, 0, 0]
-		self.angular = 0
-		lcount = 0
-		acount = 0
+		steering = self.steering
+		steering.reset()
 
 		for action in self.actions:
+			# Actions add to self.steering, older ones return their output
 			output = action(self)
 			if output:
-				if output.linear:
-					self.linear[0] += output.linear[0]
-					self.linear[1] += output.linear[1]
-					self.linear[2] += output.linear[2]
-					lcount += 1
-				if output.angular:
-					self.angular += output.angular
-					acount += 1
-
-		if lcount > 1:
-			self.linear[0] /= lcount
-			self.linear[1] /= lcount
-			self.linear[2] /= lcount
-
-		if acount > 1:
-			self.angular /= acount
+				steering.add_output(output)
+
+		steering.resolve()
+		self.linear = steering.linear
+		self.angular = steering.angular
 
 	def apply_steering(self, dt):
 		pass
@@ -109,3 +193,27 @@ class Agent:
 	@property
 	def valid(self):
 		return True
+
+
+def update_actions(agents, action_table):
+	"""Update the actions of many agents at once
+
+	Agents whose decision strategy has an ``evaluate_batch`` method are grouped
+	by template and evaluated together (this needs NumPy), the others are
+	updated one by one.
+	"""
+	groups = {}
+	for agent in agents:
+		strategy = agent.strategy
+		if numpy is None or not hasattr(strategy, "evaluate_batch"):
+			agent.update_actions(action_table)
+			continue
+
+		if agent.action_table is not action_table:
+			agent.bind_actions(action_table)
+		groups.setdefault(strategy.template, []).append(agent)
+
+	for group in groups.values():
+		strategies = [i.strategy for i in group]
+		for agent, actions in zip(group, type(strategies[0]).evaluate_batch(strategies)):
+			agent.actions = actions
\ No newline at end of file
@@ -12,10 +12,49 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
-import mathutils
+import math
 
 
 from .agent import Agent
+from .perception import PerceptionState
+
+
+def _target_range(agent):
+	if not agent.target:
+		return float("inf")
+
+	position = agent.position
+	target = agent.target.position
+	return math.sqrt((target[0] - position[0]) ** 2 + (target[1] - position[1]) ** 2 + (target[2] - position[2]) ** 2)
+
+
+def _bearing(agent, orientation):
+	if not agent.target:
+		return 0.0
+
+	position = agent.position
+	target = agent.target.position
+
+	# Heading of the target, measured from +Y like the orientation
+	heading = math.atan2(position[0] - target[0], target[1] - position[1])
+	bearing = heading - orientation
+
+	return (bearing + math.pi) % (2 * math.pi) - math.pi
+
+
+def _target_bearing(agent):
+	return _bearing(agent, agent.blackboard["orientation"])
+
+
+def _orientation(agent):
+	# Z rotation of the XYZ euler, without building the euler
+	matrix = agent.object.worldOrientation
+	return math.atan2(matrix[1][0], matrix[0][0])
+
+
+def _speed(agent):
+	velocity = agent.velocity
+	return math.sqrt(velocity[0] ** 2 + velocity[1] ** 2 + velocity[2] ** 2)
 
 
 class AgentBGE(Agent):
@@ -23,18 +62,57 @@ class AgentBGE(Agent):
 	A prebuilt Agent class for use with the Blender Game Engine.
 	The forward vector is assumed to be +Y
 	'''
+
+	BATCH_STEERING = True
+
+	SENSORS = dict(Agent.SENSORS, **{
+		"target_range" : _target_range,
+		"target_bearing" : _target_bearing,
+		"orientation" : _orientation,
+		"speed" : _speed,
+		"can_see_target" : lambda agent: agent.perception.can_see,
+		"can_hear_target" : lambda agent: agent.perception.can_hear,
+		"target_perceived" : lambda agent: agent.perception.can_see or agent.perception.can_hear,
+		"time_since_seen" : lambda agent: agent.time - agent.perception.last_seen,
+		})
+
 	def __init__(self, object=None):
 		Agent.__init__(self, object)
 
 		self.max_acceleration = 0.5
 		self.max_speed = 0.1
 		self.turn_speed = 0.1
-		
-		self.velocity = mathutils.Vector.Fill(3)
-		
+
+		# Neighbourhood sizes used by the flocking actions
+		self.neighbour_radius = 4.0
+		self.separation_radius = 1.5
+
+		# Senses used by the manager's Perception
+		self.sight_range = 15.0
+		self.sight_angle = math.radians(60)
+		self.hearing_radius = 4.0
+		self.perception = PerceptionState()
+
+		# The current PathRequest of follow_path and the waypoint being followed
+		self.path_request = None
+		self.path_index = 0
+
+		self.velocity = [0.0, 0.0, 0.0]
+
+		# Reused by apply_steering
+		self._rotation = [0.0, 0.0, 0.0]
+
+	# The properties compute their value every time, agents that aren't
+	# updated by a Manager never have their blackboard invalidated. Use
+	# the blackboard for the memoized values.
+
 	@property
 	def target_range(self):
-		return (self.target.position - self.position).length
+		return _target_range(self)
+
+	@property
+	def target_bearing(self):
+		return _bearing(self, _orientation(self))
 
 	@property
 	def position(self):
@@ -42,21 +120,24 @@ class AgentBGE(Agent):
 
 	@property
 	def orientation(self):
-		return self.object.worldOrientation.to_euler('XYZ')[2]
+		return _orientation(self)
 
 	@property
 	def valid(self):
 		return not self.object.invalid
 
 	def apply_steering(self, dt):
-		self.linear = mathutils.Vector(self.linear)
-
-		acceleration = self.linear * dt
+		linear = self.linear
+		velocity = self.velocity
 		friction = self.max_acceleration * dt / self.max_speed
-		self.velocity += acceleration - friction*self.velocity
+
+		velocity[0] += linear[0] * dt - friction * velocity[0]
+		velocity[1] += linear[1] * dt - friction * velocity[1]
+		velocity[2] += linear[2] * dt - friction * velocity[2]
 
 		if self.angular > self.turn_speed:
 			self.angular = self.turn_speed
+		self._rotation[2] = self.angular
 
-		self.object.applyMovement(self.velocity)
-		self.object.applyRotation((0, 0, self.angular))
\ No newline at end of file
+		self.object.applyMovement(velocity)
+		self.object.applyRotation(self._rotation)
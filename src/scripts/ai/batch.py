@@ -0,0 +1,223 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+try:
+	import numpy
+except ImportError:
+	# NumPy is not shipped with every blenderplayer build, so batch steering
+	# is optional and the Manager falls back to per-agent steering without it.
+	numpy = None
+
+
+class SteeringBatch:
+	'''
+	Structure-of-arrays storage used by the :class:`.Manager` to run steering
+	for many agents in one vectorized pass.
+
+	Every agent keeps its row across ticks. Positions and steering limits are
+	read from the agents every tick, velocities only when a row gets a new
+	agent (they are written back in place by :meth:`scatter`). The grouping
+	of rows by kernel is only rebuilt when an agent's actions change; call
+	:meth:`refresh` after changing an agent's ``steering_blend``.
+
+	Actions can provide a vectorized kernel by setting a ``batch`` attribute to
+	a function taking ``(batch, indices)`` that accumulates weighted requests
+	into :attr:`linear`/:attr:`angular` and the matching weights (with
+	``numpy.add.at``, indices repeat when an action is listed twice). Agents
+	using an action without a kernel, or with a custom ``steering_blend``, are
+	steered through their :class:`.SteeringOutput` instead and the resolved
+	result is copied in, so results match :meth:`.Agent.update_steering`.
+
+	Like :meth:`.AgentBGE.apply_steering`, :meth:`scatter` leaves the resolved
+	outputs in ``agent.linear``/``agent.angular`` and the new velocity in
+	``agent.velocity``.
+	'''
+
+	def __init__(self, capacity=64):
+		"""
+		:param capacity: The number of rows to allocate up front
+		"""
+		if numpy is None:
+			raise ImportError("SteeringBatch requires NumPy")
+
+		self.size = 0
+
+		# The agent of every row, and the actions and targets the kernel
+		# grouping and target rows were built from
+		self._agents = []
+		self._actions = []
+		self._targets = []
+		self._unique_targets = []
+
+		# kernel -> row indices, rows steered through their SteeringOutput
+		self._kernels = ()
+		self._single = ()
+
+		self._allocate(capacity)
+
+	def _allocate(self, capacity):
+		old = getattr(self, "capacity", 0)
+		self.capacity = capacity
+
+		def grow(name, shape, fill=0.0, dtype=float):
+			array = numpy.full(shape, fill, dtype=dtype)
+			if old:
+				array[:old] = getattr(self, name)
+			setattr(self, name, array)
+
+		grow("position", (capacity, 3))
+		grow("target", (capacity, 3))
+		grow("target_index", capacity, -1, numpy.intp)
+		grow("has_target", capacity, False, bool)
+		grow("velocity", (capacity, 3))
+
+		grow("linear", (capacity, 3))
+		grow("angular", capacity)
+		grow("lweight", capacity)
+		grow("aweight", capacity)
+
+		# max_acceleration, max_speed and turn_speed, filled from one list a tick
+		grow("limits", (capacity, 3), 1.0)
+		self.max_acceleration = self.limits[:, 0]
+		self.max_speed = self.limits[:, 1]
+		self.turn_speed = self.limits[:, 2]
+
+	def refresh(self):
+		'''Reload every row on the next tick'''
+		self._agents = []
+		self._actions = []
+
+	def gather(self, agents):
+		'''Bring the rows up to date with the agents, only touching what changed'''
+		count = len(agents)
+		if count > self.capacity:
+			self._allocate(max(count, self.capacity * 2))
+		self.size = count
+
+		# Identity comparison in C, rows only move when agents are added or removed
+		old = self._agents
+		if agents != old:
+			for row, agent in enumerate(agents):
+				if row >= len(old) or old[row] is not agent:
+					self.velocity[row] = agent.velocity
+			self._agents = list(agents)
+			self._actions = []
+			self._targets = []
+
+		if count:
+			self.position[:count] = [agent.position for agent in agents]
+			self.limits[:count] = [(agent.max_acceleration, agent.max_speed, agent.turn_speed) for agent in agents]
+
+		targets = [agent.target for agent in agents]
+		if targets != self._targets:
+			self._targets = targets
+			unique = {}
+			for row, target in enumerate(targets):
+				self.target_index[row] = unique.setdefault(target, len(unique)) if target else -1
+			self._unique_targets = list(unique)
+			self.has_target[:count] = self.target_index[:count] >= 0
+
+		if self._unique_targets:
+			positions = numpy.array([target.position for target in self._unique_targets], dtype=float)
+			index = self.target_index[:count]
+			self.target[:count][self.has_target[:count]] = positions[index[index >= 0]]
+
+		self.linear[:count] = 0
+		self.angular[:count] = 0
+		self.lweight[:count] = 0
+		self.aweight[:count] = 0
+
+	def _group(self, agents, actions):
+		kernels = {}
+		single = []
+		for row, agent in enumerate(agents):
+			if agent.steering_blend or not all(hasattr(action, "batch") for action in actions[row]):
+				single.append(row)
+				continue
+
+			for action in actions[row]:
+				kernels.setdefault(action.batch, []).append(row)
+
+		self._actions = actions
+		self._kernels = [(kernel, numpy.array(rows, dtype=numpy.intp)) for kernel, rows in kernels.items()]
+		self._single = single
+
+	def steer(self, agents):
+		'''Run the current actions of every agent, grouping vectorized kernels'''
+		actions = [agent.actions for agent in agents]
+		if actions != self._actions:
+			self._group(agents, actions)
+
+		for row in self._single:
+			agent = agents[row]
+			agent.update_steering(0)
+			self.linear[row] = agent.linear
+			self.angular[row] = agent.angular
+
+		for kernel, rows in self._kernels:
+			kernel(self, rows)
+
+	def integrate(self, dt):
+		'''Average the accumulated outputs and integrate the velocities'''
+		n = self.size
+
+		lweight = self.lweight[:n]
+		aweight = self.aweight[:n]
+		linear = self.linear[:n]
+		angular = self.angular[:n]
+
+		linear /= numpy.where(lweight > 0, lweight, 1)[:, None]
+		angular /= numpy.where(aweight > 0, aweight, 1)
+
+		friction = self.max_acceleration[:n] * dt / self.max_speed[:n]
+		velocity = self.velocity[:n]
+		velocity += linear * dt - friction[:, None] * velocity
+
+		numpy.minimum(angular, self.turn_speed[:n], out=angular)
+
+	def scatter(self, agents):
+		'''Write the outputs and velocities back to the agents and move their game objects'''
+		# Flat lists of floats, building a list per row would keep the
+		# garbage collector busy
+		velocities = self.velocity[:self.size].ravel().tolist()
+		linears = self.linear[:self.size].ravel().tolist()
+		angulars = self.angular[:self.size].tolist()
+
+		rotation = [0.0, 0.0, 0.0]
+		index = 0
+		for agent, angular in zip(agents, angulars):
+			velocity = agent.velocity
+			velocity[0] = velocities[index]
+			velocity[1] = velocities[index + 1]
+			velocity[2] = velocities[index + 2]
+
+			linear = agent.linear
+			linear[0] = linears[index]
+			linear[1] = linears[index + 1]
+			linear[2] = linears[index + 2]
+			agent.angular = angular
+			index += 3
+
+			obj = agent.object
+			obj.applyMovement(velocity)
+			if angular:
+				rotation[2] = angular
+				obj.applyRotation(rotation)
+
+	def run(self, agents, dt):
+		'''Steer, integrate and apply all agents in one pass'''
+		self.gather(agents)
+		self.steer(agents)
+		self.integrate(dt)
+		self.scatter(agents)
@@ -0,0 +1,44 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+class Blackboard(dict):
+	'''
+	Memoized sensor values for an :class:`.Agent`.
+
+	Values are computed on first access, either by the agent's sensor of the
+	same name (see :attr:`.Agent.SENSORS`) or by reading the agent attribute,
+	and are reused until :meth:`invalidate` is called. The :class:`.Manager`
+	invalidates every agent's blackboard once per update, so a value that is
+	used by several conditions and actions in a tick is only computed once.
+
+	The blackboard is a dict of the values computed so far, so reading a
+	value that is already known doesn't run any Python code.
+	'''
+	__slots__ = ["agent", "sensors"]
+
+	def __init__(self, agent, sensors):
+		dict.__init__(self)
+		self.agent = agent
+		self.sensors = sensors
+
+	def __missing__(self, name):
+		sensor = self.sensors.get(name)
+		value = sensor(self.agent) if sensor else getattr(self.agent, name)
+
+		self[name] = value
+		return value
+
+	def invalidate(self):
+		'''Forget all values computed since the last invalidation'''
+		self.clear()
@@ -0,0 +1,437 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Behavior trees are described in definitions by a root node::
+
+	{
+		"strategy" : "BEHAVIOR_TREE",
+		"root" : {"type" : "SELECTOR", "children" : [
+			{"type" : "SEQUENCE", "children" : [
+				{"type" : "CONDITION", "condition" : ["VALUE", "target_range", "-inf", 3]},
+				{"type" : "ACTION", "actions" : ["seek"], "until" : ["VALUE", "target_range", "-inf", 1]}
+			]},
+			{"type" : "ACTION", "actions" : [], "duration" : 2}
+		]}
+	}
+
+ACTION nodes stay RUNNING, and their actions are run by the agent, until their
+``until`` condition is true or ``duration`` seconds have passed (forever if
+neither is given). A running node is resumed directly on the next tick and
+only the ancestors of a node that finishes are revisited, so a tick does not
+re-evaluate the tree from the root.
+"""
+
+import abc
+
+from .conditions import compile_condition
+
+
+SUCCESS = 0
+FAILURE = 1
+RUNNING = 2
+
+
+class Node(abc.ABC):
+	__slots__ = ["id", "name", "parent", "index", "ancestors"]
+
+	def __init__(self, data):
+		self.id = None
+		self.name = data.get("name", data["type"].lower())
+		self.parent = None
+		self.index = 0
+		self.ancestors = frozenset()
+
+	@property
+	def children(self):
+		return ()
+
+	@abc.abstractmethod
+	def start(self, cursor):
+		'''Run the node from the beginning, return its status'''
+
+	def resume(self, cursor):
+		'''Continue a node that registered itself in cursor.running, return its status
+
+		The node is taken out of cursor.running first, nodes that are still
+		running must register again. By default the node starts over.
+		'''
+		return self.start(cursor)
+
+	def child_finished(self, cursor, child, status):
+		'''Continue after a running child finished with status
+
+		By default the node finishes with the status of its child.
+		'''
+		return status
+
+
+class Composite(Node):
+	__slots__ = ["_children"]
+
+	def __init__(self, data):
+		super().__init__(data)
+		self._children = tuple(_build_node(i) for i in data["children"])
+
+	@property
+	def children(self):
+		return self._children
+
+
+class Sequence(Composite):
+	'''Runs children in order until one fails'''
+	__slots__ = []
+
+	def _run_from(self, cursor, i):
+		children = self._children
+		while i < len(children):
+			status = children[i].start(cursor)
+			if status != SUCCESS:
+				return status
+			i += 1
+		return SUCCESS
+
+	def start(self, cursor):
+		return self._run_from(cursor, 0)
+
+	def child_finished(self, cursor, child, status):
+		if status != SUCCESS:
+			return status
+		return self._run_from(cursor, child.index + 1)
+
+
+class Selector(Composite):
+	'''Runs children in order until one succeeds'''
+	__slots__ = []
+
+	def _run_from(self, cursor, i):
+		children = self._children
+		while i < len(children):
+			status = children[i].start(cursor)
+			if status != FAILURE:
+				return status
+			i += 1
+		return FAILURE
+
+	def start(self, cursor):
+		return self._run_from(cursor, 0)
+
+	def child_finished(self, cursor, child, status):
+		if status != FAILURE:
+			return status
+		return self._run_from(cursor, child.index + 1)
+
+
+class Parallel(Composite):
+	'''Runs all children at once, succeeds once "success" of them have succeeded'''
+	__slots__ = ["success"]
+
+	def __init__(self, data):
+		super().__init__(data)
+		self.success = data.get("success", len(self._children))
+
+	def _decide(self, cursor, counts):
+		if counts[SUCCESS] >= self.success:
+			status = SUCCESS
+		elif counts[FAILURE] > len(self._children) - self.success:
+			status = FAILURE
+		else:
+			return RUNNING
+
+		cursor.cancel(self)
+		return status
+
+	def start(self, cursor):
+		counts = [0, 0, 0]
+		for child in self._children:
+			counts[child.start(cursor)] += 1
+
+		cursor.memory[self.id] = counts
+		return self._decide(cursor, counts)
+
+	def child_finished(self, cursor, child, status):
+		counts = cursor.memory[self.id]
+		counts[status] += 1
+		return self._decide(cursor, counts)
+
+
+class Decorator(Node):
+	__slots__ = ["child"]
+
+	def __init__(self, data):
+		super().__init__(data)
+		self.child = _build_node(data["child"])
+
+	@property
+	def children(self):
+		return (self.child,)
+
+	def start(self, cursor):
+		status = self.child.start(cursor)
+		return status if status == RUNNING else self.child_finished(cursor, self.child, status)
+
+
+class Inverter(Decorator):
+	'''Swaps the success and failure of its child'''
+	__slots__ = []
+
+	def child_finished(self, cursor, child, status):
+		return FAILURE if status == SUCCESS else SUCCESS
+
+
+class Succeeder(Decorator):
+	'''Succeeds whatever its child does'''
+	__slots__ = []
+
+	def child_finished(self, cursor, child, status):
+		return SUCCESS
+
+
+class Repeat(Decorator):
+	'''Runs its child "count" times (forever if 0) or until it fails'''
+	__slots__ = ["count"]
+
+	def __init__(self, data):
+		super().__init__(data)
+		self.count = data.get("count", 0)
+
+	def start(self, cursor):
+		cursor.memory[self.id] = 0
+		return self.resume(cursor)
+
+	def _count(self, cursor, status):
+		# Count a finished repetition, RUNNING means another one is due
+		if status == FAILURE:
+			return FAILURE
+
+		done = cursor.memory[self.id] + 1
+		cursor.memory[self.id] = done
+		if self.count and done >= self.count:
+			return SUCCESS
+		return RUNNING
+
+	def resume(self, cursor):
+		status = self.child.start(cursor)
+		if status == RUNNING:
+			return RUNNING
+
+		status = self._count(cursor, status)
+		if status == RUNNING:
+			# The child finished without running, start the next repetition
+			# on the next tick instead of looping forever within this one
+			cursor.running.append(self)
+		return status
+
+	def child_finished(self, cursor, child, status):
+		status = self._count(cursor, status)
+		if status != RUNNING:
+			return status
+
+		# Restart the child right away, so its actions run on this tick
+		return self.resume(cursor)
+
+
+class Condition(Node):
+	'''Succeeds if its condition is true'''
+	__slots__ = ["condition"]
+
+	def __init__(self, data):
+		super().__init__(data)
+		self.condition = compile_condition(data["condition"])
+
+	def start(self, cursor):
+		return SUCCESS if self.condition(cursor.agent) else FAILURE
+
+
+class Action(Node):
+	'''Runs actions until a condition is true or a duration has passed'''
+	__slots__ = ["actions", "until", "duration"]
+
+	def __init__(self, data):
+		super().__init__(data)
+		self.actions = tuple(data.get("actions", ()))
+		self.until = compile_condition(data["until"]) if "until" in data else None
+		self.duration = data.get("duration")
+
+	def start(self, cursor):
+		agent = cursor.agent
+		agent.state_entered = cursor.memory[self.id] = agent.time
+		cursor.running.append(self)
+		return RUNNING
+
+	def resume(self, cursor):
+		agent = cursor.agent
+		if self.until and self.until(agent):
+			return SUCCESS
+		if self.duration is not None and agent.time - cursor.memory[self.id] >= self.duration:
+			return SUCCESS
+
+		cursor.running.append(self)
+		return RUNNING
+
+
+NODE_MAP = {
+	"SEQUENCE" : Sequence,
+	"SELECTOR" : Selector,
+	"PARALLEL" : Parallel,
+	"INVERTER" : Inverter,
+	"SUCCEEDER" : Succeeder,
+	"REPEAT" : Repeat,
+	"CONDITION" : Condition,
+	"ACTION" : Action,
+	}
+
+
+def _build_node(data):
+	if data["type"] not in NODE_MAP:
+		raise ValueError(data["type"], "is not a valid behavior tree node.", \
+			"Valid nodes are: %s" % str(NODE_MAP.keys()))
+
+	return NODE_MAP[data["type"]](data)
+
+
+class BehaviorTreeTemplate:
+	"""The nodes of a behavior tree definition, shared between agents"""
+	__slots__ = ["root", "nodes", "_bindings", "__weakref__"]
+
+	def __init__(self, root):
+		self.root = root
+		self.nodes = []
+
+		# Number the nodes and link them to their parents
+		stack = [(root, None, 0)]
+		while stack:
+			node, parent, index = stack.pop()
+			node.id = len(self.nodes)
+			node.parent = parent
+			node.index = index
+			if parent:
+				node.ancestors = parent.ancestors | {parent.id}
+			self.nodes.append(node)
+
+			for i, child in reversed(list(enumerate(node.children))):
+				stack.append((child, node, i))
+
+		self.nodes = tuple(self.nodes)
+		self._bindings = {}
+
+	def bind(self, action_table):
+		"""Resolve the action names of ACTION nodes to callables
+
+		:param action_table: A mapping of action names to callables
+		:rtype: A tuple of action tuples, by node id
+		:raises ValueError: If the definition uses an action missing from action_table
+		"""
+		binding = self._bindings.get(id(action_table))
+		if binding and binding[0] is action_table:
+			return binding[1]
+
+		bound = []
+		for node in self.nodes:
+			names = getattr(node, "actions", ())
+			try:
+				bound.append(tuple(action_table[name] for name in names))
+			except KeyError as e:
+				raise ValueError("Unknown action %s, valid actions are: %s" %\
+					(e, str(sorted(action_table.keys()))))
+
+		bound = tuple(bound)
+		self._bindings[id(action_table)] = (action_table, bound)
+		return bound
+
+
+class BehaviorTree:
+	def __init__(self, agent):
+		self.template = None
+		self.agent = agent
+
+		#: Nodes to resume on the next tick
+		self.running = []
+		#: Per node working data (child counts, start times...), by node id
+		self.memory = {}
+
+		self._actions = ()
+		self._combined = {}
+
+	@property
+	def current_state(self):
+		"""The name of the first running node"""
+		return self.running[0].name if self.running else None
+
+	@staticmethod
+	def compile(data):
+		return BehaviorTreeTemplate(_build_node(data["root"]))
+
+	def set_template(self, template):
+		self.template = template
+		self.running = []
+		self.memory = {}
+		self.agent.state_entered = self.agent.time
+		self._actions = tuple(getattr(i, "actions", ()) for i in template.nodes)
+		self._combined = {}
+
+	def swap_template(self, template):
+		"""Switch to a new version of the template
+
+		Running nodes can't be matched up with a changed tree, so the tree
+		starts again from the root.
+		"""
+		self.set_template(template)
+
+	def bind(self, action_table):
+		self._actions = self.template.bind(action_table)
+		self._combined = {}
+
+	def load(self, data):
+		self.set_template(self.compile(data))
+
+	def cancel(self, node):
+		"""Stop every running node below node"""
+		node_id = node.id
+		self.running = [i for i in self.running if node_id not in i.ancestors]
+
+	def _finish(self, node, status):
+		while node.parent is not None:
+			status = node.parent.child_finished(self, node, status)
+			if status == RUNNING:
+				return
+			node = node.parent
+
+	def __call__(self):
+		if not self.running:
+			self.template.root.start(self)
+		else:
+			for node in self.running[:]:
+				# Skip nodes cancelled by a node that finished before them
+				if node not in self.running:
+					continue
+
+				self.running.remove(node)
+				status = node.resume(self)
+				if status != RUNNING:
+					self._finish(node, status)
+
+			# The whole tree finished, start over right away
+			if not self.running:
+				self.template.root.start(self)
+
+		running = self.running
+		if len(running) == 1:
+			return self._actions[running[0].id]
+
+		key = tuple(i.id for i in running)
+		actions = self._combined.get(key)
+		if actions is None:
+			actions = self._combined[key] = tuple(action for i in key for action in self._actions[i])
+		return actions
@@ -12,27 +12,466 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+"""
+Conditions are described in definitions as JSON arrays whose first item is
+the condition type, for example::
+
+	["AND", ["VALUE", "target_range", "-inf", 3], ["NOT", ["TIMER", 2]]]
+
+Each condition compiles to a closure taking an agent. Composite conditions
+flatten nested composites of the same type, order their children so cheap
+conditions run before expensive ones (see :data:`PROPERTY_COSTS`) and
+short-circuit.
+
+Conditions also report the blackboard values they read (``properties``) and
+whether they keep per-agent memory (``stateful``), so their inputs can be
+gathered up front and evaluated away from the agent, see :mod:`.parallel`.
+
+Stateful conditions keep their memory in ``agent.condition_state`` under the
+key they were compiled with (a state machine uses the transition's index and
+the condition's position in it). That memory is only right if the condition
+sees every value of its property: a RANGE skipped while its property left the
+range would still count as inside when the property comes back within the
+hysteresis band. So composites always evaluate their stateful children, and
+do it before short-circuiting on the others. Ordering them by cost instead
+would not save anything, since a stateful child skipped by the short-circuit
+would have to be evaluated afterwards to refresh its memory.
+
+:func:`compile_transitions` goes one step further and turns the transitions
+of a state into the source of a single function, so picking a transition
+costs one call instead of a closure call per condition and per composite.
+Condition types without a ``source`` method are called as closures from the
+generated code.
+"""
+
+import operator
+import time
+
+
+#: Relative cost of reading a blackboard value, by name. Values not listed
+#: cost 1, sensors backed by raycasts and the like should register a higher cost.
+PROPERTY_COSTS = {}
+
+
+def property_cost(name):
+	return PROPERTY_COSTS.get(name, 1)
+
+
+def _number(value):
+	if type(value) == str:
+		return float(value)
+	return value
+
+
 def get_condition(args):
 	return COND_MAP[args[0]](*args[1:])
 
 
+def compile_condition(args, key=None):
+	"""Build a callable taking an agent from a condition's JSON arguments
+
+	:param key: Where stateful conditions keep their memory in
+		``agent.condition_state``, unique to the compiled condition if None
+	"""
+	test = get_condition(args).compile(key)
+
+	# Used to group timings, see Instrumentation
+	test.condition_type = args[0]
+	return test
+
+
+def _constant(constants, value):
+	"""Name a value for generated source, see :func:`compile_transitions`"""
+	name = "_c%d" % len(constants)
+	constants[name] = value
+	return name
+
+
+def condition_source(condition, constants, key=None):
+	"""Get a Python expression testing a condition
+
+	The expression reads the names ``agent`` and ``blackboard``.
+
+	:param constants: A dict to add the values the expression refers to
+	:param key: See :func:`compile_condition`
+	"""
+	source = getattr(condition, "source", None)
+	if source is None:
+		return "%s(agent)" % _constant(constants, condition.compile(key))
+	return source(constants, key)
+
+
+def compile_transitions(conditions, indices, timer=None):
+	"""Build a function picking the first of a list of conditions that is true
+
+	:param conditions: Condition objects, see :func:`get_condition`
+	:param indices: The value to return for each condition, also the key of
+		its memory, see :func:`compile_condition`
+	:param timer: If not None, called with the type of each condition tested
+		and the seconds it took, see :class:`.Instrumentation`
+	:rtype: A callable taking an agent and returning the index of the first
+		true condition, or -1 if none are true
+	"""
+	constants = {"clock" : time.perf_counter, "timer" : timer}
+	lines = ["def transitions(agent):", "\tblackboard = agent.blackboard"]
+	for condition, index in zip(conditions, indices):
+		expression = condition_source(condition, constants, index)
+		if timer is None:
+			lines.append("\tif %s:" % expression)
+		else:
+			lines.append("\tstart = clock()")
+			lines.append("\tresult = %s" % expression)
+			# Grouped by the outermost type, like the condition_type of closures
+			name = next((k for k, v in COND_MAP.items() if v is type(condition)), "?")
+			lines.append("\ttimer(%r, clock() - start)" % name)
+			lines.append("\tif result:")
+		lines.append("\t\treturn %d" % index)
+	lines.append("\treturn -1")
+
+	exec("\n".join(lines), constants)
+	return constants["transitions"]
+
+
 class ValueCondition:
+	"""True while min < property < max"""
 	__slots__ = ["property", "min", "max"]
 
 	def __init__(self, prop, _min, _max):
 		self.property = prop
 
-		if type(_min) == str:
-			_min = float(_min)
-		if type(_max) == str:
-			_max = float(_max)
+		self.min = _number(_min)
+		self.max = _number(_max)
+
+	stateful = False
+
+	@property
+	def cost(self):
+		return property_cost(self.property)
 
-		self.min = _min
-		self.max = _max
+	@property
+	def properties(self):
+		return (self.property,)
 
 	def test(self, agent):
-		return self.min < getattr(agent, self.property) < self.max
+		return self.min < agent.blackboard[self.property] < self.max
+
+	def compile(self, key=None):
+		prop = self.property
+		_min = self.min
+		_max = self.max
+
+		def test(agent):
+			return _min < agent.blackboard[prop] < _max
+		return test
+
+	def source(self, constants, key=None):
+		return "(%s < blackboard[%r] < %s)" % (_constant(constants, self.min),\
+			self.property, _constant(constants, self.max))
+
+
+class CompareCondition:
+	"""Compares a property against a number or another property"""
+	__slots__ = ["property", "op", "value"]
+
+	OPERATORS = {
+		"<" : operator.lt,
+		"<=" : operator.le,
+		">" : operator.gt,
+		">=" : operator.ge,
+		"==" : operator.eq,
+		"!=" : operator.ne,
+		}
+
+	def __init__(self, prop, op, value):
+		if op not in self.OPERATORS:
+			raise ValueError(op, "is not a valid comparison.", \
+				"Valid comparisons are: %s" % str(self.OPERATORS.keys()))
+
+		self.property = prop
+		self.op = op
+
+		# Strings that are not numbers name another property
+		try:
+			self.value = _number(value)
+		except ValueError:
+			self.value = value
+
+	stateful = False
+
+	@property
+	def cost(self):
+		cost = property_cost(self.property)
+		if type(self.value) == str:
+			cost += property_cost(self.value)
+		return cost
+
+	@property
+	def properties(self):
+		if type(self.value) == str:
+			return (self.property, self.value)
+		return (self.property,)
+
+	def compile(self, key=None):
+		prop = self.property
+		op = self.OPERATORS[self.op]
+		value = self.value
+
+		if type(value) == str:
+			def test(agent):
+				blackboard = agent.blackboard
+				return op(blackboard[prop], blackboard[value])
+		else:
+			def test(agent):
+				return op(agent.blackboard[prop], value)
+		return test
+
+	def source(self, constants, key=None):
+		if type(self.value) == str:
+			value = "blackboard[%r]" % self.value
+		else:
+			value = _constant(constants, self.value)
+		return "(blackboard[%r] %s %s)" % (self.property, self.op, value)
+
+
+class RangeCondition:
+	"""
+	Becomes true when min < property < max and stays true until the property
+	leaves the range widened by hysteresis on both sides.
+	"""
+	__slots__ = ["property", "min", "max", "hysteresis"]
+
+	def __init__(self, prop, _min, _max, hysteresis=0):
+		self.property = prop
+		self.min = _number(_min)
+		self.max = _number(_max)
+		self.hysteresis = _number(hysteresis)
+
+	# Remembers which side of the range each agent was on
+	stateful = True
+
+	@property
+	def cost(self):
+		return property_cost(self.property)
+
+	@property
+	def properties(self):
+		return (self.property,)
+
+	def compile(self, key=None):
+		prop = self.property
+		_min = self.min
+		_max = self.max
+		outer_min = self.min - self.hysteresis
+		outer_max = self.max + self.hysteresis
+
+		# Each agent remembers which side of the range it was on, the
+		# compiled condition itself is shared between agents
+		if key is None:
+			key = object()
+
+		def test(agent):
+			value = agent.blackboard[prop]
+			state = agent.condition_state
+
+			if state.get(key):
+				inside = outer_min < value < outer_max
+			else:
+				inside = _min < value < _max
+
+			state[key] = inside
+			return inside
+		return test
+
+	def source(self, constants, key=None):
+		return "%s(agent)" % _constant(constants, self.compile(key))
+
+
+class TimerCondition:
+	"""True once the agent has been in its current state for a number of seconds"""
+	__slots__ = ["seconds"]
+
+	cost = 0.5
+	stateful = False
+	properties = ()
+
+	def __init__(self, seconds):
+		self.seconds = _number(seconds)
+
+	def compile(self, key=None):
+		seconds = self.seconds
+
+		def test(agent):
+			return agent.time - agent.state_entered >= seconds
+		return test
+
+	def source(self, constants, key=None):
+		return "(agent.time - agent.state_entered >= %s)" % _constant(constants, self.seconds)
+
+
+class _CompositeCondition:
+	__slots__ = ["conditions"]
+
+	def __init__(self, *conditions):
+		self.conditions = []
+		for args in conditions:
+			condition = get_condition(args)
+
+			# Flatten nested composites of the same kind
+			if type(condition) == type(self):
+				self.conditions.extend(condition.conditions)
+			else:
+				self.conditions.append(condition)
+
+		if not self.conditions:
+			raise ValueError(type(self).__name__, "needs at least one condition")
+
+	@property
+	def cost(self):
+		return sum(i.cost for i in self.conditions)
+
+	@property
+	def stateful(self):
+		return any(i.stateful for i in self.conditions)
+
+	@property
+	def properties(self):
+		return tuple(j for i in self.conditions for j in i.properties)
+
+	def _children(self, key):
+		# Split the children into the stateful ones, which are always
+		# evaluated (see the module docstring), and the others, cheapest
+		# first. sort() is stable, so conditions of equal cost keep their order.
+		children = [(i, None if key is None else (key, n)) for n, i in enumerate(self.conditions)]
+		children.sort(key=lambda i: i[0].cost)
+		return [i for i in children if i[0].stateful], [i for i in children if not i[0].stateful]
+
+	def _compile_children(self, key):
+		stateful, others = self._children(key)
+		return tuple(i.compile(k) for i, k in stateful), tuple(i.compile(k) for i, k in others)
+
+	def _source(self, constants, key, joiner, reduce):
+		stateful, others = self._children(key)
+		terms = [condition_source(i, constants, k) for i, k in others]
+		if stateful:
+			# A list display evaluates every item before reduce() sees it
+			terms.insert(0, "%s([%s])" % (reduce, ", ".join(condition_source(i, constants, k) for i, k in stateful)))
+		return "(%s)" % joiner.join(terms)
+
+
+class AndCondition(_CompositeCondition):
+	"""True if all conditions are true"""
+	__slots__ = []
+
+	def compile(self, key=None):
+		stateful, tests = self._compile_children(key)
+
+		if stateful:
+			def test(agent):
+				result = True
+				for i in stateful:
+					if not i(agent):
+						result = False
+				if not result:
+					return False
+
+				for i in tests:
+					if not i(agent):
+						return False
+				return True
+		elif len(tests) == 1:
+			return tests[0]
+		elif len(tests) == 2:
+			first, second = tests
+
+			def test(agent):
+				return first(agent) and second(agent)
+		else:
+			def test(agent):
+				for i in tests:
+					if not i(agent):
+						return False
+				return True
+		return test
+
+	def source(self, constants, key=None):
+		return self._source(constants, key, " and ", "all")
+
+
+class OrCondition(_CompositeCondition):
+	"""True if any condition is true"""
+	__slots__ = []
+
+	def compile(self, key=None):
+		stateful, tests = self._compile_children(key)
+
+		if stateful:
+			def test(agent):
+				result = False
+				for i in stateful:
+					if i(agent):
+						result = True
+				if result:
+					return True
+
+				for i in tests:
+					if i(agent):
+						return True
+				return False
+		elif len(tests) == 1:
+			return tests[0]
+		elif len(tests) == 2:
+			first, second = tests
+
+			def test(agent):
+				return first(agent) or second(agent)
+		else:
+			def test(agent):
+				for i in tests:
+					if i(agent):
+						return True
+				return False
+		return test
+
+	def source(self, constants, key=None):
+		return self._source(constants, key, " or ", "any")
+
+
+class NotCondition:
+	"""True if the condition is false"""
+	__slots__ = ["condition"]
+
+	def __init__(self, condition):
+		self.condition = get_condition(condition)
+
+	@property
+	def cost(self):
+		return self.condition.cost
+
+	@property
+	def stateful(self):
+		return self.condition.stateful
+
+	@property
+	def properties(self):
+		return self.condition.properties
+
+	def compile(self, key=None):
+		inner = self.condition.compile(key)
+
+		def test(agent):
+			return not inner(agent)
+		return test
+
+	def source(self, constants, key=None):
+		return "(not %s)" % condition_source(self.condition, constants, key)
+
 
 COND_MAP = {
 		"VALUE" : ValueCondition,
+		"COMPARE" : CompareCondition,
+		"RANGE" : RangeCondition,
+		"TIMER" : TimerCondition,
+		"AND" : AndCondition,
+		"OR" : OrCondition,
+		"NOT" : NotCondition,
 	}
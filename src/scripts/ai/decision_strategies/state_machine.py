@@ -12,69 +12,230 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
-from .conditions import get_condition
-
-
-class State:
-	__slots__ = ["actions", "entry_actions", "exit_actions", "transitions"]
-	
-	def __init__(self, actions, entry_actions, exit_actions, transitions):
+import time
+
+from .conditions import compile_condition, compile_transitions, get_condition
+
+
+class StateMachineTemplate:
+	"""
+	The compiled tables of a state machine definition, shared between agents.
+
+	States are identified by their index in :attr:`names`. The transitions of
+	state ``i`` are the entries ``transition_start[i]`` to
+	``transition_start[i + 1]`` of the flat transition tables, and
+	``state_transitions[i]`` pairs each of their conditions with its index.
+	:meth:`state_test` compiles the same transitions into one function the
+	first time a state is entered, see :func:`.compile_transitions`, so states
+	an agent never reaches cost nothing beyond their conditions.
+
+	Actions are stored by name; :meth:`bind` resolves them against an action
+	table. :attr:`definition` keeps the data the template was compiled from,
+	so it can be compiled again in another process.
+	"""
+	__slots__ = ["names", "index", "actions", "transition_start",
+		"state_transitions", "conditions", "targets",
+		"transition_actions", "definition", "_bindings", "_tests", "_timed_tests", "__weakref__"]
+
+	def __init__(self, names, actions, transition_start, conditions, targets,\
+			transition_actions, definition=None):
+		self.names = names
+		self.index = {name : i for i, name in enumerate(names)}
 		self.actions = actions
-		self.entry_actions = entry_actions
-		self.exit_actions = exit_actions
-		self.transitions = transitions
-
-
-class Transition:
-	__slots__ = ["condition", "state"]
-
-	def __init__(self, condition, state):
-		self.condition = condition
-		self.state = state
+		self.transition_start = transition_start
+		self.state_transitions = tuple(
+			tuple((conditions[j], j) for j in range(transition_start[i], transition_start[i + 1]))\
+			for i in range(len(names)))
+		self.conditions = conditions
+		self.targets = targets
+		self.transition_actions = transition_actions
+		self.definition = definition
+
+		self._bindings = {}
+		self._tests = [None] * len(names)
+		# (timer, test) by state, see state_test()
+		self._timed_tests = [None] * len(names)
+
+	def state_test(self, state, timer=None):
+		"""The transitions of a state compiled into a single function
+
+		:param state: The index of the state
+		:param timer: If not None, the function also calls this with the type
+			of each condition it tests and the seconds it took
+		:rtype: A callable taking an agent and returning the index of the
+			transition to take, or -1
+		"""
+		if timer is not None:
+			timed = self._timed_tests[state]
+			if timed is None or timed[0] != timer:
+				timed = self._timed_tests[state] = (timer, self._compile_test(state, timer))
+			return timed[1]
+
+		test = self._tests[state]
+		if test is None:
+			test = self._tests[state] = self._compile_test(state)
+		return test
+
+	def _compile_test(self, state, timer=None):
+		start, stop = self.transition_start[state], self.transition_start[state + 1]
+		if self.definition is not None:
+			transitions = self.definition["states"][state]["transitions"]
+			return compile_transitions([get_condition(i[0]) for i in transitions], range(start, stop), timer)
+
+		# Without the source data fall back to the compiled conditions
+		transitions = self.state_transitions[state]
+		if timer is None:
+			def test(agent):
+				for condition, i in transitions:
+					if condition(agent):
+						return i
+				return -1
+		else:
+			clock = time.perf_counter
+
+			def test(agent):
+				for condition, i in transitions:
+					before = clock()
+					result = condition(agent)
+					timer(condition.condition_type, clock() - before)
+					if result:
+						return i
+				return -1
+		return test
+
+	def bind(self, action_table):
+		"""Resolve action names to callables
+
+		:param action_table: A mapping of action names to callables
+		:rtype: A tuple of (state actions, transition actions) tables
+		:raises ValueError: If the definition uses an action missing from action_table
+		"""
+		binding = self._bindings.get(id(action_table))
+		if binding and binding[0] is action_table:
+			return binding[1]
+
+		def resolve(names):
+			try:
+				return tuple(action_table[name] for name in names)
+			except KeyError as e:
+				raise ValueError("Unknown action %s, valid actions are: %s" %\
+					(e, str(sorted(action_table.keys()))))
+
+		bound = (tuple(resolve(i) for i in self.actions),\
+			tuple(resolve(i) for i in self.transition_actions))
+
+		self._bindings[id(action_table)] = (action_table, bound)
+		return bound
 
 
 class StateMachine:
 	def __init__(self, agent):
-		self.states = {}
-		self.current_state = None
+		self.template = None
+		self.state = 0
 		self.agent = agent
 
-	def load(self, data):
-		# Load states
-		for state in data["states"]:
-			actions = state["actions"]
-			entry_actions = state["entry_actions"]
-			exit_actions = state["exit_actions"]
+		# The transitions of the current state compiled into a single function
+		self._test = None
 
-			transitions = []
-			for transition in state["transitions"]:
-				condition = get_condition(transition[0])
-				target_state = transition[1]
-				transitions.append(Transition(condition, target_state))
+		# The action tables returned by __call__, see bind()
+		self._actions = ()
+		self._transition_actions = ()
 
-			self.states[state["name"]] = State(actions, entry_actions,\
-				exit_actions, transitions)
+	@property
+	def current_state(self):
+		"""The name of the current state
 
-			if not self.current_state:
-				self.current_state = self.states[state["name"]]
+		.. note:: This used to be the state object itself, states are now
+			only rows of the template's tables. Use
+			``template.index[current_state]`` to get the state's index.
+		"""
+		return self.template.names[self.state] if self.template else None
 
-		# Link transitions
-		for state in self.states.values():
-			for transition in state.transitions:
-				transition.state = self.states[transition.state]
+	@staticmethod
+	def compile(data):
+		names = [state["name"] for state in data["states"]]
+		index = {name : i for i, name in enumerate(names)}
 
-	def __call__(self):
 		actions = []
+		transition_start = []
+		conditions = []
+		targets = []
+		transition_actions = []
 
-		for transition in self.current_state.transitions:
-			if transition.condition.test(self.agent):
-				target_state = transition.state
+		for state in data["states"]:
+			actions.append(tuple(state["actions"]))
+			transition_start.append(len(conditions))
 
-				actions += self.current_state.exit_actions
-				actions += target_state.entry_actions
+			for transition in state["transitions"]:
+				target = index[transition[1]]
+				target_data = data["states"][target]
+
+				conditions.append(compile_condition(transition[0], len(conditions)))
+				targets.append(target)
+				transition_actions.append(tuple(state["exit_actions"]) +\
+					tuple(target_data["entry_actions"]))
+
+		transition_start.append(len(conditions))
+
+		return StateMachineTemplate(tuple(names), tuple(actions),\
+			tuple(transition_start), tuple(conditions), tuple(targets),\
+			tuple(transition_actions), data)
+
+	def set_template(self, template):
+		self.template = template
+		self.state = 0
+		self._test = template.state_test(0)
+		self.agent.state_entered = self.agent.time
+		self._actions = template.actions
+		self._transition_actions = template.transition_actions
+
+	def swap_template(self, template):
+		"""Switch to a new version of the template, staying in the state of the same name"""
+		name = self.current_state
+		state = template.index.get(name)
+
+		self.template = template
+		self._actions = template.actions
+		self._transition_actions = template.transition_actions
+
+		if state is None:
+			state = 0
+			self.agent.state_entered = self.agent.time
+		self.state = state
+		self._test = template.state_test(state)
 
-				self.current_state = target_state
+	def bind(self, action_table):
+		self._actions, self._transition_actions = self.template.bind(action_table)
 
-				return actions
-		else:
-			return self.current_state.actions
+	def load(self, data):
+		self.set_template(self.compile(data))
+
+	def __call__(self):
+		i = self._test(self.agent)
+		if i < 0:
+			return self._actions[self.state]
+
+		template = self.template
+		self.state = state = template.targets[i]
+		self._test = template.state_test(state)
+		agent = self.agent
+		agent.state_entered = agent.time
+		# The memory of stateful conditions only applies to the state it was built in
+		agent.condition_state.clear()
+		return self._transition_actions[i]
+
+	def apply_transition(self, index):
+		"""Take a transition chosen outside of :meth:`__call__`
+
+		:param index: The index of the transition in the template, or -1 to stay in the current state
+		:rtype: The actions :meth:`__call__` would have returned
+		"""
+		if index < 0:
+			return self._actions[self.state]
+
+		template = self.template
+		self.state = state = template.targets[index]
+		self._test = template.state_test(state)
+		self.agent.state_entered = self.agent.time
+		self.agent.condition_state.clear()
+		return self._transition_actions[index]
@@ -0,0 +1,321 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Utility definitions list options, each with the actions to run and the
+considerations scoring it::
+
+	{
+		"strategy" : "UTILITY",
+		"inertia" : 0.1,
+		"options" : [
+			{"name" : "chase", "actions" : ["seek"], "weight" : 1.0, "considerations" : [
+				{"input" : "target_range", "min" : 0, "max" : 20, "curve" : "LINEAR", "slope" : -1, "offset" : 1}
+			]},
+			{"name" : "idle", "actions" : [], "weight" : 0.2, "considerations" : []}
+		]
+	}
+
+Each consideration reads a blackboard value, normalizes it from [min, max] to
+[0, 1] and maps it through a response curve:
+
+	LINEAR      slope * x + offset
+	POLYNOMIAL  slope * (x - shift) ** exponent + offset
+	LOGISTIC    1 / (1 + exp(-slope * (x - shift))) + offset
+	STEP        1 if x >= shift else 0
+
+A fractional power of a negative number isn't real, so POLYNOMIAL clamps
+``x - shift`` to 0 when the exponent isn't a whole number.
+
+The score of an option is its weight times the product of its (clamped)
+considerations, and the best scoring option runs. The current option gets
+``inertia`` added to its score so close scores do not flicker between options.
+"""
+
+import math
+
+from ..batch import numpy
+
+
+CURVES = ("LINEAR", "POLYNOMIAL", "LOGISTIC", "STEP")
+
+
+def _power(base, exponent):
+	if base < 0 and not exponent.is_integer():
+		base = 0.0
+	if base == 0 and exponent < 0:
+		return math.inf
+	return base ** exponent
+
+
+def _power_batch(base, exponent):
+	base = numpy.where((base < 0) & (exponent % 1 != 0), 0.0, base)
+	with numpy.errstate(divide="ignore"):
+		return base ** exponent
+
+
+class Consideration:
+	__slots__ = ["input", "min", "max", "curve", "slope", "exponent", "shift", "offset"]
+
+	def __init__(self, data):
+		if data.get("curve", "LINEAR") not in CURVES:
+			raise ValueError(data["curve"], "is not a valid response curve.", \
+				"Valid curves are: %s" % str(CURVES))
+
+		self.input = data["input"]
+		self.min = float(data.get("min", 0))
+		self.max = float(data.get("max", 1))
+		self.curve = data.get("curve", "LINEAR")
+		self.slope = float(data.get("slope", 1))
+		self.exponent = float(data.get("exponent", 1))
+		self.shift = float(data.get("shift", 0))
+		self.offset = float(data.get("offset", 0))
+
+	def score(self, value):
+		span = self.max - self.min
+		x = (value - self.min) / span if span else 0.0
+		x = min(max(x, 0.0), 1.0)
+
+		curve = self.curve
+		if curve == "LINEAR":
+			y = self.slope * x + self.offset
+		elif curve == "POLYNOMIAL":
+			y = self.slope * _power(x - self.shift, self.exponent) + self.offset
+		elif curve == "LOGISTIC":
+			y = 1 / (1 + math.exp(-self.slope * (x - self.shift))) + self.offset
+		else:
+			y = 1.0 if x >= self.shift else 0.0
+
+		return min(max(y, 0.0), 1.0)
+
+
+class UtilityTemplate:
+	"""The options of a utility definition, shared between agents"""
+	__slots__ = ["names", "actions", "weights", "considerations", "inertia",\
+		"inputs", "_columns", "_bindings", "__weakref__"]
+
+	def __init__(self, names, actions, weights, considerations, inertia):
+		self.names = names
+		self.actions = actions
+		self.weights = weights
+		self.considerations = considerations
+		self.inertia = inertia
+
+		#: The blackboard values read by the considerations
+		self.inputs = tuple(sorted({i.input for option in considerations for i in option}))
+
+		self._columns = None
+		self._bindings = {}
+
+	def bind(self, action_table):
+		"""Resolve action names to callables
+
+		:param action_table: A mapping of action names to callables
+		:rtype: A tuple of action tuples, by option
+		:raises ValueError: If the definition uses an action missing from action_table
+		"""
+		binding = self._bindings.get(id(action_table))
+		if binding and binding[0] is action_table:
+			return binding[1]
+
+		try:
+			bound = tuple(tuple(action_table[name] for name in names) for names in self.actions)
+		except KeyError as e:
+			raise ValueError("Unknown action %s, valid actions are: %s" %\
+				(e, str(sorted(action_table.keys()))))
+
+		self._bindings[id(action_table)] = (action_table, bound)
+		return bound
+
+	def scores(self, blackboard):
+		"""Score every option, without inertia
+
+		:param blackboard: A mapping of input names to values
+		:rtype: A list of scores, by option
+		"""
+		scores = []
+		for weight, considerations in zip(self.weights, self.considerations):
+			score = weight
+			for consideration in considerations:
+				if not score:
+					break
+				score *= consideration.score(blackboard[consideration.input])
+			scores.append(score)
+
+		return scores
+
+	def scores_batch(self, inputs):
+		"""Score every option for many sets of inputs at once with NumPy, without inertia
+
+		:param inputs: An array with a row per agent and a column per :attr:`inputs` name
+		:rtype: An array with a row per agent and a column per option
+		"""
+		columns = self.columns
+
+		# A trailing column of zeros for the constant columns
+		inputs = numpy.hstack((inputs, numpy.zeros((len(inputs), 1))))
+		values = inputs[:, columns["input"]]
+
+		span = columns["max"] - columns["min"]
+		x = numpy.clip((values - columns["min"]) / numpy.where(span, span, 1), 0, 1)
+		x[:, span == 0] = 0
+
+		slope = columns["slope"]
+		shift = columns["shift"]
+		offset = columns["offset"]
+
+		y = numpy.empty_like(x)
+		mask = columns["LINEAR"]
+		y[:, mask] = slope[mask] * x[:, mask] + offset[mask]
+		mask = columns["POLYNOMIAL"]
+		y[:, mask] = slope[mask] * _power_batch(x[:, mask] - shift[mask], columns["exponent"][mask]) + offset[mask]
+		mask = columns["LOGISTIC"]
+		y[:, mask] = 1 / (1 + numpy.exp(-slope[mask] * (x[:, mask] - shift[mask]))) + offset[mask]
+		mask = columns["STEP"]
+		y[:, mask] = x[:, mask] >= shift[mask]
+		numpy.clip(y, 0, 1, out=y)
+
+		return numpy.multiply.reduceat(y, columns["starts"], axis=1) * columns["weights"]
+
+	@property
+	def columns(self):
+		"""
+		The considerations laid out as NumPy parameter arrays, one column per
+		consideration. Every option starts with an extra column that always
+		scores 1 so options without considerations still get a column.
+		"""
+		if self._columns is None:
+			index = {name : i for i, name in enumerate(self.inputs)}
+			columns = []
+			starts = []
+
+			for option in self.considerations:
+				starts.append(len(columns))
+				columns.append((-1, 0.0, 1.0, "LINEAR", 0.0, 1.0, 0.0, 1.0))
+				for i in option:
+					columns.append((index[i.input], i.min, i.max, i.curve, i.slope,\
+						i.exponent, i.shift, i.offset))
+
+			fields = list(zip(*columns))
+			self._columns = {
+				"input" : numpy.array(fields[0], dtype=numpy.intp),
+				"min" : numpy.array(fields[1]),
+				"max" : numpy.array(fields[2]),
+				"slope" : numpy.array(fields[4]),
+				"exponent" : numpy.array(fields[5]),
+				"shift" : numpy.array(fields[6]),
+				"offset" : numpy.array(fields[7]),
+				"starts" : numpy.array(starts, dtype=numpy.intp),
+				"weights" : numpy.array(self.weights),
+				}
+			for curve in CURVES:
+				self._columns[curve] = numpy.array([i[3] == curve for i in columns])
+
+		return self._columns
+
+
+class Utility:
+	def __init__(self, agent):
+		self.template = None
+		self.agent = agent
+
+		#: The index of the chosen option
+		self.choice = 0
+
+		self._actions = ()
+
+	@property
+	def current_state(self):
+		"""The name of the chosen option"""
+		return self.template.names[self.choice] if self.template else None
+
+	@staticmethod
+	def compile(data):
+		options = data["options"]
+		return UtilityTemplate(
+			tuple(i.get("name", "option%d" % n) for n, i in enumerate(options)),
+			tuple(tuple(i.get("actions", ())) for i in options),
+			tuple(float(i.get("weight", 1)) for i in options),
+			tuple(tuple(Consideration(j) for j in i.get("considerations", ())) for i in options),
+			float(data.get("inertia", 0)))
+
+	def set_template(self, template):
+		self.template = template
+		self.choice = 0
+		self.agent.state_entered = self.agent.time
+		self._actions = template.actions
+
+	def swap_template(self, template):
+		"""Switch to a new version of the template, keeping the option of the same name chosen"""
+		name = self.current_state
+
+		self.template = template
+		self._actions = template.actions
+
+		if name in template.names:
+			self.choice = template.names.index(name)
+		else:
+			self.choice = 0
+			self.agent.state_entered = self.agent.time
+
+	def bind(self, action_table):
+		self._actions = self.template.bind(action_table)
+
+	def load(self, data):
+		self.set_template(self.compile(data))
+
+	def _choose(self, choice):
+		if choice != self.choice:
+			self.choice = choice
+			self.agent.state_entered = self.agent.time
+
+		return self._actions[choice]
+
+	def __call__(self):
+		template = self.template
+
+		best = 0
+		best_score = -1.0
+		for i, score in enumerate(template.scores(self.agent.blackboard)):
+			if i == self.choice:
+				score += template.inertia
+
+			if score > best_score:
+				best = i
+				best_score = score
+
+		return self._choose(best)
+
+	@staticmethod
+	def evaluate_batch(strategies):
+		"""Choose options for many agents sharing a template with NumPy
+
+		:param strategies: :class:`Utility` instances with the same template
+		:rtype: A list of action tuples, one per strategy
+		"""
+		template = strategies[0].template
+		count = len(strategies)
+
+		inputs = numpy.empty((count, len(template.inputs)))
+		names = template.inputs
+		for row, strategy in enumerate(strategies):
+			blackboard = strategy.agent.blackboard
+			inputs[row] = [blackboard[name] for name in names]
+
+		scores = template.scores_batch(inputs)
+
+		choices = numpy.array([i.choice for i in strategies])
+		scores[numpy.arange(count), choices] += template.inertia
+
+		return [strategy._choose(int(i)) for strategy, i in zip(strategies, scores.argmax(axis=1))]
@@ -0,0 +1,232 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import json
+import weakref
+
+from . import definition_compiler
+
+
+class DefinitionCache:
+	'''
+	A process-wide cache of parsed AI definitions.
+
+	Definition files are parsed once per path and compiled into a template by
+	each decision strategy that loads them. Agents then share the template and only keep their
+	own cursor into it, so loading a definition for many agents only costs
+	one ``os.stat`` per call, to notice files that changed since they were
+	loaded.
+	'''
+
+	def __init__(self):
+		# path -> [mtime, parsed data]
+		self._data = {}
+		# (path, strategy class) -> compiled template
+		self._templates = {}
+		# Templates of changed files dropped by load(), which agents may still
+		# use -> their (path, strategy class), for reload() to report
+		self._outdated = weakref.WeakKeyDictionary()
+
+	@staticmethod
+	def _mtime(path):
+		try:
+			return os.stat(path).st_mtime
+		except OSError:
+			return None
+
+	def _drop(self, path):
+		# Forget a file's data and templates, remembering the templates
+		del self._data[path]
+		for key in [i for i in self._templates if i[0] == path]:
+			self._outdated[self._templates.pop(key)] = key
+
+	def load(self, path):
+		'''Get the parsed JSON of a definition file
+
+		A JSON file's precompiled ``.aidef`` version is used instead when it
+		was compiled from the file as it is now (see :mod:`.definition_compiler`).
+
+		:param path: The path of the definition file (JSON or ``.aidef``)
+		:rtype: The parsed definition, or None if path is not a file
+		'''
+		mtime = self._mtime(path)
+
+		entry = self._data.get(path)
+		if entry:
+			if entry[0] == mtime:
+				return entry[1]
+			self._drop(path)
+
+		if mtime is None:
+			return None
+
+		# Prefer an up to date precompiled version of JSON definitions
+		if path.endswith(definition_compiler.EXTENSION):
+			data = definition_compiler.read(path)
+			if data is None:
+				raise ValueError("%s is not a definition precompiled by this Python version" % path)
+		else:
+			data = definition_compiler.read(definition_compiler.binary_path(path), mtime)
+
+		if data is None:
+			with open(path, 'r') as f:
+				data = json.load(f)
+
+		self._data[path] = [mtime, data]
+		return data
+
+	def get(self, path, strategy):
+		'''Get the compiled template for a definition file
+
+		:param path: The path of the definition file
+		:param strategy: The decision strategy class used to compile the definition
+		:rtype: The compiled template, or None if path is not a file
+		'''
+		# load() drops the templates of a file that changed
+		data = self.load(path)
+		if data is None:
+			return None
+
+		key = (path, strategy)
+		template = self._templates.get(key)
+		if template is not None:
+			return template
+
+		template = self._templates[key] = strategy.compile(data)
+		return template
+
+	def _stale(self):
+		stale = []
+		for path, entry in self._data.items():
+			mtime = self._mtime(path)
+			if mtime != entry[0]:
+				stale.append((path, mtime))
+
+		return stale
+
+	def check(self):
+		'''Drop any entries whose file has changed since it was loaded
+
+		:rtype: A list of the paths that were dropped
+		'''
+		stale = [path for path, mtime in self._stale()]
+
+		for path in stale:
+			self._drop(path)
+
+		return stale
+
+	def reload(self):
+		'''Parse changed definition files again and recompile their templates
+
+		Each changed file is parsed once and compiled once per decision
+		strategy that had loaded it. If a file no longer loads, the error is
+		printed and the previous version stays in use until the file changes
+		again.
+
+		:rtype: A dict mapping each replaced template to its new version
+		'''
+		replaced = {}
+
+		for path, mtime in self._stale():
+			old_data = self._data.pop(path)[1]
+			old_templates = {key : self._templates.pop(key) for key in list(self._templates) if key[0] == path}
+
+			try:
+				new_templates = {key : self.get(path, key[1]) for key in old_templates}
+				if None in new_templates.values():
+					raise OSError("file not found")
+			except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+				print("Could not reload %s: %s" % (path, e))
+				for key in old_templates:
+					self._templates.pop(key, None)
+				self._data[path] = [mtime, old_data]
+				self._templates.update(old_templates)
+				continue
+
+			for key, template in old_templates.items():
+				replaced[template] = new_templates[key]
+
+		# Templates dropped when load() or check() found their file changed
+		for template, key in list(self._outdated.items()):
+			try:
+				new = self.get(*key)
+			except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+				print("Could not reload %s: %s" % (key[0], e))
+				continue
+
+			if new is not None:
+				replaced[template] = new
+				del self._outdated[template]
+
+		return replaced
+
+	def clear(self):
+		'''Remove all cached definitions'''
+		self._data.clear()
+		self._templates.clear()
+		self._outdated.clear()
+
+
+class DefinitionWatcher:
+	'''
+	Hot reloads definitions for a :class:`.Manager` while the game runs.
+
+	Every ``interval`` seconds the cache checks the files it loaded, and
+	agents using a template of a changed file are switched to the new version
+	(see :meth:`.Agent.swap_template`), keeping their current state by name.
+	'''
+
+	def __init__(self, cache, interval=1.0):
+		self.cache = cache
+		self.interval = interval
+
+		self._elapsed = 0.0
+
+	def update(self, agents, dt):
+		'''Reload changed definitions once the interval has passed
+
+		:rtype: The number of agents switched to a new template
+		'''
+		self._elapsed += dt
+		if self._elapsed < self.interval:
+			return 0
+		self._elapsed = 0.0
+
+		replaced = self.cache.reload()
+		if not replaced:
+			return 0
+
+		count = 0
+		failed = set()
+		for agent in agents:
+			template = agent.strategy.template
+			new = replaced.get(template)
+			if new is None or template in failed:
+				continue
+
+			try:
+				agent.swap_template(new)
+			except ValueError as e:
+				print("Could not reload a definition: %s" % e)
+				failed.add(template)
+				continue
+			count += 1
+
+		return count
+
+
+#: The cache shared by all agents
+cache = DefinitionCache()
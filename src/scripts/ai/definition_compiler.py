@@ -0,0 +1,274 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Validates AI definitions and precompiles them to a binary format
+
+JSON stays the authoring format. The compiler checks a definition against
+an action table and writes a ``.aidef`` file next to it: a fixed size
+header followed by the validated definition serialized with :mod:`marshal`,
+which the loader reads from a memory map without going through the JSON
+parser. Arrays are stored as tuples and strings are interned, so loading
+builds fewer objects and leaves the garbage collector less to track. :class:`.DefinitionCache` picks up an up to date ``.aidef`` file
+instead of its ``.json`` source automatically.
+
+marshal data is only readable by the Python version that wrote it, so the
+header records the interpreter and the source's mtime, and the loader
+ignores files that don't match.
+
+Usage (from the src directory)::
+
+	python -m scripts.ai.definition_compiler [--check] definition.json ...
+"""
+
+import argparse
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+
+from .decision_strategies.conditions import get_condition
+
+
+#: Extension of precompiled definitions
+EXTENSION = ".aidef"
+
+MAGIC = b"UAID"
+VERSION = 1
+
+# magic, format version, marshal version, interpreter tag, source mtime, payload size
+HEADER = struct.Struct("<4sHH16sdI")
+
+_TAG = sys.implementation.cache_tag.encode("ascii")[:16]
+
+
+def default_action_table():
+	'''The actions available to agents of a :class:`.Manager`'''
+	from .actionsets import bge as bge_actions
+	return {i : getattr(bge_actions, i) for i in dir(bge_actions) if not i.startswith("_")}
+
+
+def _validate_state_machine(data, action_table):
+	errors = []
+
+	states = data.get("states")
+	if not states:
+		return ["the definition has no states"]
+
+	if type(states) not in (list, tuple) or not all(type(i) == dict for i in states):
+		return ["states must be a list of objects"]
+
+	names = [state.get("name") for state in states]
+	for name in set(names):
+		if names.count(name) > 1:
+			errors.append("state %s is defined %d times" % (name, names.count(name)))
+
+	reachable = {names[0]}
+	edges = {}
+	for state in states:
+		name = state.get("name")
+
+		for key in ("actions", "entry_actions", "exit_actions"):
+			for action in state.get(key, ()):
+				if action not in action_table:
+					errors.append("state %s uses unknown action %s" % (name, action))
+
+		for transition in state.get("transitions", ()):
+			if type(transition) not in (list, tuple) or len(transition) != 2:
+				errors.append("state %s has a malformed transition %s, expected [condition, state]" % (name, transition))
+				continue
+
+			condition, target = transition
+			if target not in names:
+				errors.append("state %s has a transition to missing state %s" % (name, target))
+			else:
+				edges.setdefault(name, []).append(target)
+
+			try:
+				get_condition(condition)
+			except KeyError as e:
+				errors.append("state %s uses unknown condition type %s" % (name, e))
+			except (IndexError, TypeError, ValueError) as e:
+				errors.append("state %s has an invalid condition %s: %s" % (name, condition, e))
+
+	stack = [names[0]]
+	while stack:
+		for target in edges.get(stack.pop(), ()):
+			if target not in reachable:
+				reachable.add(target)
+				stack.append(target)
+
+	for i, name in enumerate(names):
+		if name not in reachable and name not in names[:i]:
+			errors.append("state %s can't be reached from %s" % (name, names[0]))
+
+	return errors
+
+
+def validate(data, action_table=None):
+	'''Check a parsed definition for mistakes
+
+	State machines are checked for unknown actions, transitions to missing
+	states, invalid conditions and states that can't be reached from the
+	first one. Other strategies are checked by compiling and binding them.
+
+	:param data: The parsed definition
+	:param action_table: The actions agents will use, defaults to :func:`default_action_table`
+	:rtype: A list of error messages, empty if the definition is fine
+	'''
+	from .agent import STRATEGIES
+
+	if type(data) != dict:
+		return ["the definition must be an object"]
+
+	if action_table is None:
+		action_table = default_action_table()
+
+	strategy = data.get("strategy", "STATE_MACHINE")
+	if strategy not in STRATEGIES:
+		return ["unknown decision strategy %s" % strategy]
+
+	if strategy == "STATE_MACHINE":
+		return _validate_state_machine(data, action_table)
+
+	try:
+		STRATEGIES[strategy].compile(data).bind(action_table)
+	except (KeyError, IndexError, TypeError, ValueError) as e:
+		return [str(e)]
+	return []
+
+
+def _freeze(data):
+	if type(data) == list:
+		return tuple(_freeze(i) for i in data)
+	elif type(data) == dict:
+		return {sys.intern(key) : _freeze(value) for key, value in data.items()}
+	elif type(data) == str:
+		return sys.intern(data)
+	return data
+
+
+def binary_path(path):
+	'''The path of the precompiled version of a definition file'''
+	return os.path.splitext(path)[0] + EXTENSION
+
+
+def write(data, path, source_mtime=0.0):
+	'''Write a definition in the binary format
+
+	:param data: The parsed (and validated) definition
+	:param path: The file to write
+	:param source_mtime: The mtime of the JSON source, used to detect outdated files
+	'''
+	payload = marshal.dumps(_freeze(data))
+	with open(path, 'wb') as f:
+		f.write(HEADER.pack(MAGIC, VERSION, marshal.version, _TAG, source_mtime, len(payload)))
+		f.write(payload)
+
+
+def read(path, source_mtime=None):
+	'''Load a definition written by :func:`write`
+
+	:param path: The binary definition file
+	:param source_mtime: If given, only accept a file compiled from a source with this mtime
+	:rtype: The definition, or None if the file is missing, outdated or from another Python version
+	'''
+	try:
+		f = open(path, 'rb')
+	except OSError:
+		return None
+
+	with f:
+		size = os.fstat(f.fileno()).st_size
+		if size < HEADER.size:
+			return None
+
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+			magic, version, marshal_version, tag, mtime, length = HEADER.unpack_from(data)
+			if magic != MAGIC or version != VERSION or marshal_version != marshal.version\
+					or tag.rstrip(b"\0") != _TAG or HEADER.size + length > size:
+				return None
+
+			if source_mtime is not None and mtime != source_mtime:
+				return None
+
+			view = memoryview(data)[HEADER.size:HEADER.size + length]
+			try:
+				return marshal.loads(view)
+			finally:
+				view.release()
+
+
+def compile_file(path, action_table=None):
+	'''Validate a JSON definition file and write its binary version next to it
+
+	:param path: The JSON definition
+	:rtype: A list of error messages, nothing is written if there are any
+	'''
+	data, errors = _load(path, action_table)
+	if errors:
+		return errors
+
+	try:
+		write(data, binary_path(path), os.stat(path).st_mtime)
+	except OSError as e:
+		return [str(e)]
+	return []
+
+
+def check_file(path, action_table=None):
+	'''Validate a JSON definition file without writing anything
+
+	:rtype: A list of error messages
+	'''
+	return _load(path, action_table)[1]
+
+
+def _load(path, action_table):
+	# Read and validate a JSON definition, returning (data, errors)
+	try:
+		with open(path, 'r') as f:
+			data = json.load(f)
+	except OSError as e:
+		return None, [e.strerror or str(e)]
+	except ValueError as e:
+		return None, [str(e)]
+
+	return data, validate(data, action_table)
+
+
+def main(args=None):
+	parser = argparse.ArgumentParser(description="Validate AI definitions and precompile them to %s files" % EXTENSION)
+	parser.add_argument('definitions', nargs='+')
+	parser.add_argument('--check', action='store_true', help="only validate, don't write anything")
+	args = parser.parse_args(args)
+
+	action_table = default_action_table()
+	failed = False
+	for path in args.definitions:
+		if args.check:
+			errors = check_file(path, action_table)
+		else:
+			errors = compile_file(path, action_table)
+
+		for error in errors:
+			print("%s: %s" % (path, error))
+		failed = failed or bool(errors)
+
+	return 1 if failed else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,111 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import heapq
+import math
+
+from .navigation import BLOCKED
+
+
+class FlowField:
+	'''
+	Directions toward a goal for every cell of a :class:`.NavGrid`.
+
+	One Dijkstra sweep from the goal cell gives each cell its cost to reach the
+	goal, after which any number of agents can sample the field for the
+	direction to move in. The sweep only reruns when the goal moves to another
+	cell or the grid changes.
+	'''
+
+	def __init__(self, grid):
+		self.grid = grid
+		self.goal = None
+
+		#: Cost to reach the goal from each cell, by cell index
+		self.distance = []
+
+		self._version = None
+		self._directions = {}
+
+	def update(self, position):
+		'''Move the goal to a world position
+
+		:rtype: True if the field had to be integrated again
+		'''
+		goal = self.grid.cell(position)
+		if goal == self.goal and self._version == self.grid.version:
+			return False
+
+		self.integrate(goal)
+		return True
+
+	def integrate(self, goal):
+		'''Compute the cost to reach the goal cell from every cell'''
+		grid = self.grid
+		self.goal = goal
+		self._version = grid.version
+		self._directions = {}
+
+		distance = [BLOCKED] * (grid.width * grid.height)
+		self.distance = distance
+
+		if goal is None or not grid.passable(goal):
+			return
+
+		start = goal[1] * grid.width + goal[0]
+		distance[start] = 0
+		queue = [(0, start)]
+
+		while queue:
+			cost, index = heapq.heappop(queue)
+			if cost > distance[index]:
+				continue
+
+			for neighbour, move_cost in grid.neighbours(index):
+				new_cost = cost + move_cost
+				if new_cost < distance[neighbour]:
+					distance[neighbour] = new_cost
+					heapq.heappush(queue, (new_cost, neighbour))
+
+	def sample(self, position):
+		'''Get the unit (x, y) direction to move in from a world position
+
+		:rtype: A direction tuple, or None if the position is in the goal cell, off the grid or cannot reach the goal
+		'''
+		grid = self.grid
+		cell = grid.cell(position)
+		if cell is None or cell == self.goal:
+			return None
+
+		index = cell[1] * grid.width + cell[0]
+		directions = self._directions
+		if index in directions:
+			return directions[index]
+
+		best = self.distance[index]
+		best_neighbour = None
+		for neighbour, move_cost in grid.neighbours(index):
+			if self.distance[neighbour] < best:
+				best = self.distance[neighbour]
+				best_neighbour = neighbour
+
+		direction = None
+		if best_neighbour is not None:
+			dx = best_neighbour % grid.width - cell[0]
+			dy = best_neighbour // grid.width - cell[1]
+			length = math.sqrt(dx * dx + dy * dy)
+			direction = (dx / length, dy / length)
+
+		directions[index] = direction
+		return direction
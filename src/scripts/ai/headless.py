@@ -0,0 +1,78 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Stand-ins for the game engine objects agents drive, to run the AI outside the blenderplayer
+
+:class:`.AgentBGE` and the bge action set only use positions, orientations
+and applyMovement/applyRotation of their game object, so wrapping a
+:class:`HeadlessObject` lets the same agents, definitions and manager run
+in a plain Python process for benchmarks and offline testing.
+"""
+
+import math
+
+
+class HeadlessObject:
+	'''
+	A game object with only what the AI uses of KX_GameObject.
+	Rotation is only tracked around Z, the axis agents turn around.
+	'''
+
+	def __init__(self, position=(0.0, 0.0, 0.0), heading=0.0, name="HeadlessObject"):
+		self.name = name
+		self.worldPosition = list(position)
+		self.worldOrientation = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+		self.invalid = False
+
+		self._heading = 0.0
+		self.heading = heading
+
+	@property
+	def heading(self):
+		'''The rotation around Z in radians'''
+		return self._heading
+
+	@heading.setter
+	def heading(self, value):
+		self._heading = value
+
+		cos = math.cos(value)
+		sin = math.sin(value)
+		matrix = self.worldOrientation
+		matrix[0][0] = cos
+		matrix[0][1] = -sin
+		matrix[1][0] = sin
+		matrix[1][1] = cos
+
+	def applyMovement(self, movement, local=False):
+		x, y, z = movement[0], movement[1], movement[2]
+		if local:
+			matrix = self.worldOrientation
+			x, y = matrix[0][0] * x + matrix[0][1] * y, matrix[1][0] * x + matrix[1][1] * y
+
+		position = self.worldPosition
+		position[0] += x
+		position[1] += y
+		position[2] += z
+
+	def applyRotation(self, rotation, local=False):
+		if rotation[2]:
+			self.heading = self._heading + rotation[2]
+
+	def rayCast(self, to, origin=None, distance=0.0, *args):
+		# There is no physics scene, nothing is ever in the way
+		return (None, None, None)
+
+	def endObject(self):
+		self.invalid = True
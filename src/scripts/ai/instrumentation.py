@@ -0,0 +1,164 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import time
+
+from .decision_strategies.state_machine import StateMachine
+
+
+class Instrumentation:
+	'''
+	Call counts and cumulative times of the AI, to find what a slow frame
+	was spent on.
+
+	While :attr:`enabled`, :meth:`.Manager.update` takes an instrumented path
+	for the whole frame, which records:
+
+	* the time spent in each :class:`.Manager` phase
+	* calls and time per decision strategy, per transition condition type
+	  (the type of the condition's outermost node) and per action name
+	* how many agents were in each state, summed over frames
+
+	To time actions individually, agents aren't batched while enabled.
+	Disabled, the only cost is a check of :attr:`enabled` per frame.
+	'''
+
+	def __init__(self):
+		#: Set to True to start collecting
+		self.enabled = False
+		self.reset()
+
+	def reset(self):
+		'''Forget everything collected so far'''
+		#: The number of frames collected
+		self.frames = 0
+		#: name -> [calls, seconds] for phases, strategies, conditions and actions
+		self.phases = {}
+		self.strategies = {}
+		self.conditions = {}
+		self.actions = {}
+		#: (strategy, state name) -> agent frames spent in the state
+		self.states = {}
+
+	@staticmethod
+	def _add(counters, name, seconds, calls=1):
+		counter = counters.get(name)
+		if counter is None:
+			counters[name] = [calls, seconds]
+		else:
+			counter[0] += calls
+			counter[1] += seconds
+
+	def add_phase(self, name, seconds):
+		self._add(self.phases, name, seconds)
+
+	def add_condition(self, name, seconds):
+		self._add(self.conditions, name, seconds)
+
+	def decide(self, agent):
+		'''Run an agent's decision strategy, timing it and its conditions
+
+		:rtype: The actions the strategy picked
+		'''
+		clock = time.perf_counter
+		strategy = agent.strategy
+		start = clock()
+
+		if type(strategy) is StateMachine:
+			# The same as StateMachine.__call__, with the generated code
+			# timing each condition
+			test = strategy.template.state_test(strategy.state, self.add_condition)
+			actions = strategy.apply_transition(test(agent))
+		else:
+			actions = strategy()
+
+		self._add(self.strategies, type(strategy).__name__, clock() - start)
+		return actions
+
+	def update_actions(self, agents, action_table):
+		'''Instrumented :func:`.agent.update_actions`, deciding one agent at a time'''
+		for agent in agents:
+			if agent.action_table is not action_table:
+				agent.bind_actions(action_table)
+			agent.actions = self.decide(agent)
+
+	def update_steering(self, agent):
+		'''Run :meth:`.Agent.update_steering`, timing each action'''
+		clock = time.perf_counter
+		steering = agent.steering
+		steering.reset()
+
+		for action in agent.actions:
+			start = clock()
+			output = action(agent)
+			self._add(self.actions, action.__name__, clock() - start)
+			if output:
+				steering.add_output(output)
+
+		steering.resolve()
+		agent.linear = steering.linear
+		agent.angular = steering.angular
+
+	def count_states(self, agents):
+		'''Add one frame of state occupancy'''
+		self.frames += 1
+		states = self.states
+		for agent in agents:
+			key = (agent.decision_strategy, agent.strategy.current_state)
+			states[key] = states.get(key, 0) + 1
+
+	def dump(self):
+		'''Get a copy of the collected counters
+
+		:rtype: A dict of ``frames``, ``states`` (state -> average agents per frame)
+			and ``phases``, ``strategies``, ``conditions``, ``actions``
+			(name -> (calls, total ms, ms per call))
+		'''
+		def timings(counters):
+			return {name : (calls, seconds * 1000, seconds * 1000 / calls)\
+				for name, (calls, seconds) in counters.items()}
+
+		frames = max(self.frames, 1)
+		return {
+			"frames" : self.frames,
+			"phases" : timings(self.phases),
+			"strategies" : timings(self.strategies),
+			"conditions" : timings(self.conditions),
+			"actions" : timings(self.actions),
+			"states" : {"%s:%s" % key : count / frames for key, count in self.states.items()},
+			}
+
+	def report(self):
+		'''Format :meth:`dump` as lines of text, slowest first
+
+		:rtype: A list of strings
+		'''
+		data = self.dump()
+		frames = max(data["frames"], 1)
+
+		lines = ["AI counters over %d frames (ms per frame, calls per frame)" % data["frames"]]
+		for section in ("phases", "strategies", "conditions", "actions"):
+			lines.append(section.capitalize())
+			for name, (calls, total, each) in sorted(data[section].items(), key=lambda i: -i[1][1]):
+				lines.append("  %-24s %8.3f ms %8.1f" % (name, total / frames, calls / frames))
+
+		lines.append("States (agents per frame)")
+		for name, count in sorted(data["states"].items(), key=lambda i: -i[1]):
+			lines.append("  %-24s %8.1f" % (name, count))
+
+		return lines
+
+
+#: The counters shared by the whole AI
+counters = Instrumentation()
@@ -12,13 +12,72 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import time
+
+from .batch import SteeringBatch, numpy
+from .definition_cache import DefinitionWatcher, cache as definition_cache
+from .flowfield import FlowField
+from .instrumentation import counters
+from .pathfinding import PathQueue
+from .perception import Perception
+from .scheduler import Scheduler
+from .spatial import SpatialHash
+
+
 class Manager:
-	def __init__(self):
+	def __init__(self, batch=False, scheduler=None, cell_size=4.0, perception=None,\
+			reload_interval=None):
+		"""
+		:param batch: Steer batchable agents in one vectorized pass (requires NumPy)
+		:param scheduler: The :class:`.Scheduler` deciding which agents are evaluated each frame (defaults to all of them)
+		:param cell_size: The cell size of the :class:`.SpatialHash` used for neighbour queries
+		:param perception: The :class:`.Perception` updating agent senses (defaults to 8 raycasts per frame)
+		:param reload_interval: If not None, check definition files for changes every this many seconds and hot reload them
+		"""
+		# Agents are kept densely packed and removed by swapping in the last
+		# one. Handles index _slots, which tracks where each agent currently
+		# is and a generation that is bumped when the slot is freed.
 		self._agents = []
+		self._agent_slots = []
+		self._slots = []
+		self._free_slots = []
 		self._action_set = {}
 		self._actions = {}
 		self._transitions = {}
 
+		if batch and numpy is None:
+			print("NumPy is not available, falling back to per-agent steering")
+			batch = False
+		self._batch = SteeringBatch() if batch else None
+
+		self.scheduler = scheduler if scheduler else Scheduler()
+
+		#: The :class:`.Perception` updating what agents sense of their targets
+		self.perception = perception if perception else Perception()
+
+		#: The shared :class:`.Instrumentation`, set its ``enabled`` to collect timings
+		self.instrumentation = counters
+
+		#: The :class:`.DefinitionWatcher` hot reloading definitions, or None
+		self.watcher = None
+		if reload_interval is not None:
+			self.watcher = DefinitionWatcher(definition_cache, reload_interval)
+
+		#: Agent positions as of the start of the current update, for neighbour queries
+		self.spatial = SpatialHash(cell_size)
+
+		self._navigation = None
+		self._flow_fields = {}
+
+		#: The :class:`.PathQueue` servicing path requests on the navigation grid
+		self.paths = None
+
+		# The (batched, per-agent) split made by update_steering
+		self._steered = ((), ())
+
+		# The agents the scheduler picked in begin_update
+		self._due = None
+
 		from .actionsets import bge as bge_actions
 		for item in dir(bge_actions):
 			if not item.startswith("_"):
@@ -27,16 +86,235 @@ class Manager:
 		# for i, v in self._action_set.items():
 			# print(i, '=', v)
 
+	@property
+	def action_set(self):
+		"""The mapping of action names to callables used by this manager"""
+		return self._action_set
+
+	@property
+	def agents(self):
+		"""The registered agents, in no particular order (do not modify)"""
+		return self._agents
+
+	def add(self, agent):
+		"""Register an agent to be updated by this manager
+
+		:rtype: A handle to pass to :meth:`remove` and :meth:`get`
+		"""
+		if self._free_slots:
+			slot = self._free_slots.pop()
+			entry = self._slots[slot]
+			entry[0] = len(self._agents)
+		else:
+			slot = len(self._slots)
+			entry = [len(self._agents), 0]
+			self._slots.append(entry)
+
+		self._agents.append(agent)
+		self._agent_slots.append(slot)
+		agent.manager = self
+		agent.handle = (slot, entry[1])
+
+		return agent.handle
+
+	def get(self, handle):
+		"""Get the agent of a handle, or None if it has been removed"""
+		slot, generation = handle
+		entry = self._slots[slot]
+		if entry[1] != generation:
+			return None
+
+		return self._agents[entry[0]]
+
+	def remove(self, handle):
+		"""Unregister an agent in constant time
+
+		:rtype: False if the handle was stale, True otherwise
+		"""
+		slot, generation = handle
+		entry = self._slots[slot]
+		if entry[1] != generation:
+			return False
+
+		self._remove_at(entry[0])
+		return True
+
+	def _remove_at(self, index):
+		agents = self._agents
+		agent_slots = self._agent_slots
+
+		slot = agent_slots[index]
+		last = len(agents) - 1
+		agents[index].handle = None
+		self.scheduler.discard(agents[index])
+		if index != last:
+			agents[index] = agents[last]
+			agent_slots[index] = agent_slots[last]
+			self._slots[agent_slots[index]][0] = index
+		agents.pop()
+		agent_slots.pop()
+
+		entry = self._slots[slot]
+		entry[0] = -1
+		entry[1] += 1
+		self._free_slots.append(slot)
+
+	def shutdown(self):
+		"""Stop the worker threads of the path queue"""
+		if self.paths:
+			self.paths.shutdown()
+
+	@property
+	def navigation(self):
+		"""The :class:`.NavGrid` of the level, used for flow fields"""
+		return self._navigation
+
+	@navigation.setter
+	def navigation(self, value):
+		self._navigation = value
+		self._flow_fields.clear()
+
+		if self.paths:
+			self.paths.shutdown()
+		self.paths = PathQueue(value) if value else None
+
+	def flow_field(self, target):
+		"""Get the :class:`.FlowField` leading to a target
+
+		Fields are shared by every agent with the same target and only
+		integrated again when the target moves to another cell. The field of a
+		target is dropped once no agent has it as its target.
+
+		:param target: An object with a position (usually an agent's target)
+		:rtype: The flow field, or None if the manager has no navigation grid
+		"""
+		if not self._navigation:
+			return None
+
+		field = self._flow_fields.get(target)
+		if field is None:
+			field = self._flow_fields[target] = FlowField(self._navigation)
+
+		field.update(target.position)
+		return field
+
 	def update(self, dt):
+		"""Run one AI frame: decide, steer and apply for every valid agent"""
+		if counters.enabled:
+			self._update_instrumented(dt)
+			return
+
+		agents = self.begin_update(dt)
+		self.update_decisions(agents)
+		self.update_steering(agents, dt)
+		self.apply_steering(dt)
+
+	def _update_instrumented(self, dt):
+		clock = time.perf_counter
+
+		start = clock()
+		agents = self.begin_update(dt)
+		begin = clock()
+		self.update_decisions(agents, True)
+		decide = clock()
+		self.update_steering(agents, dt, True)
+		steer = clock()
+		self.apply_steering(dt)
+		end = clock()
+
+		counters.add_phase("begin", begin - start)
+		counters.add_phase("decide", decide - begin)
+		counters.add_phase("steer", steer - decide)
+		counters.add_phase("apply", end - steer)
+		counters.count_states(agents)
+
+	def begin_update(self, dt):
+		"""Advance agent clocks, drop invalid agents, rebuild the spatial hash and update perception
+
+		:rtype: The list of agents to update this frame
+		"""
+		if self.paths:
+			self.paths.update()
+
+		if self.watcher:
+			self.watcher.update(self._agents, dt)
+
 		invalid_agents = []
-		for agent in self._agents:
+		agents = []
+		for index, agent in enumerate(self._agents):
 			if not agent.valid:
-				invalid_agents.append(agent)
+				invalid_agents.append(index)
+				continue
+
+			agent.manager = self
+			agent.time += dt
+			agent.blackboard.invalidate()
+			agents.append(agent)
+
+		# Highest index first, so swapping in the last agent never moves
+		# one that is still waiting to be removed
+		for index in reversed(invalid_agents):
+			self._remove_at(index)
+
+		# Forget the flow fields of targets nobody is after anymore
+		if self._flow_fields:
+			targets = {agent.target for agent in agents}
+			for target in [i for i in self._flow_fields if i not in targets]:
+				del self._flow_fields[target]
+
+		self.spatial.rebuild(agents)
+
+		# Only agents that decide this frame read what they perceive
+		self._due = self.scheduler.due(agents)
+		self.perception.update(self._due, dt)
+
+		return agents
+
+	def update_decisions(self, agents, instrumented=False):
+		"""Let the scheduler pick the agents that decide on new actions this frame
+
+		:param instrumented: Time the decisions with :attr:`instrumentation`
+		"""
+		due, self._due = self._due, None
+		self.scheduler.run(agents, self._action_set, due, counters.update_actions if instrumented else None)
+
+	def update_steering(self, agents, dt, instrumented=False):
+		"""Compute the steering of every agent, before any of them moves
+
+		:param instrumented: Time the actions with :attr:`instrumentation`,
+			agents aren't batched then so actions are timed one by one
+		"""
+		if instrumented:
+			for agent in agents:
+				counters.update_steering(agent)
+			self._steered = ((), agents)
+			return
+
+		batch = self._batch
+		batched_agents = []
+		single_agents = []
+		for agent in agents:
+			if batch and agent.BATCH_STEERING:
+				batched_agents.append(agent)
 				continue
 
-			agent.update_actions(self._action_set)
 			agent.update_steering(dt)
+			single_agents.append(agent)
+
+		if batched_agents:
+			self._batch.gather(batched_agents)
+			self._batch.steer(batched_agents)
+
+		self._steered = (batched_agents, single_agents)
+
+	def apply_steering(self, dt):
+		"""Move the agents steered by :meth:`update_steering`"""
+		batched_agents, single_agents = self._steered
+		self._steered = ((), ())
+
+		for agent in single_agents:
 			agent.apply_steering(dt)
 
-		for agent in invalid_agents:
-			self._agents.remove(agent)
\ No newline at end of file
+		if batched_agents:
+			self._batch.integrate(dt)
+			self._batch.scatter(batched_agents)
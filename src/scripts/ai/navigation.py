@@ -0,0 +1,219 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import math
+import struct
+
+
+BLOCKED = float("inf")
+
+# (dx, dy, step length) of the 8 neighbours of a cell
+_NEIGHBOURS = (
+	(1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+	(1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (-1, -1, math.sqrt(2)),
+	)
+
+
+# Bytes per 4x4 block, and the offset of the colour data in the block
+_DXT_FORMATS = {b"DXT1" : (8, 0), b"DXT3" : (16, 8), b"DXT5" : (16, 8)}
+
+
+def read_heightmap(path):
+	'''Read the heights of a DXT compressed DDS grayscale image
+
+	Each 4x4 block of pixels is reduced to the average of its two colour
+	end points, which is plenty for navigation.
+
+	:rtype: A tuple of (row-major heights from 0 to 1 with the bottom row of the
+		image first, width, height), in blocks
+	:raises ValueError: If the file isn't a DXT1, DXT3 or DXT5 DDS image
+	'''
+	with open(path, "rb") as f:
+		data = f.read()
+
+	if data[:4] != b"DDS " or len(data) < 128:
+		raise ValueError("%s is not a DDS image" % path)
+
+	height, width = struct.unpack_from("<2I", data, 12)
+	four_cc = data[84:88]
+	if four_cc not in _DXT_FORMATS:
+		raise ValueError("%s: unsupported DDS format %r" % (path, four_cc))
+
+	block_size, offset = _DXT_FORMATS[four_cc]
+	blocks_x = max(1, (width + 3) // 4)
+	blocks_y = max(1, (height + 3) // 4)
+
+	# The green channel has the most bits in RGB565
+	rows = []
+	unpack = struct.Struct("<2H").unpack_from
+	position = 128 + offset
+	for y in range(blocks_y):
+		row = []
+		for x in range(blocks_x):
+			c0, c1 = unpack(data, position)
+			row.append((((c0 >> 5) & 63) + ((c1 >> 5) & 63)) / 126)
+			position += block_size
+		rows.append(row)
+
+	rows.reverse()
+	return [i for row in rows for i in row], blocks_x, blocks_y
+
+
+class NavGrid:
+	'''
+	A grid of traversal costs covering the XY plane of a level.
+
+	Each cell has a cost multiplier of at least 1, or :data:`BLOCKED`. Moving
+	between neighbouring cells costs the step length times the average cost
+	of the two cells, so costs are symmetric. :attr:`version` is bumped
+	whenever costs change so searches and caches built on the grid can tell
+	they are stale.
+	'''
+
+	def __init__(self, width, height, cell_size=1.0, origin=(0, 0), costs=None):
+		'''
+		:param width: The number of cells along X
+		:param height: The number of cells along Y
+		:param cell_size: The world size of a cell
+		:param origin: The world XY position of the corner of cell (0, 0)
+		:param costs: Row-major cell costs (defaults to 1 everywhere)
+		'''
+		self.width = width
+		self.height = height
+		self.cell_size = cell_size
+		self.origin = (origin[0], origin[1])
+		self.costs = list(costs) if costs is not None else [1.0] * (width * height)
+		self.version = 0
+
+		if len(self.costs) != width * height:
+			raise ValueError("Expected %d costs, got %d" % (width * height, len(self.costs)))
+
+	@classmethod
+	def from_mask(cls, rows, cell_size=1.0, origin=(0, 0)):
+		'''Build a grid from rows of cells, where '#' or a false value is blocked
+
+		:param rows: A sequence of rows (strings or sequences), the first row is at the lowest Y
+		'''
+		costs = []
+		for row in rows:
+			for cell in row:
+				blocked = cell == '#' if type(cell) == str else not cell
+				costs.append(BLOCKED if blocked else 1.0)
+
+		return cls(len(rows[0]), len(rows), cell_size, origin, costs)
+
+	@classmethod
+	def from_heightmap(cls, heights, width, height, cell_size=1.0, origin=(0, 0),\
+			max_slope=1.0, slope_cost=4.0):
+		'''Build a grid from terrain heights, cells get more expensive with slope
+
+		:param heights: Row-major heights of the cell centers
+		:param max_slope: Cells steeper than this (rise over run) are blocked
+		:param slope_cost: Extra cost per unit of slope
+		'''
+		costs = []
+		for y in range(height):
+			for x in range(width):
+				h = heights[y * width + x]
+
+				slope = 0
+				for dx, dy, step in _NEIGHBOURS[:4]:
+					nx = x + dx
+					ny = y + dy
+					if 0 <= nx < width and 0 <= ny < height:
+						slope = max(slope, abs(heights[ny * width + nx] - h) / cell_size)
+
+				costs.append(BLOCKED if slope > max_slope else 1.0 + slope_cost * slope)
+
+		return cls(width, height, cell_size, origin, costs)
+
+	@classmethod
+	def from_heightmap_file(cls, path, size, height_scale, cells, max_slope=1.0, slope_cost=4.0):
+		'''Build a grid from a DDS heightmap covering a square centered on the origin
+
+		:param path: The heightmap, see :func:`read_heightmap`
+		:param size: The world size of a side of the heightmap
+		:param height_scale: The world height of white
+		:param cells: The number of cells along each side of the grid
+		'''
+		heights, width, height = read_heightmap(path)
+
+		# Average the heightmap into the cells
+		sums = [0.0] * (cells * cells)
+		counts = [0] * (cells * cells)
+		for y in range(height):
+			row = (y * cells // height) * cells
+			for x in range(width):
+				index = row + x * cells // width
+				sums[index] += heights[y * width + x]
+				counts[index] += 1
+
+		heights = [height_scale * total / max(count, 1) for total, count in zip(sums, counts)]
+		return cls.from_heightmap(heights, cells, cells, size / cells, (-size / 2, -size / 2),\
+			max_slope, slope_cost)
+
+	def cell(self, position):
+		'''Get the (x, y) cell containing a world position, or None if it is off the grid'''
+		x = int(math.floor((position[0] - self.origin[0]) / self.cell_size))
+		y = int(math.floor((position[1] - self.origin[1]) / self.cell_size))
+
+		if 0 <= x < self.width and 0 <= y < self.height:
+			return (x, y)
+		return None
+
+	def center(self, cell):
+		'''Get the world XY position of the center of a cell'''
+		return (self.origin[0] + (cell[0] + 0.5) * self.cell_size,
+			self.origin[1] + (cell[1] + 0.5) * self.cell_size)
+
+	def cost(self, cell):
+		return self.costs[cell[1] * self.width + cell[0]]
+
+	def passable(self, cell):
+		return self.costs[cell[1] * self.width + cell[0]] != BLOCKED
+
+	def set_cost(self, cell, cost):
+		'''Change the cost of a cell, use :data:`BLOCKED` to make it impassable'''
+		self.costs[cell[1] * self.width + cell[0]] = cost
+		self.version += 1
+
+	def neighbours(self, index):
+		'''Yield (index, move cost) for the passable neighbours of a cell index
+
+		Diagonal moves are only allowed if both adjacent cells are passable, so
+		paths never cut blocked corners.
+		'''
+		width = self.width
+		height = self.height
+		costs = self.costs
+
+		x = index % width
+		y = index // width
+		cost = costs[index]
+
+		for dx, dy, step in _NEIGHBOURS:
+			nx = x + dx
+			ny = y + dy
+			if not (0 <= nx < width and 0 <= ny < height):
+				continue
+
+			neighbour = ny * width + nx
+			neighbour_cost = costs[neighbour]
+			if neighbour_cost == BLOCKED:
+				continue
+
+			if dx and dy and (costs[y * width + nx] == BLOCKED or costs[ny * width + x] == BLOCKED):
+				continue
+
+			yield neighbour, step * (cost + neighbour_cost) * 0.5
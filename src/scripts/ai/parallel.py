@@ -0,0 +1,294 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Evaluates state machine transitions for shards of agents in worker processes
+
+Agent objects and the closures of compiled conditions cannot leave the
+logic thread, but conditions only read blackboard values, the agent's clock
+and the time its state was entered. :class:`ParallelEvaluator` gathers those
+into a shared memory table per template, worker processes compile the same
+definition and pick the transitions of their rows, and the main process
+applies the chosen transitions with :meth:`.StateMachine.apply_transition`.
+Transitions are picked from the same float64 values by the same code, so
+they match in-process evaluation exactly.
+
+Only numeric blackboard values can be shared. Templates with stateful
+conditions (RANGE), other decision strategies and small groups are
+evaluated in-process.
+
+The main process still reads every blackboard value the conditions of a
+template could need, which is most of the cost of in-process evaluation.
+With the built in conditions, in-process evaluation was faster at every
+crowd size measured (``benchmarks/parallel_decisions.py``, 1000 to 10000
+agents: 1.1 to 13.9 ms per tick in-process, 9.8 to 81.9 ms with 2 workers),
+so groups are only sent to the workers once ``min_agents`` is set, and the
+:class:`.Manager` does not use it. It is an opt-in experiment: set it as the
+scheduler's ``evaluate``, and call :meth:`ParallelEvaluator.shutdown` when
+done::
+
+	manager.scheduler.evaluate = ParallelEvaluator(workers=2, min_agents=500)
+"""
+
+import concurrent.futures
+import weakref
+
+try:
+	from multiprocessing import shared_memory
+except ImportError:
+	shared_memory = None
+
+from .agent import update_actions
+from .batch import numpy
+from .decision_strategies.conditions import get_condition
+from .decision_strategies.state_machine import StateMachine
+
+
+# Worker process side: compiled templates and attached tables by group key
+_worker_templates = {}
+_worker_tables = {}
+
+
+def _forget(live):
+	# Detach from the tables of groups that were released
+	for key in [i for i in _worker_tables if i not in live]:
+		_worker_tables.pop(key)[1].close()
+		_worker_templates.pop(key, None)
+
+
+def _attach(key, name, capacity, columns):
+	table = _worker_tables.get(key)
+	if table is None or table[0] != name:
+		if table is not None:
+			table[1].close()
+
+		block = shared_memory.SharedMemory(name=name)
+		array = numpy.ndarray((capacity, columns), dtype=numpy.float64, buffer=block.buf)
+		table = _worker_tables[key] = (name, block, array)
+
+	return table[2]
+
+
+class _RowAgent:
+	"""What conditions read of an agent, filled from a table row"""
+	__slots__ = ["blackboard", "time", "state_entered", "condition_state"]
+
+	def __init__(self):
+		self.blackboard = None
+		self.time = 0.0
+		self.state_entered = 0.0
+		self.condition_state = {}
+
+
+def _evaluate_shard(key, definition, name, capacity, properties, start, stop, live):
+	_forget(live)
+
+	template = _worker_templates.get(key)
+	if template is None:
+		template = _worker_templates[key] = StateMachine.compile(definition)
+
+	columns = len(properties) + 4
+	table = _attach(key, name, capacity, columns)
+	time_column = len(properties)
+
+	agent = _RowAgent()
+	state_transitions = template.state_transitions
+	for row in range(start, stop):
+		values = table[row].tolist()
+		agent.blackboard = dict(zip(properties, values))
+		agent.time = values[time_column]
+		agent.state_entered = values[time_column + 1]
+
+		result = -1
+		for condition, i in state_transitions[int(values[time_column + 2])]:
+			if condition(agent):
+				result = i
+				break
+
+		table[row, time_column + 3] = result
+
+
+class _Group:
+	"""The shared table of the agents using one template"""
+
+	def __init__(self, key, definition, properties):
+		self.key = key
+		self.definition = definition
+		self.properties = properties
+		self.columns = len(properties) + 4
+
+		self.capacity = 0
+		self.block = None
+		self.table = None
+
+	def reserve(self, count):
+		if count <= self.capacity:
+			return
+
+		self.release()
+		self.capacity = max(count, self.capacity * 2, 64)
+		self.block = shared_memory.SharedMemory(create=True, size=self.capacity * self.columns * 8)
+		self.table = numpy.ndarray((self.capacity, self.columns), dtype=numpy.float64, buffer=self.block.buf)
+
+	def release(self):
+		if self.block is not None:
+			self.table = None
+			self.block.close()
+			self.block.unlink()
+			self.block = None
+			self.capacity = 0
+
+
+class ParallelEvaluator:
+	'''
+	A replacement for :func:`.agent.update_actions` that evaluates state
+	machines in a process pool. Set it as a :class:`.Scheduler`'s ``evaluate``.
+
+	Falls back to in-process evaluation for everything when NumPy or shared
+	memory are unavailable, and for groups of fewer than ``min_agents`` agents,
+	where the round trip costs more than it saves.
+
+	The shared table of a template is freed once the template is no longer
+	used, e.g. after every agent switched to a hot reloaded version of it.
+	'''
+
+	def __init__(self, workers=2, min_agents=None):
+		'''
+		:param workers: The number of worker processes
+		:param min_agents: The smallest group of agents sharing a template worth
+			sending to the workers, None to evaluate everything in-process. Measure
+			the break-even point with ``benchmarks/parallel_decisions.py`` on the
+			target hardware, none was found for the built in conditions (see
+			:mod:`.parallel`).
+		'''
+		self.workers = workers
+		self.min_agents = min_agents
+
+		self.available = numpy is not None and shared_memory is not None
+		self._executor = None
+
+		# template -> _Group, or None if the template can't be evaluated remotely
+		self._groups = weakref.WeakKeyDictionary()
+		# The keys of the groups whose tables are still allocated
+		self._live = set()
+		self._next_key = 0
+
+	def _group(self, template):
+		if template in self._groups:
+			return self._groups[template]
+
+		group = None
+		if template.definition is not None:
+			conditions = [get_condition(transition[0])\
+				for state in template.definition["states"]\
+				for transition in state["transitions"]]
+
+			if not any(i.stateful for i in conditions):
+				properties = []
+				for condition in conditions:
+					for name in condition.properties:
+						if name not in properties:
+							properties.append(name)
+
+				group = _Group(self._next_key, template.definition, tuple(properties))
+				self._next_key += 1
+
+				# Free the table when the template is replaced and dropped
+				self._live.add(group.key)
+				weakref.finalize(template, self._release, group)
+
+		self._groups[template] = group
+		return group
+
+	def _release(self, group):
+		group.release()
+		self._live.discard(group.key)
+
+	def __call__(self, agents, action_table):
+		min_agents = self.min_agents
+		if not self.available or min_agents is None or len(agents) < min_agents:
+			update_actions(agents, action_table)
+			return
+
+		local = []
+		groups = {}
+		for agent in agents:
+			strategy = agent.strategy
+			group = self._group(strategy.template) if type(strategy) is StateMachine else None
+			if group is None:
+				local.append(agent)
+				continue
+
+			if agent.action_table is not action_table:
+				agent.bind_actions(action_table)
+			groups.setdefault(group, []).append(agent)
+
+		pending = []
+		for group, members in groups.items():
+			if len(members) < min_agents or not self._gather(group, members):
+				local.extend(members)
+				continue
+
+			pending.append((group, members, self._submit(group, len(members))))
+
+		if local:
+			update_actions(local, action_table)
+
+		for group, members, futures in pending:
+			for future in futures:
+				future.result()
+
+			results = group.table[:len(members), group.columns - 1].tolist()
+			for agent, result in zip(members, results):
+				agent.actions = agent.strategy.apply_transition(int(result))
+
+	def _gather(self, group, members):
+		group.reserve(len(members))
+		table = group.table
+		properties = group.properties
+
+		# Filling the table row by row costs more than converting all rows at once
+		rows = []
+		for agent in members:
+			blackboard = agent.blackboard
+			values = [blackboard[i] for i in properties]
+			values += (agent.time, agent.state_entered, agent.strategy.state, -1)
+			rows.append(values)
+
+		try:
+			table[:len(rows)] = rows
+		except (TypeError, ValueError):
+			# A value that isn't a number, this group stays in-process
+			return False
+
+		return True
+
+	def _submit(self, group, count):
+		if self._executor is None:
+			self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+
+		shard = -(-count // self.workers)
+		live = tuple(self._live)
+		return [self._executor.submit(_evaluate_shard, group.key, group.definition,\
+				group.block.name, group.capacity, group.properties, start, min(start + shard, count), live)\
+			for start in range(0, count, shard)]
+
+	def shutdown(self):
+		'''Stop the worker processes and free the shared tables'''
+		if self._executor:
+			self._executor.shutdown()
+			self._executor = None
+
+		for group in list(self._groups.values()):
+			if group:
+				self._release(group)
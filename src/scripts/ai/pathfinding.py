@@ -0,0 +1,287 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import collections
+import heapq
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .navigation import BLOCKED
+
+
+_SQRT2 = math.sqrt(2)
+
+
+def _octile(width, a, b):
+	dx = abs(a % width - b % width)
+	dy = abs(a // width - b // width)
+	return max(dx, dy) + (_SQRT2 - 1) * min(dx, dy)
+
+
+def astar(grid, start, goal, allowed=None):
+	'''Find the cheapest path between two cells of a :class:`.NavGrid`
+
+	:param start: The (x, y) start cell
+	:param goal: The (x, y) goal cell
+	:param allowed: An optional function taking a cell index, cells it rejects are not searched
+	:rtype: A list of (x, y) cells from start to goal, or None if there is no path
+	'''
+	if not grid.passable(start) or not grid.passable(goal):
+		return None
+
+	width = grid.width
+	start_index = start[1] * width + start[0]
+	goal_index = goal[1] * width + goal[0]
+
+	# Cell costs are at least 1, so the octile distance never overestimates
+	g = {start_index: 0}
+	came_from = {}
+	queue = [(_octile(width, start_index, goal_index), 0, start_index)]
+
+	while queue:
+		f, cost, index = heapq.heappop(queue)
+		if index == goal_index:
+			path = [index]
+			while index in came_from:
+				index = came_from[index]
+				path.append(index)
+			path.reverse()
+			return [(i % width, i // width) for i in path]
+
+		if cost > g[index]:
+			continue
+
+		for neighbour, move_cost in grid.neighbours(index):
+			if allowed and not allowed(neighbour):
+				continue
+
+			new_cost = cost + move_cost
+			if new_cost < g.get(neighbour, BLOCKED):
+				g[neighbour] = new_cost
+				came_from[neighbour] = index
+				heapq.heappush(queue, (new_cost + _octile(width, neighbour, goal_index), new_cost, neighbour))
+
+	return None
+
+
+class ClusterGraph:
+	'''
+	A coarse graph of square clusters of a :class:`.NavGrid`.
+
+	Two clusters are linked if a passable cell on one side of their shared
+	border has a passable neighbour on the other. A search over clusters gives
+	a corridor that the cell level search is then restricted to.
+	'''
+
+	def __init__(self, grid, cluster_size=8):
+		self.grid = grid
+		self.cluster_size = cluster_size
+		self.version = grid.version
+
+		self.width = (grid.width + cluster_size - 1) // cluster_size
+		self.height = (grid.height + cluster_size - 1) // cluster_size
+		self.links = collections.defaultdict(set)
+
+		for y in range(grid.height):
+			for x in range(grid.width):
+				if not grid.passable((x, y)):
+					continue
+
+				cluster = self.cluster((x, y))
+				for nx, ny in ((x + 1, y), (x, y + 1)):
+					if nx < grid.width and ny < grid.height and grid.passable((nx, ny)):
+						other = self.cluster((nx, ny))
+						if other != cluster:
+							self.links[cluster].add(other)
+							self.links[other].add(cluster)
+
+	def cluster(self, cell):
+		return (cell[1] // self.cluster_size) * self.width + cell[0] // self.cluster_size
+
+	def corridor(self, start, goal):
+		'''Get the set of clusters on a shortest cluster path between two cells, or None'''
+		start_cluster = self.cluster(start)
+		goal_cluster = self.cluster(goal)
+
+		came_from = {start_cluster: None}
+		queue = collections.deque([start_cluster])
+		while queue:
+			cluster = queue.popleft()
+			if cluster == goal_cluster:
+				corridor = set()
+				while cluster is not None:
+					corridor.add(cluster)
+					cluster = came_from[cluster]
+				return corridor
+
+			for other in self.links[cluster]:
+				if other not in came_from:
+					came_from[other] = cluster
+					queue.append(other)
+
+		return None
+
+
+def find_path(grid, start, goal, clusters=None):
+	'''Find a path between two cells, optionally using a :class:`ClusterGraph` first
+
+	The hierarchical search can miss a path when a cluster is split into
+	unconnected parts, in which case the full grid is searched.
+	'''
+	if clusters:
+		corridor = clusters.corridor(start, goal)
+		if corridor is None:
+			return None
+
+		width = grid.width
+		size = clusters.cluster_size
+		cluster_width = clusters.width
+
+		def allowed(index):
+			return ((index // width) // size) * cluster_width + (index % width) // size in corridor
+
+		path = astar(grid, start, goal, allowed)
+		if path:
+			return path
+
+	return astar(grid, start, goal)
+
+
+class PathRequest:
+	'''A path search handed out by :class:`PathQueue`'''
+	__slots__ = ["start", "goal", "path", "done"]
+
+	def __init__(self, start, goal):
+		#: The start cell
+		self.start = start
+		#: The goal cell
+		self.goal = goal
+		#: A list of cells, or None if there is no path (only valid when done)
+		self.path = None
+		#: True once the search has finished
+		self.done = False
+
+
+class PathQueue:
+	'''
+	Services path requests on worker threads and caches the results.
+
+	Requests never block: :meth:`request` returns a :class:`PathRequest` that is
+	filled in by :meth:`update` on a later tick once a worker has finished.
+	Results are cached by (start cell, goal cell) and the cache is dropped
+	when the grid's version changes.
+	'''
+
+	def __init__(self, grid, workers=2, budget=1.0, hierarchical=False, cluster_size=8, cache_size=512):
+		'''
+		:param grid: The :class:`.NavGrid` to search
+		:param workers: The number of worker threads
+		:param budget: Milliseconds per update that may be spent handing out results, or None for no limit
+		:param hierarchical: Restrict searches to a corridor found on a :class:`ClusterGraph`
+		:param cluster_size: The width in cells of a cluster for hierarchical searches
+		:param cache_size: The maximum number of cached paths
+		'''
+		self.grid = grid
+		self.budget = budget
+		self.hierarchical = hierarchical
+		self.cluster_size = cluster_size
+		self.cache_size = cache_size
+
+		self._executor = ThreadPoolExecutor(max_workers=workers)
+		self._cache = collections.OrderedDict()
+		self._pending = {}
+		self._version = grid.version
+		self._clusters = None
+
+	def _check_version(self):
+		if self._version != self.grid.version:
+			self.invalidate()
+
+	def invalidate(self):
+		'''Forget all cached paths (in flight searches are not cached)'''
+		self._cache.clear()
+		self._clusters = None
+		self._version = self.grid.version
+
+	def request(self, start_position, goal_position):
+		'''Ask for a path between two world positions
+
+		:rtype: A :class:`PathRequest`, already done if the path was cached or a position is off the grid
+		'''
+		self._check_version()
+
+		start = self.grid.cell(start_position)
+		goal = self.grid.cell(goal_position)
+		request = PathRequest(start, goal)
+
+		if start is None or goal is None:
+			request.done = True
+			return request
+
+		key = (start, goal)
+		if key in self._cache:
+			self._cache.move_to_end(key)
+			request.path = self._cache[key]
+			request.done = True
+			return request
+
+		pending = self._pending.get(key)
+		if pending:
+			pending[1].append(request)
+			return request
+
+		clusters = None
+		if self.hierarchical:
+			if not self._clusters:
+				self._clusters = ClusterGraph(self.grid, self.cluster_size)
+			clusters = self._clusters
+
+		future = self._executor.submit(find_path, self.grid, start, goal, clusters)
+		self._pending[key] = (future, [request], self._version)
+		return request
+
+	def update(self):
+		'''Hand out finished searches, within the budget'''
+		self._check_version()
+
+		deadline = time.perf_counter() + self.budget / 1000 if self.budget is not None else None
+
+		for key, (future, requests, version) in list(self._pending.items()):
+			if not future.done():
+				continue
+
+			if deadline is not None and time.perf_counter() > deadline:
+				break
+
+			del self._pending[key]
+			try:
+				path = future.result()
+			except Exception:
+				import traceback
+				traceback.print_exc()
+				path = None
+
+			if version == self._version:
+				self._cache[key] = path
+				if len(self._cache) > self.cache_size:
+					self._cache.popitem(last=False)
+
+			for request in requests:
+				request.path = path
+				request.done = True
+
+	def shutdown(self):
+		'''Stop the worker threads'''
+		self._executor.shutdown(wait=False)
@@ -0,0 +1,169 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import collections
+
+
+class PerceptionState:
+	'''What an agent currently perceives of its target, kept up to date by :class:`Perception`'''
+	__slots__ = ["can_see", "can_hear", "last_seen", "last_known_position"]
+
+	def __init__(self):
+		#: True if the target is in the sight cone with a clear line of sight
+		self.can_see = False
+		#: True if the target is within hearing range
+		self.can_hear = False
+		#: The agent time the target was last seen or heard
+		self.last_seen = float("-inf")
+		#: Where the target was when last seen or heard, or None
+		self.last_known_position = None
+
+
+class PerceptionStats:
+	'''Counts of what :class:`Perception` did in the last frame'''
+	__slots__ = ["raycasts", "cached", "queued"]
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self):
+		#: Line of sight raycasts cast this frame
+		self.raycasts = 0
+		#: Sight checks answered from the cache
+		self.cached = 0
+		#: Raycasts still waiting for a later frame
+		self.queued = 0
+
+	def __repr__(self):
+		return "<PerceptionStats raycasts=%d cached=%d queued=%d>" %\
+			(self.raycasts, self.cached, self.queued)
+
+
+class Perception:
+	'''
+	Updates the :class:`PerceptionState` of agents from sight cones, hearing
+	and line of sight, for a :class:`.Manager`.
+
+	The cone and hearing tests are cheap and run every frame for every agent
+	with a target and a ``perception`` attribute that decides that frame, the
+	:class:`.Manager` leaves out agents its :class:`.Scheduler` skips. The line of sight raycast is
+	only cast for targets inside the cone, its result is cached per
+	(agent, target) pair for ``ttl`` seconds, and at most ``raycasts`` are
+	cast per frame; the rest wait in a queue, oldest first, keeping their
+	previous result meanwhile.
+
+	Agents configure their senses with ``sight_range``, ``sight_angle`` (half
+	the cone's angle in radians) and ``hearing_radius``. Targets can scale
+	the hearing radius with a ``noise`` attribute.
+	'''
+
+	def __init__(self, raycasts=8, ttl=0.25):
+		'''
+		:param raycasts: The maximum number of line of sight raycasts per frame
+		:param ttl: Seconds a line of sight result is reused before casting again
+		'''
+		self.raycasts = raycasts
+		self.ttl = ttl
+
+		self.time = 0.0
+		self.stats = PerceptionStats()
+
+		# (agent, target) -> [clear, time checked]
+		self._cache = {}
+		self._queue = collections.deque()
+		self._queued = set()
+		self._last_prune = 0.0
+
+	def line_of_sight(self, agent, target):
+		'''Cast a ray from the agent to the target, True if nothing else is in the way'''
+		hit = agent.object.rayCast(target.position, agent.position, 0.0)[0]
+		return hit is None or hit is target.object
+
+	def _request(self, agent, target):
+		key = (agent, target)
+		entry = self._cache.get(key)
+		if entry and self.time - entry[1] < self.ttl:
+			self.stats.cached += 1
+			return entry[0]
+
+		if key not in self._queued:
+			self._queued.add(key)
+			self._queue.append(key)
+
+		# Until the raycast comes up, the last result (if any) stands
+		return entry[0] if entry else False
+
+	def _cast(self):
+		queue = self._queue
+		cache = self._cache
+		stats = self.stats
+
+		while queue and stats.raycasts < self.raycasts:
+			key = queue.popleft()
+			self._queued.discard(key)
+
+			agent, target = key
+			if not agent.valid or not target.valid:
+				cache.pop(key, None)
+				continue
+
+			cache[key] = [self.line_of_sight(agent, target), self.time]
+			stats.raycasts += 1
+
+	def _prune(self):
+		# Forget pairs that have not been checked in a while
+		oldest = self.time - self.ttl * 4
+		for key in [key for key, entry in self._cache.items() if entry[1] < oldest]:
+			del self._cache[key]
+		self._last_prune = self.time
+
+	def update(self, agents, dt):
+		'''Update the perception of the agents, called once per frame by the :class:`.Manager`
+
+		:param agents: The agents due for a decision this frame
+		'''
+		self.time += dt
+		self.stats.reset()
+
+		# Cast the queued rays first, so results requested last frame are
+		# used this frame
+		self._cast()
+
+		for agent in agents:
+			state = getattr(agent, "perception", None)
+			target = agent.target
+			if state is None:
+				continue
+
+			if not target:
+				state.can_see = state.can_hear = False
+				continue
+
+			blackboard = agent.blackboard
+			distance = blackboard["target_range"]
+
+			state.can_hear = distance <= agent.hearing_radius * getattr(target, "noise", 1.0)
+			state.can_see = distance <= agent.sight_range\
+				and abs(blackboard["target_bearing"]) <= agent.sight_angle\
+				and self._request(agent, target)
+
+			if state.can_see or state.can_hear:
+				state.last_seen = agent.time
+				state.last_known_position = tuple(target.position)
+
+		# Including the requests made this frame
+		self.stats.queued = len(self._queue)
+
+		if self.time - self._last_prune > 1.0:
+			self._prune()
@@ -0,0 +1,154 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import time
+
+from .agent import update_actions
+
+
+class SchedulerStats:
+	'''Counts of what the :class:`Scheduler` did with the agents in the last frame'''
+	__slots__ = ["updated", "deferred", "skipped"]
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self):
+		#: Agents that ran their decision strategy
+		self.updated = 0
+		#: Agents that were due but ran out of budget, they run first next frame
+		self.deferred = 0
+		#: Agents that were not due this frame (other bucket or distance LOD)
+		self.skipped = 0
+
+	def __repr__(self):
+		return "<SchedulerStats updated=%d deferred=%d skipped=%d>" %\
+			(self.updated, self.deferred, self.skipped)
+
+
+class Scheduler:
+	'''
+	Spreads decision strategy evaluation for a :class:`.Manager` over frames.
+
+	Agents are split into round-robin buckets by the slot of their
+	:attr:`.Agent.handle`, which doesn't change while they are managed, and
+	only one bucket is due each frame. Agents further from their target than the distances in
+	``lod_distances`` are only due every 2nd, 4th, 8th... time their bucket
+	comes up. Evaluation stops once the frame's budget is used up and the
+	remaining due agents are evaluated first on the next frame.
+
+	Steering is not scheduled, agents keep running their last actions on frames
+	where they are not evaluated.
+	'''
+
+	def __init__(self, buckets=1, budget=None, lod_distances=()):
+		'''
+		:param buckets: The number of frames a full round of evaluations is spread over
+		:param budget: Milliseconds of decision evaluation allowed per frame, or None for no limit
+		:param lod_distances: Ascending target ranges at which evaluations get half as frequent
+		'''
+		self.buckets = buckets
+		self.budget = budget
+		self.lod_distances = tuple(lod_distances)
+
+		self.frame = 0
+		self.stats = SchedulerStats()
+
+		#: Called with the due agents and the action table when there is no
+		#: budget, e.g. a :class:`.ParallelEvaluator`
+		self.evaluate = update_actions
+
+		self._deferred = []
+
+	def _lod_interval(self, agent):
+		if not self.lod_distances or "target_range" not in agent.blackboard.sensors:
+			return 1
+
+		distance = agent.blackboard["target_range"]
+		level = 0
+		for i in self.lod_distances:
+			if distance < i:
+				break
+			level += 1
+
+		return 1 << level
+
+	def discard(self, agent):
+		'''Forget an agent deferred to the next frame, e.g. because it was removed'''
+		if agent in self._deferred:
+			self._deferred.remove(agent)
+
+	def due(self, agents):
+		'''Get the agents due for evaluation this frame, deferred agents first
+
+		This starts the frame's :attr:`stats`.
+		'''
+		stats = self.stats
+		stats.reset()
+		buckets = self.buckets
+		bucket = self.frame % buckets
+		cycle = self.frame // buckets
+
+		due = [i for i in self._deferred if i.valid]
+		deferred = set(due)
+		self._deferred = []
+
+		for i, agent in enumerate(agents):
+			if agent in deferred:
+				continue
+
+			# The list index changes when other agents are removed, the slot doesn't
+			handle = agent.handle
+			slot = handle[0] if handle else i
+			if slot % buckets != bucket or cycle % self._lod_interval(agent):
+				stats.skipped += 1
+				continue
+
+			due.append(agent)
+
+		return due
+
+	def run(self, agents, action_table, due=None, evaluate=None):
+		'''Evaluate the decision strategies of the agents due this frame
+
+		:param agents: The valid agents of the manager
+		:param action_table: The action table passed on to :meth:`.Agent.update_actions`
+		:param due: The result of :meth:`due` if it was already called this frame
+		:param evaluate: Used instead of :attr:`evaluate` and the agents' own
+			``update_actions`` if not None, e.g. :meth:`.Instrumentation.update_actions`
+		'''
+		stats = self.stats
+
+		if due is None:
+			due = self.due(agents)
+		self.frame += 1
+
+		if self.budget is None:
+			(evaluate or self.evaluate)(due, action_table)
+			stats.updated = len(due)
+			return
+
+		deadline = time.perf_counter() + self.budget / 1000
+		for i, agent in enumerate(due):
+			# Always make progress, even with a tiny budget
+			if i and time.perf_counter() > deadline:
+				self._deferred = due[i:]
+				stats.deferred = len(self._deferred)
+				break
+
+			if evaluate is None:
+				agent.update_actions(action_table)
+			else:
+				evaluate((agent,), action_table)
+			stats.updated += 1
@@ -0,0 +1,156 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import heapq
+import math
+
+
+class SpatialHash:
+	'''
+	A uniform grid of items hashed by their position on the XY plane.
+
+	Queries only visit the cells overlapping the search area, so neighbour
+	lookups cost roughly the number of nearby items instead of the number of
+	items in the grid. Distances are measured in 3D.
+	'''
+
+	def __init__(self, cell_size=4.0):
+		'''
+		:param cell_size: The width of a cell, queries are cheapest with a radius close to this
+		'''
+		self.cell_size = cell_size
+		self._cells = {}
+
+	def __len__(self):
+		return sum(len(i) for i in self._cells.values())
+
+	def _cell(self, x, y):
+		size = self.cell_size
+		return (int(math.floor(x / size)), int(math.floor(y / size)))
+
+	def clear(self):
+		'''Remove all items'''
+		self._cells.clear()
+
+	def insert(self, item, position):
+		'''Add an item at a position'''
+		x, y, z = position[0], position[1], position[2]
+		cell = self._cell(x, y)
+
+		entries = self._cells.get(cell)
+		if entries is None:
+			self._cells[cell] = [(item, x, y, z)]
+		else:
+			entries.append((item, x, y, z))
+
+	def rebuild(self, items):
+		'''Clear the grid and insert every item with a position attribute that is not None'''
+		self._cells.clear()
+		for item in items:
+			position = item.position
+			if position is not None:
+				self.insert(item, position)
+
+	def query_radius(self, position, radius, exclude=None):
+		'''Find the items within radius of a position
+
+		:param exclude: An item to leave out of the results (usually the one asking)
+		:rtype: A list of (item, distance) tuples in no particular order
+		'''
+		px, py, pz = position[0], position[1], position[2]
+		min_x, min_y = self._cell(px - radius, py - radius)
+		max_x, max_y = self._cell(px + radius, py + radius)
+
+		cells = self._cells
+		radius_squared = radius * radius
+		results = []
+
+		for cx in range(min_x, max_x + 1):
+			for cy in range(min_y, max_y + 1):
+				entries = cells.get((cx, cy))
+				if not entries:
+					continue
+
+				for item, x, y, z in entries:
+					if item is exclude:
+						continue
+
+					dx = x - px
+					dy = y - py
+					dz = z - pz
+					distance_squared = dx * dx + dy * dy + dz * dz
+					if distance_squared <= radius_squared:
+						results.append((item, math.sqrt(distance_squared)))
+
+		return results
+
+	def k_nearest(self, position, k, max_radius=None, exclude=None):
+		'''Find the k items closest to a position
+
+		:param max_radius: Ignore items further away than this
+		:param exclude: An item to leave out of the results (usually the one asking)
+		:rtype: A list of up to k (item, distance) tuples, closest first
+		'''
+		if k <= 0 or not self._cells:
+			return []
+
+		px, py, pz = position[0], position[1], position[2]
+		center_x, center_y = self._cell(px, py)
+		size = self.cell_size
+		cells = self._cells
+
+		if max_radius is None:
+			# Far enough to cover every occupied cell
+			ring_limit = max(max(abs(cx - center_x), abs(cy - center_y)) for cx, cy in cells)
+		else:
+			ring_limit = int(math.ceil(max_radius / size))
+
+		# Max-heap of the best k found so far, as (-distance_squared, counter, item)
+		best = []
+		counter = 0
+
+		for ring in range(ring_limit + 1):
+			# Everything in this ring is at least (ring - 1) cells away
+			if len(best) == k and ((ring - 1) * size) ** 2 > -best[0][0]:
+				break
+
+			for cx in range(center_x - ring, center_x + ring + 1):
+				for cy in range(center_y - ring, center_y + ring + 1):
+					if ring and abs(cx - center_x) != ring and abs(cy - center_y) != ring:
+						continue
+
+					entries = cells.get((cx, cy))
+					if not entries:
+						continue
+
+					for item, x, y, z in entries:
+						if item is exclude:
+							continue
+
+						dx = x - px
+						dy = y - py
+						dz = z - pz
+						distance_squared = dx * dx + dy * dy + dz * dz
+
+						if max_radius is not None and distance_squared > max_radius * max_radius:
+							continue
+
+						counter += 1
+						if len(best) < k:
+							heapq.heappush(best, (-distance_squared, counter, item))
+						elif distance_squared < -best[0][0]:
+							heapq.heapreplace(best, (-distance_squared, counter, item))
+
+		best.sort(reverse=True)
+		return [(item, math.sqrt(-distance_squared)) for distance_squared, counter, item in best]
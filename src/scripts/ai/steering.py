@@ -0,0 +1,102 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+class SteeringOutput:
+	'''
+	A preallocated accumulator for the steering requested by an agent's actions.
+
+	Actions add linear and angular contributions with a weight and a priority
+	instead of returning new objects. :meth:`resolve` blends the contributions
+	of each priority group by weight and picks the highest priority group that
+	asks for more than :attr:`EPSILON` of steering, falling back to lower
+	priorities when a group has nothing to say (e.g. separation with no
+	neighbours). With every contribution at weight 1 and priority 0 this is
+	the plain average actions used to get.
+
+	Group storage is created the first time a priority is used and reused
+	afterwards, so a steady state tick does not allocate.
+	'''
+	__slots__ = ["linear", "angular", "_groups", "_priorities"]
+
+	EPSILON = 1e-8
+
+	def __init__(self):
+		#: The resolved linear steering, updated in place by :meth:`resolve`
+		self.linear = [0.0, 0.0, 0.0]
+		#: The resolved angular steering
+		self.angular = 0.0
+
+		# priority -> [x, y, z, linear weight, angular, angular weight]
+		self._groups = {}
+		# Known priorities, highest first
+		self._priorities = []
+
+	def _group(self, priority):
+		group = self._groups.get(priority)
+		if group is None:
+			group = self._groups[priority] = [0.0] * 6
+			self._priorities.append(priority)
+			self._priorities.sort(reverse=True)
+		return group
+
+	def reset(self):
+		'''Clear all contributions'''
+		for group in self._groups.values():
+			group[0] = group[1] = group[2] = group[3] = group[4] = group[5] = 0.0
+
+	def add_linear(self, x, y, z, weight=1.0, priority=0):
+		'''Add a linear acceleration request'''
+		group = self._group(priority)
+		group[0] += x * weight
+		group[1] += y * weight
+		group[2] += z * weight
+		group[3] += weight
+
+	def add_angular(self, angular, weight=1.0, priority=0):
+		'''Add an angular acceleration request'''
+		group = self._group(priority)
+		group[4] += angular * weight
+		group[5] += weight
+
+	def add_output(self, output):
+		'''Add an object with linear and angular attributes, as actions used to return'''
+		if output.linear:
+			linear = output.linear
+			self.add_linear(linear[0], linear[1], linear[2])
+		if output.angular:
+			self.add_angular(output.angular)
+
+	def resolve(self):
+		'''Blend and arbitrate the contributions into :attr:`linear` and :attr:`angular`'''
+		linear = self.linear
+		linear[0] = linear[1] = linear[2] = 0.0
+		self.angular = 0.0
+
+		groups = self._groups
+		for priority in self._priorities:
+			x, y, z, lweight, angular, aweight = groups[priority]
+
+			if lweight:
+				x /= lweight
+				y /= lweight
+				z /= lweight
+			if aweight:
+				angular /= aweight
+
+			if x * x + y * y + z * z > self.EPSILON or angular * angular > self.EPSILON:
+				linear[0] = x
+				linear[1] = y
+				linear[2] = z
+				self.angular = angular
+				return
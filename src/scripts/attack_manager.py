@@ -18,6 +18,7 @@ import time
 from bge import types, logic
 from mathutils import Vector
 from .framework.animations import AnimationState
+from .framework.pool import pool
 
 class AttackSensor(types.KX_GameObject):
 	"""Sensor object that detects collisions for  :class:`.MeleeAttackManager`"""
@@ -142,6 +143,13 @@ class MeleeAttackManager:
 
 		self.combo = (self.combo + 1) % self.max_combo
 
+	def reset(self):
+		"""Stop any attack in progress and start over at the first attack of the combo"""
+		self._stop_attacks()
+		self._attack_time = time.time()
+		self.combo = 0
+		self.anim_state = None
+
 	def _stop_attacks(self):
 		if self._attacking:
 			for i in self._attack_sensors:
@@ -155,32 +163,63 @@ class MeleeAttackManager:
 class ProjectileSensor(types.KX_GameObject):
 	"""Sensor object that detects collisions for  :class:`.RangeAttackManager`"""
 
-	def __init__(self, start_position, projectile, direction, speed, damage, character):
+	REFERENCE_RATE = 60  #: The tick rate (per second) speeds are expressed in
+
+	def __init__(self, gameobj):
 		"""
-		:param start_position: The world position where this sensor is spawned
-		:param projectile: The name of the KX_GameObject to use as a projectile (a replica will be added to the scene)
-		:param direction: A direction vector the projectile will travel along
-		:param speed: How fast the projectile will travel along its direction vector
-		:param damage: How much damage the projectile will cause upon impact
-		:param character: Ignore this character when doing collision checks
+		:param gameobj: The KX_GameObject to mutate (passed on to __new__)
+
+		.. note::
+		   Sensors are recycled by the :data:`.pool`, use :meth:`spawn` to fire one.
 		"""
 		self.start_position = self.worldPosition.copy()
-		self.direction = direction.normalized()
-		self.speed = speed
-		self.damage = damage
-		self._character = character
+		self.direction = Vector((0, 1, 0))
+		self.speed = 0
+		self.damage = 0
+		self._character = None
 
 		self.collisionCallbacks.append(self._collision)
 
 		self.collisions = set()
 
-	def __new__(cls, start_position, projectile, direction, *args):
-		adder = logic.getCurrentController().owner
-		scene = logic.getCurrentScene()
+	def __new__(cls, gameobj, *args):
+		return super().__new__(cls, gameobj)
+
+	def __del__(self):
+		self.collisionCallbacks.remove(self.collision)
 
-		obj = scene.addObject(projectile, adder)
+	@classmethod
+	def _register(cls, projectile):
+		pool.register(projectile, wrap=cls, reset=cls.launch, release=cls.disarm)
 
-		obj.worldPosition = start_position
+	@classmethod
+	def prefill(cls, projectile, count):
+		"""Add projectiles to the scene ahead of firing them
+
+		:param projectile: The name of the KX_GameObject to use as a projectile
+		:param count: How many projectiles to have ready
+		"""
+		cls._register(projectile)
+		pool.prefill(projectile, count)
+
+	@classmethod
+	def spawn(cls, start_position, projectile, direction, speed, damage, character):
+		"""Fires a projectile, reusing a released one if there is one
+
+		:param start_position: The world position where this sensor is spawned
+		:param projectile: The name of the KX_GameObject to use as a projectile (a replica will be added to the scene)
+		:param direction: A direction vector the projectile will travel along
+		:param speed: How fast the projectile will travel along its direction vector
+		:param damage: How much damage the projectile will cause upon impact
+		:param character: Ignore this character when doing collision checks
+		:rtype: The :class:`ProjectileSensor`
+		"""
+		cls._register(projectile)
+		return pool.acquire(projectile, None, start_position, direction, speed, damage, character)
+
+	def launch(self, start_position, direction, speed, damage, character):
+		"""Reset hook of the :data:`.pool`, see :meth:`spawn` for the parameters"""
+		self.worldPosition = start_position
 
 		x = direction.cross(Vector((0, 0, 1)))
 		x.normalize()
@@ -196,24 +235,33 @@ class ProjectileSensor(types.KX_GameObject):
 				(x[2], y[2], z[2])
 			)
 
-		obj.worldOrientation = ori
-		return super().__new__(cls, obj)
+		self.worldOrientation = ori
 
-	def __del__(self):
-		self.collisionCallbacks.remove(self.collision)
+		self.start_position = self.worldPosition.copy()
+		self.direction = direction.normalized()
+		self.speed = speed
+		self.damage = damage
+		self._character = character
 
-	def update(self):
-		"""Update method which should be called every frame to update this sensor"""
-		# Move along the given direction vector with the given speed
-		vec = self.direction * self.speed
+		self.collisions.clear()
 
-		# Scale the speed so FPS changes don't mess with movement
-		fps = logic.getAverageFrameRate()
-		fps_scale = 60 / fps if fps != 0 else 60
+	def disarm(self):
+		"""Release hook of the :data:`.pool`, parked projectiles don't deal damage"""
+		self._character = None
+		self.damage = 0
 
-		self.worldPosition += vec * fps_scale
+	def update(self, dt):
+		"""Update method which should be called every tick to update this sensor
+
+		:param dt: The duration of the tick in seconds
+		"""
+		# Move along the given direction vector with the given speed
+		self.worldPosition += self.direction * (self.speed * dt * self.REFERENCE_RATE)
 
 	def _collision(self, other):
+		if self._character is None:
+			return
+
 		if other != self._character and hasattr(other, "hp") and other not in self.collisions:
 			other.hp -= self.damage
 			self.collisions.add(other)
@@ -242,19 +290,31 @@ class RangeAttackManager:
 		self.projectiles = []
 		self._cooldown_timer = time.time()
 
-	def update(self):
-		"""Update method which should be called every frame to update this manager"""
+		# Have enough projectiles ready to keep firing at the cooldown until the first one is out of range
+		lifetime = distance / speed / ProjectileSensor.REFERENCE_RATE
+		ProjectileSensor.prefill(projectile, int(lifetime / cooldown) + 1 if cooldown > 0 else 1)
+
+	def reset(self):
+		"""Return any airborne projectiles to the pool"""
+		for i in self.projectiles:
+			pool.release(i)
+		self.projectiles.clear()
+
+	def update(self, dt):
+		"""Update method which should be called every tick to update this manager
+
+		:param dt: The duration of the tick in seconds
+		"""
 
 		if self._obj.is_dead and self.projectiles:
 			# Just kill any airborne projectiles
-			for i in self.projectiles:
-				i.endObject()
+			self.reset()
 		else:
 			for i in self.projectiles[:]:
-				i.update()
+				i.update(dt)
 				if (i.worldPosition - i.start_position).length_squared > self.distance:
 					self.projectiles.remove(i)
-					i.endObject()
+					pool.release(i)
 
 
 	def attack(self, start_position, direction):
@@ -267,7 +327,7 @@ class RangeAttackManager:
 		if self._cooldown_timer > time.time() or self._obj.is_dead:
 			return
 
-		self.projectiles.append(ProjectileSensor(start_position, self.projectile, direction, self.speed, self.damage, self._obj))
+		self.projectiles.append(ProjectileSensor.spawn(start_position, self.projectile, direction, self.speed, self.damage, self._obj))
 
 		self._cooldown_timer = time.time() + self.cooldown
 
@@ -14,19 +14,18 @@
 
 
 from .framework.character import Character
+from .framework.pool import pool
 from .attack_manager import AttackSensor, MeleeAttackManager, MouseRangeAttackManager
 
-from bge import logic
-
 
 class Enemy(Character):
 	"""A character sublcass to handle generic enemy logic."""
 	DROP = None  #: The name of the item to drop (note, this must be in an inactive layer)
 
 	def handle_drop(self):
-		"""Spawn an instance of :attr:`Enemy.DROP` if it is set"""
+		"""Spawn an instance of :attr:`Enemy.DROP` if it is set, release it to the pool once it is picked up"""
 		if self.DROP:
-			return logic.getCurrentScene().addObject(self.DROP, self)
+			return pool.acquire(self.DROP, self)
 
 
 class Meatsack(Enemy):
@@ -52,10 +51,20 @@ class Meatsack(Enemy):
 		attack_sensors = [AttackSensor(i, self) for i in self.childrenRecursive if i.name.startswith('AttackSensor')]
 		self.attack_manager = MeleeAttackManager(self, attack_sensors, self.MELEE_ATTACK, 5)
 
-	def update(self):
+	def reset(self):
+		"""See :func:`.Character.reset`"""
+		super().reset()
+		self.attack_manager.reset()
+
+	def stop(self):
+		"""See :func:`.Character.stop`"""
+		super().stop()
+		self.attack_manager.reset()
+
+	def update(self, dt):
 		"""See :func:`.Character.update`"""
 		self.attack_manager.update()
-		super().update()
+		super().update(dt)
 
 	def attack(self):
 		"""Makes the character perform a melee attack"""
@@ -75,15 +84,28 @@ class Werewolf(Enemy):
 	DROP = "CollectableDrop"
 
 
+def find_spawns(objects):
+	"""Finds the enemy spawn objects
+
+	:param objects: The list of objects to search
+	:rtype: A list of (spawn object, enemy class) tuples
+	"""
+	return [(i, globals()[i.name.lower().replace("spawn", "").title()]) for i in objects if "spawn" in i.name.lower()]
+
+
 def spawn_baddies(objects, baddies_list):
 	"""Spawns enemies at spawn objects
 
 	:param objects: The list of spawn objects
 	:param baddies_list: The list to store the spawned enemies
 	"""
-	for i in [i for i in objects if "spawn" in i.name.lower()]:
-		cls = i.name.lower().replace("spawn", "").title()
-		baddies_list.append(globals()[cls].spawn(i.worldPosition, i.worldOrientation))
+	spawns = find_spawns(objects)
+
+	# Load each kind of enemy once, not once per spawn
+	Character.preload({cls for i, cls in spawns})
+
+	for i, cls in spawns:
+		baddies_list.append(cls.spawn(i.worldPosition, i.worldOrientation))
 
 
 class UllurCharacter(Character):
@@ -115,11 +137,17 @@ class UllurCharacter(Character):
 		self.right_attack_manager = MouseRangeAttackManager(self, "Projectile", 1, 100, 10, 0.5)
 		self.collectables = []
 
-	def update(self):
+	def stop(self):
+		"""See :func:`Character.stop`"""
+		super().stop()
+		self.left_attack_manager.reset()
+		self.right_attack_manager.reset()
+
+	def update(self, dt):
 		"""See :func:`Character.update`"""
 		self.left_attack_manager.update()
-		self.right_attack_manager.update()
-		super().update()
+		self.right_attack_manager.update(dt)
+		super().update(dt)
 
 	def attack(self, mode):
 		"""Makes the character attack
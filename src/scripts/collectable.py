@@ -16,6 +16,7 @@ from bge import types
 
 
 from .character import UllurCharacter
+from .framework.pool import pool
 
 
 class Collectable:
@@ -34,13 +35,14 @@ class CollectableSpeed(Collectable):
 class CollectableSensor(types.KX_GameObject):
 	"""Sensor that detects collisions for :class:`.Collectable` objects"""
 
-	def __init__(self, gameobj, collectable_list):
+	def __init__(self, gameobj, entities):
 		"""
 		:param gameobj: The KX_GameObject to mutate (passed on to __new__)
-		:param collectable_list: The list this sensor should be stored in
+		:param entities: The :class:`.EntityRegistry` this sensor is stored in
 		"""
 		self.collisionCallbacks.append(self._collision)
-		self.collectable_list = collectable_list
+		self.entities = entities
+		entities.add(self, CollectableSensor)
 
 		if self.name.startswith('CollectableSpeed'):
 			self.collectable = CollectableSpeed
@@ -52,19 +54,33 @@ class CollectableSensor(types.KX_GameObject):
 		return super().__new__(cls, gameobj)
 
 	def _collision(self, other):
+		# Collected, or parked in the pool
+		if not self.entities.alive(self):
+			return
+
 		if isinstance(other, UllurCharacter):
 			other.add_collectable(self.collectable(other))
-			self.collectable_list.remove(self)
+			self.entities.destroy(self, self._remove)
 
-			self.endObject()
+	@staticmethod
+	def _remove(sensor):
+		# Dropped collectables go back to the pool with their group
+		if "_pool" in sensor.groupObject:
+			pool.release(sensor.groupObject)
+		else:
+			sensor.endObject()
 
 
-def mutate_collectables(objects, collectable_list):
+def mutate_collectables(objects, entities):
 	"""Mutates a list of KX_GameObjects into :class:`.CollectableSensor`
 
 	:param objects: The list of objects to mutate
-	:param collectable_list: The list to store the mutated collectables
+	:param entities: The :class:`.EntityRegistry` to store the mutated collectables in, under :class:`.CollectableSensor`
 	"""
 	for i in [i for i in objects if i.name.startswith('Collectable')]:
-		if i.groupObject:
-			collectable_list.append(CollectableSensor(i, collectable_list))
+		if isinstance(i, CollectableSensor):
+			# A pooled drop handed out again
+			i.entities = entities
+			entities.add(i, CollectableSensor)
+		elif i.groupObject:
+			CollectableSensor(i, entities)
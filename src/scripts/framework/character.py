@@ -17,6 +17,8 @@ import math
 from bge import logic, constraints, types
 from mathutils import Vector
 from .animations import AnimationManager, AnimationState
+from .libraries import libraries
+from .pool import pool
 from . import utils
 
 
@@ -31,6 +33,8 @@ class Character(types.KX_GameObject):
 	DECELERATION = ACCELERATION * 10  #: How much to deccelerate the character while not moving
 	FRICTION = ACCELERATION  #: Amount of friction applied to the character while moving and stopping
 
+	REFERENCE_RATE = 60  #: The tick rate (per second) speeds and accelerations are expressed in
+
 	RUN_MULTIPLIER = 2.0  #: How many times faster the character (and their move animations) are while running
 
 	GRAVITY = 9.8 * 5  #: Starting gravity value for the Bullet character controller
@@ -80,26 +84,32 @@ class Character(types.KX_GameObject):
 		"""
 		types.KX_GameObject.__init__(obj)
 
-		self._speed_h = Vector.Fill(2)
-		self._flags = set()
-
 		self._library = ""
 
-		self.hp = self.MAX_HP
-
 		l = [i for i in self.childrenRecursive if isinstance(i, types.BL_ArmatureObject)]
 		if l:
 			self._armature = l[0]
 		else:
 			self._armature = None
 
-		# Don't play animations if this is true
-		self.animation_lock = False
-
 		# Enable double jump
 		self._phy_char = constraints.getCharacter(self)
 		self._phy_char.maxJumps = 2
 
+		# The rest of the state is set by reset(), which the pool calls
+		# every time the instance is handed out, the first time included
+
+	def reset(self):
+		"""Restore the character to how it was spawned, called every time a pooled instance is handed out"""
+		self._speed_h = Vector.Fill(2)
+		self._flags = set()
+
+		self.hp = self.MAX_HP
+		self._apply_movement(Vector((0, 0, 0)))
+
+		# Don't play animations if this is true
+		self.animation_lock = False
+
 		self.gravity = self.GRAVITY
 
 		self.running = False
@@ -130,40 +140,67 @@ class Character(types.KX_GameObject):
 		"""The object to use for playing animations"""
 		return self._armature if self._armature else self
 
+	@classmethod
+	def library_path(cls):
+		"""The path of the blendfile holding the character's :attr:`MESH`"""
+		if not cls.MESH:
+			raise AttributeError(cls.__name__ + " does not define a usable MESH attribute.")
+
+		return utils.get_path('characters', cls.MESH+'.blend')
+
+	@staticmethod
+	def preload(classes, background=False):
+		"""Load the blendfiles of character classes ahead of spawning them
+
+		:param classes: The character classes, each distinct :attr:`MESH` is loaded once
+		:param background: Load asynchronously (see :meth:`.LibraryRegistry.preload`)
+		:rtype: The paths of the blendfiles
+		"""
+		paths = {cls.library_path() for cls in classes}
+		libraries.preload(paths, background)
+		return paths
+
 	@classmethod
 	def spawn(cls, position=None, orientation=None):
-		"""Spawns an instance of the character
+		"""Spawns an instance of the character, reusing one released by :meth:`despawn` if there is one
 
 		:param position: The world position of the new instance
 		:param orientation: The world orientation of the new instance
 		:rtype: The new character instance
 		"""
 
-		if not cls.MESH:
-			raise AttributeError(cls.__name__ + " does not define a usable MESH attribute.")
-
 		name = cls.MESH
 
-		library = utils.get_path('characters', name+'.blend')
-		logic.LibLoad(library, "Scene", load_actions=True)
+		# Instances share the library, it is only loaded by the first one
+		library = cls.library_path()
+		libraries.acquire(library)
 
-		scene = logic.getCurrentScene()
 		adder = logic.getCurrentController().owner
 		if position:
 			adder.worldPosition = position
 		if orientation:
 			adder.worldOrientation = orientation
 
-		obj = scene.addObject(name, adder)
-
-		char = cls(obj)
+		pool.register(name, wrap=cls, reset=cls.reset, release=cls.stop)
+		char = pool.acquire(name, adder)
 		char._library = library
 		return char
 
+	def stop(self):
+		"""Stop everything in progress (movement, attacks), called when the character goes back to the pool"""
+		self._speed_h.zero()
+		self._apply_movement(Vector((0, 0, 0)))
+
+	def despawn(self):
+		"""Removes the character from the scene, keeping it around for the next :meth:`spawn`"""
+		self.free()
+		pool.release(self)
+
 	def free(self):
-		"""Frees the blendfile used for the character"""
+		"""Releases the blendfile used for the character, it is freed once no instance uses it"""
 		if self._library:
-			logic.LibFree(self._library)
+			libraries.release(self._library)
+			self._library = ""
 
 	def rotate(self, rotation):
 		"""Rotate the character about its z axis
@@ -173,8 +210,11 @@ class Character(types.KX_GameObject):
 		if not "DEAD" in self._flags:
 			self.applyRotation(Vector((0, 0, rotation)))
 
-	def update(self):
-		"""Update method which should be called every frame to update this character"""
+	def update(self, dt):
+		"""Update method which should be called every tick to update this character
+
+		:param dt: The duration of the tick in seconds
+		"""
 		if self.hp <= 0:
 			self._flags.add("DEAD")
 			self._apply_movement(Vector((0, 0, 0)))
@@ -188,15 +228,19 @@ class Character(types.KX_GameObject):
 
 		self.animation_manager.update()
 
-	def move(self, direction):
+	def move(self, direction, dt):
 		"""Moves the player horizontally
 
 		:param direction: A direction vector for the movement
+		:param dt: The duration of the tick in seconds
 		"""
 
 		if self.is_dead:
 			return
 
+		# Accelerations are per reference tick
+		step = dt * self.REFERENCE_RATE
+
 		# Determine the direction the player is moving
 		momentum = self._speed_h.copy()
 		momentum.normalize()
@@ -208,9 +252,9 @@ class Character(types.KX_GameObject):
 
 			# Accelerate player if not going fast enough
 			if momentum.length_squared == 0 or momentum.angle(direction) < math.pi:
-				self._speed_h += self.ACCELERATION * direction
+				self._speed_h += self.ACCELERATION * step * direction
 			else:
-				self._speed_h += self.DECELERATION * direction
+				self._speed_h += self.DECELERATION * step * direction
 
 			if not self.airborne:
 				max_speed = self.MAX_SPEED * (self.RUN_MULTIPLIER if self.running else 1.0)
@@ -221,7 +265,7 @@ class Character(types.KX_GameObject):
 			if self._speed_h.length_squared > max_speed ** 2:
 				self._speed_h = max_speed * direction
 		else:  # Friction
-			friction = min(self._speed_h.length, self.FRICTION) * momentum
+			friction = min(self._speed_h.length, self.FRICTION * step) * momentum
 			self._speed_h = self._speed_h - friction
 
 		movement = self._speed_h.to_3d()
@@ -261,8 +305,5 @@ class Character(types.KX_GameObject):
 	def _apply_movement(self, vec):
 		"""Applies a movement vector to the in game player object"""
 
-		# Scale the speed so FPS changes don't mess with movement
-		fps = logic.getAverageFrameRate()
-		fps_scale = 60 / fps if fps != 0 else 60
-
-		self._phy_char.walkDirection = vec * fps_scale
+		# The walk direction is applied every physics step, scale it so speeds stay per reference tick
+		self._phy_char.walkDirection = vec * (self.REFERENCE_RATE / logic.getPhysicsTicRate())
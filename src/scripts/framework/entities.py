@@ -0,0 +1,118 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+class EntityRegistry:
+	"""
+	Tracks the live entities of a state (enemies, collectables, ...) by kind.
+
+	Each kind (usually a class, such as Enemy) has its own dense list, so
+	adding and removing are O(1) (removal swaps the last entity into the
+	hole) and :meth:`each` walks the list without copying it. Entities are
+	destroyed with :meth:`destroy` from anywhere, including collision
+	callbacks and loops over the registry. They are skipped from then on and
+	actually removed by :meth:`flush` at the end of the frame.
+	"""
+
+	def __init__(self):
+		# kind -> dense list of entities
+		self._storage = {}
+		# kind -> {entity: index in the dense list}
+		self._indices = {}
+		# entity -> finalizer, of entities to remove on flush()
+		self._pending = {}
+
+	def add(self, entity, kind):
+		"""Register an entity, an entity can be registered under several kinds
+
+		:param entity: The entity (usually a KX_GameObject)
+		:param kind: The key to look it up by, see :meth:`each`
+		"""
+		indices = self._indices.setdefault(kind, {})
+		if entity in indices:
+			return
+
+		items = self._storage.setdefault(kind, [])
+		indices[entity] = len(items)
+		items.append(entity)
+
+	def remove(self, entity, kind=None):
+		"""Unregister an entity right away, use :meth:`destroy` while iterating
+
+		:param entity: The entity to remove
+		:param kind: Only remove it from this kind, defaults to every kind
+		"""
+		kinds = [kind] if kind is not None else list(self._indices)
+		for kind in kinds:
+			indices = self._indices.get(kind)
+			if not indices or entity not in indices:
+				continue
+
+			items = self._storage[kind]
+			index = indices.pop(entity)
+			last = items.pop()
+			if last is not entity:
+				items[index] = last
+				indices[last] = index
+
+	def destroy(self, entity, finalizer=None):
+		"""Schedule an entity for removal at the end of the frame
+
+		:param entity: The entity to remove from every kind
+		:param finalizer: Called with the entity once it has been removed (e.g. to end or despawn it)
+		"""
+		if entity not in self._pending:
+			self._pending[entity] = finalizer
+
+	def alive(self, entity):
+		"""True if the entity is registered and not scheduled for destruction"""
+		if entity in self._pending:
+			return False
+		return any(entity in indices for indices in self._indices.values())
+
+	def each(self, kind):
+		"""Iterate over the live entities of a kind without copying
+
+		Entities added while iterating are picked up on the next call,
+		destroyed entities are skipped.
+
+		:param kind: The key the entities were added with
+		"""
+		items = self._storage.get(kind)
+		if not items:
+			return
+
+		pending = self._pending
+		for index in range(len(items)):
+			entity = items[index]
+			if entity not in pending:
+				yield entity
+
+	def count(self, kind):
+		"""The number of live entities of a kind"""
+		items = self._storage.get(kind, ())
+		if not self._pending:
+			return len(items)
+		return sum(1 for entity in items if entity not in self._pending)
+
+	def flush(self):
+		"""Remove destroyed entities and run their finalizers, call this once at the end of the frame"""
+		while self._pending:
+			pending = self._pending
+			self._pending = {}
+
+			for entity, finalizer in pending.items():
+				self.remove(entity)
+				if finalizer:
+					finalizer(entity)
@@ -0,0 +1,127 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+from bge import logic
+
+
+class LibraryRegistry:
+	"""Reference counted LibLoad/LibFree of blendfiles shared by several users, such as every instance of a character"""
+
+	def __init__(self):
+		# path -> [references, True if we loaded it and should free it,
+		#          the KX_LibLoadStatus of a background load or None]
+		self._libraries = {}
+
+		# Paths held by preload()
+		self._preloaded = set()
+
+	def acquire(self, path, background=False):
+		"""Make sure a library is loaded and add a reference to it
+
+		:param path: The path of the blendfile
+		:param background: Load asynchronously instead of blocking until the library is loaded
+		:rtype: The KX_LibLoadStatus of the load if it is still running, otherwise None
+		"""
+		entry = self._libraries.get(path)
+		if entry:
+			entry[0] += 1
+			return self._status(entry)
+
+		# async is a keyword since Python 3.7, so it can't be passed by name
+		options = {"load_actions" : True, "async" : background}
+
+		try:
+			status = logic.LibLoad(path, "Scene", **options)
+			owned = True
+		except ValueError:
+			# Already loaded by something else (e.g. the level), leave it to them
+			status = None
+			owned = False
+
+		entry = self._libraries[path] = [1, owned, status if background else None]
+		return self._status(entry)
+
+	@staticmethod
+	def _status(entry):
+		status = entry[2]
+		if status is not None and status.finished:
+			status = entry[2] = None
+		return status
+
+	def resident(self, path):
+		"""True if a library is acquired and done loading"""
+		entry = self._libraries.get(path)
+		return entry is not None and self._status(entry) is None
+
+	def progress(self, paths):
+		"""The average loading progress of libraries, from 0 to 1
+
+		Libraries that were not acquired count as not loaded.
+		"""
+		paths = list(paths)
+		if not paths:
+			return 1.0
+
+		total = 0.0
+		for path in paths:
+			entry = self._libraries.get(path)
+			if entry is None:
+				continue
+
+			status = self._status(entry)
+			total += status.progress if status is not None else 1.0
+
+		return total / len(paths)
+
+	def release(self, path):
+		"""Drop a reference to a library, freeing it when it was the last one
+
+		:param path: The path of the blendfile
+		"""
+		entry = self._libraries.get(path)
+		if not entry:
+			return
+
+		entry[0] -= 1
+		if entry[0] <= 0:
+			del self._libraries[path]
+			if entry[1]:
+				logic.LibFree(path)
+
+	def references(self, path):
+		"""The number of references to a library"""
+		entry = self._libraries.get(path)
+		return entry[0] if entry else 0
+
+	def preload(self, paths, background=False):
+		"""Load libraries ahead of time, holding a reference until :meth:`release_preloaded`
+
+		:param paths: The paths of the blendfiles
+		:param background: Load asynchronously, use :meth:`resident` or :meth:`progress` to wait for them
+		"""
+		for path in paths:
+			if path not in self._preloaded:
+				self._preloaded.add(path)
+				self.acquire(path, background)
+
+	def release_preloaded(self):
+		"""Drop the references held by :meth:`preload`"""
+		for path in self._preloaded:
+			self.release(path)
+		self._preloaded.clear()
+
+
+#: The registry used by :class:`.Character`
+libraries = LibraryRegistry()
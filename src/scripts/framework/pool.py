@@ -0,0 +1,160 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+from bge import logic
+from mathutils import Vector
+
+
+class ObjectPool:
+	"""
+	Recycles replicas of inactive layer objects instead of adding and ending them.
+
+	Released objects are hidden, have their dynamics suspended and are moved
+	out of the level to :attr:`PARK_POSITION` so they can't collide with
+	anything, and are handed out again by :meth:`acquire`. Each template name
+	can register a ``wrap`` function that runs once per new replica (e.g.
+	mutating it into a KX_GameObject subclass), a ``reset`` hook that runs
+	every time a replica is handed out and a ``release`` hook that runs when
+	it is returned (e.g. to stop attacks in progress).
+	"""
+
+	PARK_POSITION = (0.0, 0.0, -10000.0)  #: Where released objects wait, out of reach of the level
+
+	def __init__(self):
+		# name -> parked replicas
+		self._free = {}
+		# name -> (wrap, reset, release)
+		self._hooks = {}
+
+	def register(self, name, wrap=None, reset=None, release=None):
+		"""Set the hooks of a template
+
+		:param name: The name of the object in an inactive layer
+		:param wrap: Called with a new replica, returns the object to hand out
+		:param reset: Called with the object (and the extra arguments of :meth:`acquire`) every time it is handed out
+		:param release: Called with the object every time it is returned
+		"""
+		self._hooks[name] = (wrap, reset, release)
+
+	def _create(self, name, reference):
+		obj = logic.getCurrentScene().addObject(name, reference)
+		obj["_pool"] = name
+
+		wrap = self._hooks.get(name, (None, None, None))[0]
+		return wrap(obj) if wrap else obj
+
+	@staticmethod
+	def _members(obj):
+		# Group instances bring their members along
+		return obj.groupMembers or ()
+
+	def _move(self, obj, position):
+		# Group members aren't parented to the group object, move them along
+		offset = position - obj.worldPosition
+		obj.worldPosition = position
+
+		for i in self._members(obj):
+			i.worldPosition = i.worldPosition + offset
+
+	def _park(self, obj):
+		for i in (obj,) + tuple(self._members(obj)):
+			i.suspendDynamics()
+			i.setVisible(False, True)
+
+		self._move(obj, Vector(self.PARK_POSITION))
+
+	def _unpark(self, obj, reference):
+		self._move(obj, reference.worldPosition.copy())
+		obj.worldOrientation = reference.worldOrientation
+
+		for i in (obj,) + tuple(self._members(obj)):
+			i.restoreDynamics()
+			i.setVisible(True, True)
+
+	def prefill(self, name, count, reference=None):
+		"""Create replicas ahead of time, so acquiring them later costs no addObject
+
+		:param name: The name of the object in an inactive layer
+		:param count: The number of parked replicas to have ready
+		:param reference: The object to add the replicas at (defaults to the current controller's owner)
+		"""
+		if reference is None:
+			reference = logic.getCurrentController().owner
+
+		free = self._free.setdefault(name, [])
+		for i in range(count - len(free)):
+			obj = self._create(name, reference)
+			self._park(obj)
+			free.append(obj)
+
+	def acquire(self, name, reference=None, *args):
+		"""Get a replica of an object, reusing a released one if there is one
+
+		:param name: The name of the object in an inactive layer
+		:param reference: The object whose position and orientation the replica takes (defaults to the current controller's owner)
+		:param args: Passed on to the reset hook
+		:rtype: The replica, as returned by the wrap hook
+		"""
+		if reference is None:
+			reference = logic.getCurrentController().owner
+
+		obj = None
+		free = self._free.get(name)
+		while free:
+			obj = free.pop()
+			# Replicas die with their scene or library
+			if not obj.invalid:
+				break
+			obj = None
+
+		if obj is None:
+			obj = self._create(name, reference)
+		else:
+			self._unpark(obj, reference)
+
+		reset = self._hooks.get(name, (None, None, None))[1]
+		if reset:
+			reset(obj, *args)
+
+		return obj
+
+	def release(self, obj):
+		"""Return an object to the pool, objects that did not come from a pool are ended
+
+		:param obj: The object returned by :meth:`acquire`
+		"""
+		name = obj.get("_pool")
+		if name is None:
+			obj.endObject()
+			return
+
+		release = self._hooks.get(name, (None, None, None))[2]
+		if release:
+			release(obj)
+
+		self._park(obj)
+		self._free.setdefault(name, []).append(obj)
+
+	def clear(self):
+		"""End all parked replicas"""
+		for free in self._free.values():
+			for obj in free:
+				if not obj.invalid:
+					obj.endObject()
+		self._free.clear()
+
+
+#: The pool used for characters, projectiles and drops
+pool = ObjectPool()
@@ -12,20 +12,97 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import time
+
+
 class StateSystem:
-	"""A system for handling game states"""
+	"""
+	A system for handling game states
 
-	def __init__(self, initial_state):
+	States are simulated at a fixed tick rate, independent of the frame
+	rate: every frame the time since the last frame is added to an
+	accumulator, and the state's ``update(dt)`` runs once per whole tick
+	in it (at most :attr:`max_substeps` times, the rest of a long frame is
+	dropped so a slow frame can't cause ever longer ones). Frame times
+	within :attr:`snap` seconds of a whole number of ticks count as exactly
+	that many, so a frame rate matching the tick rate gets one tick every
+	frame instead of jittering between none and two. A state can also
+	define ``frame(alpha)``, which runs once per rendered frame after the
+	ticks, for input events, cameras and UI. Both may return the class of
+	the next state.
+	"""
+
+	def __init__(self, initial_state, tick_rate=60, max_substeps=5, snap=0.0005):
 		"""
 		:param initial_state: The class of the first state to load
+		:param tick_rate: How many times per second states are updated
+		:param max_substeps: The most updates to run in a single frame
+		:param snap: The timer jitter in seconds to ignore, see above
 		"""
+		self.tick_rate = tick_rate
+		self.max_substeps = max_substeps
+		self.snap = snap
+
+		#: How far into the next tick the frame is (0 to 1), to interpolate rendering between the last two ticks
+		self.alpha = 0.0
+
+		self._accumulator = 0.0
+		self._last_time = time.perf_counter()
+
 		self.state = initial_state()
 
+	@property
+	def tick_rate(self):
+		"""Ticks per second, lower it to run the simulation less often on slow hardware"""
+		return self._tick_rate
+
+	@tick_rate.setter
+	def tick_rate(self, value):
+		self._tick_rate = value
+		self.dt = 1.0 / value
+
+	def _change_state(self, next_state):
+		if hasattr(self.state, "cleanup"):
+			self.state.cleanup()
+		self.state = next_state()
+
+		# Don't make the new state catch up on the time spent loading it
+		self._accumulator = 0.0
+		self._last_time = time.perf_counter()
+
 	def update(self):
 		"""Update method which should be called every frame to update this system and run its states"""
 
-		next_state = self.state.update()
-		if next_state:
-			if hasattr(self.state, "cleanup"):
-				self.state.cleanup()
-			self.state = next_state()
+		now = time.perf_counter()
+		elapsed = now - self._last_time
+		self._last_time = now
+
+		dt = self.dt
+		ticks = round(elapsed / dt)
+		if ticks and abs(elapsed - ticks * dt) < self.snap:
+			elapsed = ticks * dt
+		self._accumulator += elapsed
+
+		update = getattr(self.state, "update", None)
+		substeps = 0
+		while update and self._accumulator >= dt:
+			if substeps == self.max_substeps:
+				# Drop the backlog instead of trying to catch up on it
+				self._accumulator = 0.0
+				break
+
+			self._accumulator -= dt
+			substeps += 1
+
+			next_state = update(dt)
+			if next_state:
+				self._change_state(next_state)
+				return
+
+		self.alpha = self._accumulator / dt
+
+		frame = getattr(self.state, "frame", None)
+		if frame:
+			next_state = frame(self.alpha)
+			if next_state:
+				self._change_state(next_state)
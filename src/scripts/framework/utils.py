@@ -27,6 +27,22 @@ __DEFAULT_CONFIG = {
 	'paths': {
 		'characters': 'characters',
 		'levels': 'levels',
+		'textures': 'textures',
+	},
+	'debug': {
+		# Reload AI definitions when their files change (polls the files)
+		'hot_reload': 'false',
+		'reload_interval': '1.0',
+	},
+	'navigation': {
+		# The heightmap (in the textures path) AI flow fields and paths are
+		# planned on, leave empty to disable navigation
+		'heightmap': 'test_grounds_height.dds',
+		# The world size of a side of the heightmap and the height of white
+		'size': '200.0',
+		'height': '20.0',
+		'cells': '64',
+		'max_slope': '1.0',
 	},
 }
 
@@ -67,4 +83,36 @@ def get_path(type, file):
 	if not __CONFIG:
 		__init_framework_config()
 
-	return os.path.join(__CONFIG.get('paths', type), file)
\ No newline at end of file
+	return os.path.join(__CONFIG.get('paths', type), file)
+
+
+def get_boolean(section, option):
+	"""Get a config option as a bool"""
+	if not __CONFIG:
+		__init_framework_config()
+
+	return __CONFIG.getboolean(section, option)
+
+
+def get_float(section, option):
+	"""Get a config option as a float"""
+	if not __CONFIG:
+		__init_framework_config()
+
+	return __CONFIG.getfloat(section, option)
+
+
+def get_int(section, option):
+	"""Get a config option as an int"""
+	if not __CONFIG:
+		__init_framework_config()
+
+	return __CONFIG.getint(section, option)
+
+
+def get_string(section, option):
+	"""Get a config option as a string"""
+	if not __CONFIG:
+		__init_framework_config()
+
+	return __CONFIG.get(section, option)
@@ -16,51 +16,82 @@ import math
 import sys
 from bge import logic, events, render
 from mathutils import Vector, Euler
-from .character import UllurCharacter, spawn_baddies
+from .character import UllurCharacter, Enemy, find_spawns, spawn_baddies
 from .ai.manager import Manager
 from .ai.agent_bge import AgentBGE
-from .collectable import mutate_collectables
+from .ai.navigation import NavGrid
+from .collectable import CollectableSensor, mutate_collectables
 from .framework import utils
-from .ui import StartupLayout
+from .framework.character import Character
+from .framework.entities import EntityRegistry
+from .framework.libraries import libraries
+from .framework.pool import pool
+from .ui import StartupLayout, LoadingLayout, AIStatsLayout
 
 
 class StartupState:
 	"""Handles displaying the main menu and launching the level"""
 
-	#  The "//../" is to get LibLoad to be happy, we should find a better fix at some point
-	MAIN_LEVEL = "//../"+utils.get_path('levels', 'large_island.blend')
-
 	def __init__(self):
 		logic.ui_system.load_layout(StartupLayout)
 
-	def update(self):
-		"""Called by the :class:`.StateSystem` to run this state"""
+	def frame(self, alpha):
+		"""Called by the :class:`.StateSystem` every frame to handle menu input"""
 
 		ui = logic.ui_system.layout
 
-		# There seems to be some issues with using LibLoad on the level, so we'll
-		# just use logic.startGame() for now.
 		for key, status in logic.keyboard.active_events.items():
 			if key == events.ENTERKEY:
 				if ui.menu.selected == "New Game":
-					logic.startGame(logic.expandPath(self.MAIN_LEVEL))
-
-				#logic.LibLoad(self.MAIN_LEVEL, 'Scene')
-
-				# Remove any non-startup mains, but move the adder
-				#ob = logic.getCurrentController().owner
-				#for i in [i for i in logic.getCurrentScene().objects if i.name.startswith("main")]:
-					#if i != ob:
-						#ob.worldPosition = i.worldPosition
-						#i.endObject()
-
-
-				#return DefaultState
+					return LoadingState
 			elif key == events.DOWNARROWKEY and status == logic.KX_INPUT_JUST_ACTIVATED:
 				ui.menu_down()
 			elif key == events.UPARROWKEY and status == logic.KX_INPUT_JUST_ACTIVATED:
 				ui.menu_up()
 
+class LoadingState:
+	"""Loads the level and every character it uses in the background, then starts the game"""
+
+	MAIN_LEVEL = utils.get_path('levels', 'large_island.blend')
+
+	def __init__(self):
+		logic.ui_system.load_layout(LoadingLayout)
+
+		libraries.acquire(self.MAIN_LEVEL, background=True)
+		self.characters = None
+
+	def _start_characters(self):
+		# Remove any non-startup mains the level brought along, but move the adder
+		ob = logic.getCurrentController().owner
+		for i in [i for i in logic.getCurrentScene().objects if i.name.startswith("main")]:
+			if i != ob:
+				ob.worldPosition = i.worldPosition
+				i.endObject()
+
+		classes = {cls for spawn, cls in find_spawns(logic.getCurrentScene().objects)}
+		classes.add(UllurCharacter)
+		self.characters = Character.preload(classes, background=True)
+
+	def update(self, dt):
+		"""Called by the :class:`.StateSystem` to run this state"""
+		ui = logic.ui_system.layout
+
+		if self.characters is None:
+			if not libraries.resident(self.MAIN_LEVEL):
+				ui.set_progress(libraries.progress([self.MAIN_LEVEL]) * 0.5, "Loading level")
+				return
+
+			# The spawn objects are only known once the level is in
+			self._start_characters()
+
+		if not all(libraries.resident(i) for i in self.characters):
+			ui.set_progress(0.5 + libraries.progress(self.characters) * 0.5, "Loading characters")
+			return
+
+		logic.ui_system.load_layout(None)
+		return DefaultState
+
+
 class DefaultState:
 	"""Ullur's main state"""
 
@@ -74,44 +105,92 @@ class DefaultState:
 		
 		object_list = logic.getCurrentScene().objects
 
-		self.meatsacks = []
-		spawn_baddies(object_list, self.meatsacks)
+		self.entities = EntityRegistry()
 
-		self.ai_system = Manager()
+		meatsacks = []
+		spawn_baddies(object_list, meatsacks)
+		for meatsack in meatsacks:
+			self.entities.add(meatsack, Enemy)
+
+		# Definitions can be hot reloaded to tune behaviour while playing,
+		# enable hot_reload in the [debug] section of engine.ini
+		reload_interval = None
+		if utils.get_boolean('debug', 'hot_reload'):
+			reload_interval = utils.get_float('debug', 'reload_interval')
+		self.ai_system = Manager(reload_interval=reload_interval)
+		self.ai_system.navigation = self.load_navigation()
 		target = AgentBGE(self.character)
-		for meatsack in self.meatsacks:
+		# Pooled characters stay valid objects when they die, so their agents are removed by handle
+		self.agents = {}
+		for meatsack in meatsacks:
 			agent = AgentBGE(meatsack)
 			agent.target = target
-			agent.load_definition("scripts/ai/definitions/state_test.json")
-			self.ai_system._agents.append(agent)
+			agent.load_definition("scripts/ai/definitions/state_test.json", self.ai_system.action_set)
+			self.agents[meatsack] = self.ai_system.add(agent)
+
+		# Every enemy can drop at most once, have their drops ready before the fighting starts
+		drops = {}
+		for meatsack in meatsacks:
+			if meatsack.DROP:
+				drops[meatsack.DROP] = drops.get(meatsack.DROP, 0) + 1
+		for name, count in drops.items():
+			pool.prefill(name, count)
 
-		self.collectables = []
-		mutate_collectables(object_list, self.collectables)
+		mutate_collectables(object_list, self.entities)
+		self.all_collected = False
 
 		logic.mouse.position = (0.5, 0.5)
 
-	def update(self):
-		"""Called by the :class:`.StateSystem` to run this state"""
-		self.character.update()
+	@staticmethod
+	def load_navigation():
+		"""Build the :class:`.NavGrid` configured in the [navigation] section of engine.ini
+
+		:rtype: The grid, or None if navigation is disabled or the heightmap can't be read
+		"""
+		heightmap = utils.get_string('navigation', 'heightmap')
+		if not heightmap:
+			return None
+
+		path = utils.get_path('textures', heightmap)
+		try:
+			return NavGrid.from_heightmap_file(path,
+				utils.get_float('navigation', 'size'),
+				utils.get_float('navigation', 'height'),
+				utils.get_int('navigation', 'cells'),
+				utils.get_float('navigation', 'max_slope'))
+		except (OSError, ValueError) as e:
+			print("Navigation disabled, could not load %s: %s" % (path, e))
+			return None
+
+	def cleanup(self):
+		"""Called by the :class:`.StateSystem` when leaving the level"""
+		self.ai_system.shutdown()
+		pool.clear()
+
+		# LoadingState preloaded the characters' blendfiles, the characters
+		# still alive hold their own references
+		libraries.release_preloaded()
+
+	def toggle_ai_stats(self):
+		"""Show or hide the AI instrumentation overlay, counters are only collected while it is shown"""
+		instrumentation = self.ai_system.instrumentation
+		instrumentation.enabled = not instrumentation.enabled
+		instrumentation.reset()
+
+		if instrumentation.enabled:
+			logic.ui_system.load_layout(AIStatsLayout, instrumentation)
+		else:
+			logic.ui_system.load_layout(None)
 
+	def frame(self, alpha):
+		"""Called by the :class:`.StateSystem` every frame to handle one-off input, the camera and the UI"""
 		cam = logic.getCurrentScene().active_camera
 
-		movevec = Vector((0, 0, 0))
-		self.character.running = False
-
 		for key, status in logic.keyboard.active_events.items():
-			if key == events.WKEY:
-				movevec += Vector((0, 1, 0))
-			elif key == events.AKEY:
-				movevec += Vector((-1, 0, 0))
-			elif key == events.SKEY:
-				movevec += Vector((0, -1, 0))
-			elif key == events.DKEY:
-				movevec += Vector((1, 0, 0))
-			elif key == events.SPACEKEY and status == logic.KX_INPUT_JUST_ACTIVATED:
+			if key == events.SPACEKEY and status == logic.KX_INPUT_JUST_ACTIVATED:
 				self.character.jump()
-			elif key == events.LEFTSHIFTKEY:
-				self.character.running = True
+			elif key == events.F3KEY and status == logic.KX_INPUT_JUST_ACTIVATED:
+				self.toggle_ai_stats()
 
 		for event, status in logic.mouse.active_events.items():
 			if event == events.LEFTMOUSE and status == logic.KX_INPUT_JUST_ACTIVATED:
@@ -143,6 +222,33 @@ class DefaultState:
 
 		logic.mouse.position = (0.5, 0.5)
 
+		if self.ai_system and self.ai_system.instrumentation.enabled:
+			logic.ui_system.layout.update()
+
+	def update(self, dt):
+		"""Called by the :class:`.StateSystem` every tick to run the simulation
+
+		:param dt: The duration of the tick in seconds
+		"""
+		self.character.update(dt)
+
+		cam = logic.getCurrentScene().active_camera
+
+		movevec = Vector((0, 0, 0))
+		self.character.running = False
+
+		for key, status in logic.keyboard.active_events.items():
+			if key == events.WKEY:
+				movevec += Vector((0, 1, 0))
+			elif key == events.AKEY:
+				movevec += Vector((-1, 0, 0))
+			elif key == events.SKEY:
+				movevec += Vector((0, -1, 0))
+			elif key == events.DKEY:
+				movevec += Vector((1, 0, 0))
+			elif key == events.LEFTSHIFTKEY:
+				self.character.running = True
+
 		cam_vec = cam.getAxisVect((0, 0, -1))
 		cam_vec.z = 0
 
@@ -153,33 +259,31 @@ class DefaultState:
 			offset = Euler((0, 0, offset))
 			movevec.rotate(offset)
 
-		self.character.move(movevec.xy)
+		self.character.move(movevec.xy, dt)
 
-		if logic.getAverageFrameRate():
-			dt = 1 / logic.getAverageFrameRate()
-		else:
-			dt = 0
 		if self.ai_system:
 			self.ai_system.update(dt)
 
 		# Update meatsacks
 		drops = []
-		for i in self.meatsacks[:]:
-			i.update()
+		for i in self.entities.each(Enemy):
+			i.update(dt)
 			if i.is_dead:
-				self.meatsacks.remove(i)
+				self.ai_system.remove(self.agents.pop(i))
 				drop = i.handle_drop()
 				if drop:
 					drops.append(drop.groupMembers[0])
-				i.endObject()
+				self.entities.destroy(i, Character.despawn)
 
 		# Mutate any drops (we're only dropping collectables at the time being)
 		if drops:
-			mutate_collectables(drops, self.collectables)
+			mutate_collectables(drops, self.entities)
 
+		# Remove everything killed or collected this frame
+		self.entities.flush()
 
-		if self.collectables is not None and len(self.collectables) == 0:
-			self.collectables = None
+		if not self.all_collected and self.entities.count(CollectableSensor) == 0:
+			self.all_collected = True
 			print("All collectables gathered.")
 
 
@@ -84,3 +84,53 @@ class StartupLayout(bge_utils.Layout):
 
 	def menu_up(self):
 		self.menu.up()
+
+
+class LoadingLayout(bge_utils.Layout):
+	"""Shows the progress of the :class:`.LoadingState`"""
+
+	def __init__(self, sys, data):
+		super().__init__(sys, data)
+
+		self.frame = bgui.Frame(self, border=0)
+		self.frame.colors = [
+					(0.2, 0.2, 0.2, 1),
+					(0.2, 0.2, 0.2, 1),
+					(0, 0, 0, 1),
+					(0, 0, 0, 1)
+				]
+
+		self.label = bgui.Label(self.frame, text="Loading", pt_size=48, pos=(0.1, 0.3))
+		self.progress = bgui.ProgressBar(self.frame, percent=0.0, size=[0.8, 0.05], pos=[0.1, 0.2])
+
+	def set_progress(self, percent, text):
+		self.progress.percent = percent
+		self.label.text = text
+
+
+class AIStatsLayout(bge_utils.Layout):
+	"""Shows the AI instrumentation counters, data is the :class:`.Instrumentation`"""
+
+	LINES = 32
+	REFRESH = 30  #: Frames between refreshes of the text
+
+	def __init__(self, sys, data):
+		super().__init__(sys, data)
+
+		self.frame = bgui.Frame(self, border=0, size=[0.4, 1], pos=[0.6, 0])
+		self.frame.colors = [(0, 0, 0, 0.6)] * 4
+
+		self.labels = [bgui.Label(self.frame, pt_size=14, pos=[0.02, 0.97 - i * 0.03]) for i in range(self.LINES)]
+		self.frames = 0
+
+	def update(self):
+		self.frames += 1
+		if self.frames % self.REFRESH != 1:
+			return
+
+		lines = self.data.report()
+		for i, label in enumerate(self.labels):
+			label.text = lines[i] if i < len(lines) else ""
+
+		# Show the last second or so, not the whole session
+		self.data.reset()
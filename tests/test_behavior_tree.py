@@ -0,0 +1,68 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Checks behavior tree ticks
+
+Run with: python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai.decision_strategies.behavior_tree import BehaviorTree, Node
+
+
+class TreeAgent:
+	def __init__(self):
+		self.blackboard = {}
+		self.time = 0.0
+		self.state_entered = 0.0
+		self.condition_state = {}
+
+
+class BehaviorTreeTest(unittest.TestCase):
+	def tick(self, tree, agent, ticks):
+		actions = []
+		for i in range(ticks):
+			actions.append(tree())
+			agent.time += 1.0
+		return actions
+
+	def test_repeat_restarts_in_the_same_tick(self):
+		agent = TreeAgent()
+		tree = BehaviorTree(agent)
+		tree.load({"root" : {"type" : "REPEAT", "child" :
+			{"type" : "ACTION", "actions" : ["seek"], "duration" : 2}}})
+
+		self.assertEqual(self.tick(tree, agent, 7), [("seek",)] * 7)
+
+	def test_repeat_of_instant_child_finishes_tick(self):
+		agent = TreeAgent()
+		tree = BehaviorTree(agent)
+		tree.load({"root" : {"type" : "REPEAT", "child" :
+			{"type" : "CONDITION", "condition" : ["TIMER", 0]}}})
+
+		self.assertEqual(self.tick(tree, agent, 3), [()] * 3)
+		self.assertEqual(tree.memory[tree.template.root.id], 3)
+
+	def test_node_is_abstract(self):
+		with self.assertRaises(TypeError):
+			Node({"type" : "NODE"})
+
+
+if __name__ == '__main__':
+	unittest.main()
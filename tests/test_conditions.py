@@ -0,0 +1,145 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Checks that generated transition functions agree with compiled conditions
+
+Run with: python -m unittest discover tests
+"""
+
+import itertools
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai.decision_strategies.conditions import PROPERTY_COSTS, compile_condition, compile_transitions,\
+	get_condition
+
+
+TRANSITIONS = [
+	["VALUE", "a", "-inf", 0.5],
+	["COMPARE", "a", ">=", "b"],
+	["COMPARE", "b", "!=", "0.5"],
+	["AND", ["VALUE", "a", 0.2, "inf"], ["NOT", ["TIMER", 1]]],
+	["OR", ["COMPARE", "a", "<", 0.1], ["AND", ["TIMER", 2], ["VALUE", "b", 0.1, 0.9]]],
+	["RANGE", "a", 0.4, 0.6, 0.2],
+]
+
+
+class Reads(dict):
+	"""A blackboard recording the values read from it"""
+	def __init__(self, *args, **kwargs):
+		dict.__init__(self, *args, **kwargs)
+		self.reads = []
+
+	def __getitem__(self, key):
+		self.reads.append(key)
+		return dict.__getitem__(self, key)
+
+
+class RowAgent:
+	def __init__(self, a, b, time):
+		self.blackboard = Reads(a=a, b=b)
+		self.time = time
+		self.state_entered = 0.0
+		self.condition_state = {}
+
+
+class CompileTransitionsTest(unittest.TestCase):
+	def test_matches_closures(self):
+		closures = [compile_condition(i) for i in TRANSITIONS]
+		indices = range(10, 10 + len(TRANSITIONS))
+		values = (0.0, 0.1, 0.3, 0.5, 0.7, 1.0)
+
+		for count in range(len(TRANSITIONS) + 1):
+			generated = compile_transitions([get_condition(i) for i in TRANSITIONS[:count]],\
+				indices[:count])
+
+			for a, b, time in itertools.product(values, values, (0.0, 1.5, 3.0)):
+				agent = RowAgent(a, b, time)
+				expected = next((i for test, i in zip(closures[:count], indices)\
+					if test(agent)), -1)
+				self.assertEqual(generated(RowAgent(a, b, time)), expected, (count, a, b, time))
+
+	def test_no_transitions(self):
+		self.assertEqual(compile_transitions([], [])(RowAgent(0, 0, 0)), -1)
+
+
+
+class RangeMemoryTest(unittest.TestCase):
+	def test_refreshed_behind_short_circuit(self):
+		test = compile_condition(["AND", ["VALUE", "b", 0.5, "inf"], ["RANGE", "a", 0.4, 0.6, 0.2]], 0)
+		agent = RowAgent(0.5, 0.0, 0.0)
+		self.assertFalse(test(agent))
+
+		# The range is left while the first condition is false...
+		agent.blackboard["a"] = 0.9
+		self.assertFalse(test(agent))
+
+		# ...so coming back within the hysteresis band doesn't count as inside
+		agent.blackboard.update(a=0.7, b=1.0)
+		self.assertFalse(test(agent))
+
+	def test_stateful_children_read_once(self):
+		# However expensive, the range is read exactly once per evaluation,
+		# while the expensive stateless child is skipped by the short-circuit
+		PROPERTY_COSTS["a"] = 10
+		try:
+			args = ["AND", ["RANGE", "a", 0.4, 0.6, 0.2], ["VALUE", "a", 0.5, "inf"], ["VALUE", "b", 0.5, "inf"]]
+			closure = compile_condition(args, 0)
+			generated = compile_transitions([get_condition(args)], [0])
+		finally:
+			del PROPERTY_COSTS["a"]
+
+		for test in (closure, lambda agent: generated(agent) == 0):
+			agent = RowAgent(0.55, 0.0, 0.0)
+			self.assertFalse(test(agent))
+			self.assertEqual(agent.blackboard.reads, ["a", "b"])
+
+			del agent.blackboard.reads[:]
+			agent.blackboard["b"] = 1.0
+			self.assertTrue(test(agent))
+			self.assertEqual(agent.blackboard.reads, ["a", "b", "a"])
+
+	def test_shared_by_closure_and_generated_source(self):
+		args = ["OR", ["VALUE", "b", 0.5, "inf"], ["NOT", ["RANGE", "a", 0.4, 0.6, 0.2]]]
+		closure = compile_condition(args, 3)
+		generated = compile_transitions([get_condition(args)], [3])
+
+		agent = RowAgent(0.5, 0.0, 0.0)
+		self.assertFalse(closure(agent))
+		agent.blackboard["a"] = 0.7
+		self.assertEqual(generated(agent), -1)
+		self.assertEqual(len(agent.condition_state), 1)
+
+	def test_memory_cleared_with_template(self):
+		from scripts.ai.agent import Agent
+
+		definition = json.dumps({"states" : [{"name" : "idle", "actions" : [], "entry_actions" : [],
+			"exit_actions" : [], "transitions" : [[["RANGE", "state_time", 1, 2, 0.5], "idle"]]}]})
+
+		agent = Agent()
+		for i in range(3):
+			# Left behind by the previous template
+			agent.condition_state[object()] = True
+			agent.load_definition(definition)
+			agent.blackboard.invalidate()
+			agent.strategy()
+		self.assertEqual(len(agent.condition_state), 1)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,62 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Checks that the definition cache notices changed files
+
+Run with: python -m unittest discover tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai.definition_cache import DefinitionCache
+from scripts.ai.decision_strategies.state_machine import StateMachine
+
+
+class DefinitionCacheTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.path = os.path.join(self.directory.name, "definition.json")
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def write(self, name, mtime):
+		with open(self.path, 'w') as f:
+			json.dump({"states" : [{"name" : name, "actions" : [], "entry_actions" : [],
+				"exit_actions" : [], "transitions" : []}]}, f)
+		os.utime(self.path, (mtime, mtime))
+
+	def test_get_notices_changes(self):
+		cache = DefinitionCache()
+		self.write("first", 1000)
+		old = cache.get(self.path, StateMachine)
+		self.assertIs(cache.get(self.path, StateMachine), old)
+
+		self.write("second", 2000)
+		new = cache.get(self.path, StateMachine)
+		self.assertEqual(new.names, ("second",))
+
+		# Agents still using the old template are switched on the next reload
+		self.assertEqual(cache.reload(), {old : new})
+		self.assertEqual(cache.reload(), {})
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,76 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Checks that the definition compiler reports broken files instead of crashing
+
+Run with: python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai import definition_compiler
+
+
+class DefinitionCompilerTest(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def write(self, name, data):
+		path = os.path.join(self.directory.name, name)
+		with open(path, 'w') as f:
+			json.dump(data, f)
+		return path
+
+	def main(self, *args):
+		output = io.StringIO()
+		with contextlib.redirect_stdout(output):
+			status = definition_compiler.main(list(args))
+		return status, output.getvalue().splitlines()
+
+	def test_missing_file(self):
+		path = os.path.join(self.directory.name, "missing.json")
+		for args in (("--check", path), (path,)):
+			status, lines = self.main(*args)
+			self.assertEqual(status, 1)
+			self.assertEqual(len(lines), 1)
+			self.assertTrue(lines[0].startswith(path + ": "))
+
+	def test_malformed_transition(self):
+		path = self.write("malformed.json", {"states" : [{"name" : "idle", "actions" : [],
+			"entry_actions" : [], "exit_actions" : [], "transitions" : [[["TIMER", 1]], "idle"]}]})
+
+		status, lines = self.main("--check", path)
+		self.assertEqual(status, 1)
+		self.assertEqual(len(lines), 2)
+		self.assertTrue(all(i.startswith(path + ": state idle has a malformed transition") for i in lines))
+
+	def test_not_an_object(self):
+		status, lines = self.main("--check", self.write("list.json", []))
+		self.assertEqual(status, 1)
+		self.assertIn("must be an object", lines[0])
+
+
+if __name__ == '__main__':
+	unittest.main()
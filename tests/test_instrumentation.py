@@ -0,0 +1,75 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Checks that instrumented frames decide like plain ones and time every condition
+
+Run with: python -m unittest discover tests
+"""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai.agent import Agent
+from scripts.ai.instrumentation import counters
+from scripts.ai.manager import Manager
+
+
+DEFINITION = json.dumps({"states" : [
+	{"name" : "idle", "actions" : [], "entry_actions" : [], "exit_actions" : [],
+		"transitions" : [[["AND", ["TIMER", 0.3], ["VALUE", "state_time", 0.5, "inf"]], "busy"]]},
+	{"name" : "busy", "actions" : [], "entry_actions" : [], "exit_actions" : [],
+		"transitions" : [[["VALUE", "state_time", 0.5, "inf"], "idle"], [["TIMER", 0.2], "busy"]]},
+	]})
+
+
+class InstrumentationTest(unittest.TestCase):
+	def tearDown(self):
+		counters.enabled = False
+		counters.reset()
+
+	def run_agents(self, enabled):
+		counters.enabled = enabled
+		manager = Manager()
+		agents = [Agent() for i in range(4)]
+		for agent in agents:
+			agent.load_definition(DEFINITION)
+			manager.add(agent)
+
+		history = []
+		for i in range(40):
+			manager.update(0.1)
+			history.append([agent.strategy.current_state for agent in agents])
+		return history
+
+	def test_same_transitions(self):
+		plain = self.run_agents(False)
+		self.assertEqual(counters.frames, 0)
+
+		self.assertEqual(self.run_agents(True), plain)
+		self.assertEqual(counters.frames, 40)
+
+	def test_conditions_timed(self):
+		self.run_agents(True)
+		conditions = counters.dump()["conditions"]
+		self.assertEqual(sorted(conditions), ["AND", "TIMER", "VALUE"])
+		for calls, total, each in conditions.values():
+			self.assertGreater(calls, 0)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,135 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Checks that ParallelEvaluator takes the same transitions as in-process evaluation
+
+Run with: python -m unittest discover tests
+"""
+
+import gc
+import json
+import math
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai.agent_bge import AgentBGE
+from scripts.ai.headless import HeadlessObject
+from scripts.ai.manager import Manager
+from scripts.ai.parallel import ParallelEvaluator
+from scripts.ai.decision_strategies.state_machine import StateMachine
+
+
+DT = 1 / 60
+
+DEFINITION = {
+	"states" : [
+		{
+			"name" : "idle",
+			"entry_actions" : [],
+			"actions" : [],
+			"exit_actions" : [],
+			"transitions" : [
+				[["AND", ["VALUE", "target_range", "-inf", 12], ["TIMER", 0.25]], "chase"],
+			],
+		},
+		{
+			"name" : "chase",
+			"entry_actions" : [],
+			"actions" : ["seek"],
+			"exit_actions" : [],
+			"transitions" : [
+				[["COMPARE", "target_range", "<", 1.5], "rest"],
+				[["OR", ["COMPARE", "target_range", ">", 14], ["TIMER", 4]], "idle"],
+			],
+		},
+		{
+			"name" : "rest",
+			"entry_actions" : [],
+			"actions" : [],
+			"exit_actions" : [],
+			"transitions" : [
+				[["AND", ["TIMER", 1], ["NOT", ["COMPARE", "speed", ">", 0.05]]], "idle"],
+			],
+		},
+	]
+}
+
+
+@unittest.skipUnless(ParallelEvaluator().available, "NumPy or shared memory are not available")
+class ParallelEvaluatorTest(unittest.TestCase):
+	def setUp(self):
+		with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+			json.dump(DEFINITION, f)
+		self.path = f.name
+
+	def tearDown(self):
+		os.remove(self.path)
+
+	def run_crowd(self, workers, count=200, ticks=240):
+		manager = Manager()
+		if workers:
+			manager.scheduler.evaluate = ParallelEvaluator(workers, min_agents=1)
+
+		target = AgentBGE(HeadlessObject(name="target"))
+		side = int(math.ceil(math.sqrt(count)))
+		for i in range(count):
+			agent = AgentBGE(HeadlessObject((i % side * 1.5 - side * 0.75, i // side * 1.5 - side * 0.75, 0.0)))
+			agent.target = target
+			agent.load_definition(self.path, manager.action_set)
+			manager.add(agent)
+
+		history = []
+		try:
+			for tick in range(ticks):
+				target.object.worldPosition[0] = math.cos(tick * DT * 0.5) * side * 0.6
+				target.object.worldPosition[1] = math.sin(tick * DT * 0.5) * side * 0.6
+				manager.update(DT)
+				history.append([agent.strategy.state for agent in manager.agents])
+		finally:
+			manager.shutdown()
+			if workers:
+				manager.scheduler.evaluate.shutdown()
+
+		return history
+
+	def test_same_transitions(self):
+		local = self.run_crowd(0)
+		parallel = self.run_crowd(2)
+
+		transitions = sum(a != b for before, after in zip(local, local[1:]) for a, b in zip(before, after))
+		self.assertGreater(transitions, 0)
+
+		for tick, (a, b) in enumerate(zip(local, parallel)):
+			self.assertEqual(a, b, "the modes disagree at tick %d" % tick)
+
+	def test_release_replaced_template(self):
+		evaluator = ParallelEvaluator(min_agents=1)
+		template = StateMachine.compile(DEFINITION)
+		group = evaluator._group(template)
+		group.reserve(4)
+		self.assertIsNotNone(group.block)
+
+		del template
+		gc.collect()
+		self.assertIsNone(group.block)
+		self.assertNotIn(group.key, evaluator._live)
+		evaluator.shutdown()
+
+
+if __name__ == '__main__':
+	unittest.main()
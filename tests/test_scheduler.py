@@ -0,0 +1,83 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Checks that scheduler buckets and deferred agents survive agents being removed
+
+Run with: python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai.agent import Agent
+from scripts.ai.manager import Manager
+from scripts.ai.scheduler import Scheduler
+
+
+class SchedulerTest(unittest.TestCase):
+	def test_buckets_survive_removal(self):
+		buckets = 3
+		manager = Manager(scheduler=Scheduler(buckets=buckets))
+		evaluated = []
+		manager.scheduler.evaluate = lambda agents, action_table: evaluated.append(agents)
+
+		agents = [Agent() for i in range(9)]
+		handles = [manager.add(i) for i in agents]
+
+		def frames():
+			del evaluated[:]
+			for i in range(buckets * 2):
+				manager.update_decisions(manager.begin_update(0.1))
+			return {agent : [i for i, due in enumerate(evaluated) if agent in due] for agent in manager.agents}
+
+		before = frames()
+
+		# Swap-remove moves the last agents into the freed places
+		for i in (0, 4):
+			manager.remove(handles[i])
+
+		after = frames()
+		for agent, due in after.items():
+			self.assertEqual(len(due), 2)
+			self.assertEqual(due, before[agent])
+
+		self.assertIsNone(agents[0].handle)
+
+	def test_removed_agent_not_deferred(self):
+		evaluated = []
+
+		class CountingAgent(Agent):
+			def update_actions(self, action_table):
+				evaluated.append(self)
+
+		# A budget of 0 evaluates one agent a frame and defers the others
+		manager = Manager(scheduler=Scheduler(budget=0))
+		agents = [CountingAgent() for i in range(3)]
+		handles = [manager.add(i) for i in agents]
+
+		manager.update_decisions(manager.begin_update(0.1))
+		self.assertEqual(evaluated, agents[:1])
+
+		manager.remove(handles[1])
+		del evaluated[:]
+		manager.update_decisions(manager.begin_update(0.1))
+		manager.update_decisions(manager.begin_update(0.1))
+		self.assertNotIn(agents[1], evaluated)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,79 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Checks the fixed tick of the StateSystem
+
+Run with: python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.framework import state
+
+
+class Clock:
+	def __init__(self):
+		self.now = 0.0
+
+	def perf_counter(self):
+		return self.now
+
+
+class CountingState:
+	def __init__(self):
+		self.ticks = 0
+
+	def update(self, dt):
+		self.ticks += 1
+
+
+class StateSystemTest(unittest.TestCase):
+	def setUp(self):
+		self.time = state.time
+		state.time = self.clock = Clock()
+
+	def tearDown(self):
+		state.time = self.time
+
+	def ticks_per_frame(self, frame_times):
+		system = state.StateSystem(CountingState)
+		counts = []
+		for frame_time in frame_times:
+			before = system.state.ticks
+			self.clock.now += frame_time
+			system.update()
+			counts.append(system.state.ticks - before)
+		return counts
+
+	def test_jittery_frames_at_the_tick_rate(self):
+		# Start half way into a tick, where jitter would alternate 0 and 2 ticks
+		jitter = [0.0001, -0.0001, 0.0002, -0.0002] * 25
+		counts = self.ticks_per_frame([1 / 120] + [1 / 60 + i for i in jitter])
+		self.assertEqual(counts[1:], [1] * len(jitter))
+
+	def test_slow_frames(self):
+		counts = self.ticks_per_frame([1 / 30 + 0.0001] * 10)
+		self.assertEqual(counts, [2] * 10)
+
+	def test_fast_frames(self):
+		counts = self.ticks_per_frame([1 / 120 + 0.00001] * 10)
+		self.assertEqual(sum(counts), 5)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,73 @@
+#   Copyright 2013 Daniel Stokes, Mitchell Stokes
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""Checks that per-agent and NumPy utility scoring agree
+
+Run with: python -m unittest discover tests
+"""
+
+import itertools
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scripts.ai.batch import numpy
+from scripts.ai.decision_strategies.utility import Consideration, Utility
+
+
+CONSIDERATIONS = [
+	{"curve" : "LINEAR", "slope" : -1, "offset" : 1},
+	{"curve" : "POLYNOMIAL", "exponent" : 0.5, "shift" : 0.5},
+	{"curve" : "POLYNOMIAL", "exponent" : 2, "shift" : 0.5, "slope" : 4},
+	{"curve" : "POLYNOMIAL", "exponent" : 3, "shift" : 0.25},
+	{"curve" : "POLYNOMIAL", "exponent" : -1, "shift" : 0.5, "slope" : 0.1},
+	{"curve" : "LOGISTIC", "slope" : 10, "shift" : 0.5},
+	{"curve" : "STEP", "shift" : 0.3},
+]
+
+
+class ConsiderationTest(unittest.TestCase):
+	def test_fractional_exponent_below_shift(self):
+		consideration = Consideration({"input" : "x", "curve" : "POLYNOMIAL", "exponent" : 0.5, "shift" : 0.5})
+		self.assertEqual(consideration.score(0.2), 0.0)
+		self.assertAlmostEqual(consideration.score(0.75), 0.5)
+
+
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class ScoresBatchTest(unittest.TestCase):
+	def test_matches_per_agent_scores(self):
+		options = []
+		for n, data in enumerate(CONSIDERATIONS):
+			options.append({"name" : "option%d" % n, "considerations" : [dict(data, input="x")]})
+
+		# Two considerations multiplied together, and an option without any
+		options.append({"considerations" : [dict(CONSIDERATIONS[1], input="x"), dict(CONSIDERATIONS[5], input="y")]})
+		options.append({"weight" : 0.2})
+
+		template = Utility.compile({"options" : options})
+		values = [-0.5, 0.0, 0.1, 0.2, 0.25, 0.3, 0.5, 0.7, 1.0, 1.5]
+		inputs = list(itertools.product(values, repeat=len(template.inputs)))
+
+		batch = template.scores_batch(numpy.array(inputs))
+		for row, values in zip(batch, inputs):
+			single = template.scores(dict(zip(template.inputs, values)))
+			for expected, got in zip(single, row):
+				self.assertFalse(numpy.isnan(got))
+				self.assertAlmostEqual(expected, got)
+
+
+if __name__ == '__main__':
+	unittest.main()